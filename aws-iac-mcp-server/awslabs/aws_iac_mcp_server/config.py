@@ -12,5 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 DEFAULT_REGION = ['us-east-1']
 MAX_TEMPLATE_SIZE_BYTES = 500_000
+
+# Transport: "stdio" (default) or "http" for streamable HTTP
+MCP_TRANSPORT = os.environ.get('MCP_TRANSPORT', 'stdio').lower()
+MCP_HTTP_HOST = os.environ.get('MCP_HTTP_HOST', '0.0.0.0')
+MCP_HTTP_PORT = int(os.environ.get('MCP_HTTP_PORT', '8001'))
+MCP_HTTP_PATH = os.environ.get('MCP_HTTP_PATH', '/mcp')
+# MCP_HTTP_STATELESS=false keeps MCP sessions open between calls (see start-http-servers.sh)
+MCP_HTTP_STATELESS = os.environ.get('MCP_HTTP_STATELESS', 'true').lower() in ('true', '1', 'yes')
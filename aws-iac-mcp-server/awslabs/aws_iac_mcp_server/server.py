@@ -23,6 +23,13 @@ from fastmcp.server.proxy import ProxyClient
 from loguru import logger
 
 from awslabs.aws_iac_mcp_server.client.aws_knowledge_client import KNOWLEDGE_MCP_ENDPOINT
+from awslabs.aws_iac_mcp_server.config import (
+    MCP_HTTP_HOST,
+    MCP_HTTP_PATH,
+    MCP_HTTP_PORT,
+    MCP_HTTP_STATELESS,
+    MCP_TRANSPORT,
+)
 from awslabs.aws_iac_mcp_server.client.mcp_proxy import create_local_proxied_tool, get_remote_proxy_server_tool
 from awslabs.aws_iac_mcp_server.sanitizer import sanitize_tool_response
 from awslabs.aws_iac_mcp_server.tools.cloudformation_compliance_checker import check_compliance, initialize_guard_rules
@@ -169,7 +176,12 @@ def main():
         asyncio.run(_create_read_tool_proxy())
     except Exception as e:
         logger.warning(f"Failed to initialize read tool proxy: {e}")
-    mcp.run()
+    if MCP_TRANSPORT in ('http', 'streamable-http'):
+        from platform_aws_context.http_transport import run_streamable_http
+
+        run_streamable_http(mcp, MCP_HTTP_HOST, MCP_HTTP_PORT, MCP_HTTP_PATH, MCP_HTTP_STATELESS)
+    else:
+        mcp.run()
 
 if __name__ == '__main__':
     main()
@@ -329,6 +329,26 @@ class TestMain:
         mock_asyncio_run.assert_called_once()
         mock_mcp.run.assert_called_once()
 
+    @patch('awslabs.aws_iac_mcp_server.server.MCP_TRANSPORT', 'http')
+    @patch('awslabs.aws_iac_mcp_server.server.mcp')
+    @patch('asyncio.run')
+    def test_main_http_transport(self, mock_asyncio_run, mock_mcp):
+        """Test that MCP_TRANSPORT=http serves stateless streamable HTTP."""
+        from awslabs.aws_iac_mcp_server.server import main
+
+        main()
+
+        mock_mcp.custom_route.assert_any_call('/health', methods=['GET'])
+        mock_mcp.custom_route.assert_any_call('/metrics', methods=['GET'])
+        mock_mcp.run.assert_called_once_with(
+            transport='http',
+            host='0.0.0.0',
+            port=8001,
+            path='/mcp',
+            stateless_http=True,
+            json_response=True,
+        )
+
 
 class TestCreateReadToolProxy:
     """Test _create_read_tool_proxy function."""
@@ -0,0 +1,125 @@
+"""
+Warm per-tier agent pools so requests don't rebuild models, tool registries and prompts
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from strands import Agent
+from strands.models import BedrockModel
+from strands.agent.state import AgentState
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.telemetry.metrics import EventLoopMetrics
+from .agents import ALL_TOOL_FUNCTIONS, set_tool_context, reset_tool_context
+from .tool_policy import USER_ALLOWED_TOOL_NAMES, ALL_ADMIN_TOOLS
+from .prompts import USER_AGENT_PROMPT, ADMIN_AGENT_PROMPT
+
+AGENT_POOL_SIZE = int(os.environ.get('AGENT_POOL_SIZE', '4'))
+AGENT_POOL_MAX_IDLE = int(os.environ.get('AGENT_POOL_MAX_IDLE', '16'))
+
+
+class AgentPool:
+    """Per-tier template (model, tools, prompt) plus a stack of idle, reset agents"""
+
+    def __init__(self, tier: str, tool_names: set, system_prompt: str):
+        self.tier = tier
+        self.system_prompt = system_prompt
+        self.tools = [ALL_TOOL_FUNCTIONS[name] for name in sorted(tool_names) if name in ALL_TOOL_FUNCTIONS]
+        self._model = None
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+        self.discarded = 0
+
+    @property
+    def model(self) -> BedrockModel:
+        # BedrockModel is stateless per call, so one client serves every agent in the tier
+        if self._model is None:
+            self._model = BedrockModel(
+                model_id="us.amazon.nova-pro-v1:0",
+                temperature=0.3
+            )
+        return self._model
+
+    def _build(self) -> Agent:
+        self.built += 1
+        return Agent(
+            model=self.model,
+            tools=self.tools,
+            system_prompt=self.system_prompt
+        )
+
+    def warm(self, size: int = AGENT_POOL_SIZE):
+        """Pre-build idle agents at startup"""
+        agents = [self._build() for _ in range(size)]
+        with self._lock:
+            self._idle.extend(agents)
+
+    def acquire(self) -> Agent:
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._build()
+
+    def release(self, agent: Agent, reusable: bool = True):
+        """Reset conversation state and return the agent to the pool; agents from failed requests are dropped"""
+        if not reusable:
+            with self._lock:
+                self.discarded += 1
+            return
+        agent.messages = []
+        agent.state = AgentState()
+        agent.conversation_manager = SlidingWindowConversationManager()
+        agent.event_loop_metrics = EventLoopMetrics()
+        # A run that stopped on an interrupt returns normally but leaves it activated
+        if hasattr(agent, "_interrupt_state"):
+            agent._interrupt_state = type(agent._interrupt_state)()
+        with self._lock:
+            if len(self._idle) < AGENT_POOL_MAX_IDLE:
+                self._idle.append(agent)
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = len(self._idle)
+        return {"idle": idle, "built": self.built, "reused": self.reused, "discarded": self.discarded}
+
+
+AGENT_POOLS = {
+    "user": AgentPool("user", USER_ALLOWED_TOOL_NAMES, USER_AGENT_PROMPT),
+    "admin": AgentPool("admin", ALL_ADMIN_TOOLS, ADMIN_AGENT_PROMPT)
+}
+
+
+def warm_agent_pools():
+    """Build per-tier templates and idle agents once at startup"""
+    for pool in AGENT_POOLS.values():
+        start = time.time()
+        pool.warm()
+        print(f"[AGENTS] Warmed {pool.tier} pool with {AGENT_POOL_SIZE} agents in {int((time.time() - start) * 1000)}ms")
+
+
+@contextmanager
+def pooled_agent(tier: str, ctx: dict):
+    """
+    Check out a warm agent for one request
+
+    Binds ctx as the request's tool context and yields (agent, setup_ms).
+    When the request finishes the context is unbound and the agent is reset
+    and returned to the pool - or dropped if the request raised or was
+    cancelled mid-run, since its state can't be trusted.
+    """
+    start = time.time()
+    token = set_tool_context(ctx)
+    pool = AGENT_POOLS[tier]
+    agent = pool.acquire()
+    setup_ms = round((time.time() - start) * 1000, 2)
+    reusable = False
+    try:
+        yield agent, setup_ms
+        reusable = True
+    finally:
+        pool.release(agent, reusable)
+        reset_tool_context(token)
@@ -2,6 +2,7 @@
 Strands-based agents for tiered access control
 """
 import json
+import contextvars
 from strands import Agent, tool
 from strands.models import BedrockModel
 from typing import Dict, Any, List, Optional
@@ -12,8 +13,26 @@ from .param_resolution import resolve_with_aliases
 from schemas import CostAnalysis, PRAnalysis, DeploymentStatus
 from observability import measure_execution
 
-# Global context for tool execution
-_tool_context = {}
+# Request-scoped context for tool execution. Each request runs in its own
+# asyncio task, and Strands runs sync tools via asyncio.to_thread, which copies
+# the caller's context - so concurrent requests never see each other's values.
+_tool_context: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("tool_context", default=None)
+
+def get_tool_context() -> dict:
+    """Get the tool context bound to the current request"""
+    return _tool_context.get() or {}
+
+def set_tool_context(ctx: dict) -> contextvars.Token:
+    """Bind the tool context to the current request"""
+    return _tool_context.set(ctx)
+
+def reset_tool_context(token: contextvars.Token):
+    """Unbind a context set by set_tool_context once its request is done"""
+    try:
+        _tool_context.reset(token)
+    except ValueError:
+        # Finalized in another context (e.g. an abandoned stream closed by the loop) - nothing left to unbind
+        pass
 
 # Define actual tool functions that Strands can execute
 
@@ -26,8 +45,8 @@ def ecs_call_tool(api_operation: str = "ListClusters", api_params: dict = None)
         api_params: Dictionary of parameters to pass to the API operation
     """
     # Get context parameters from metadata (fallback values)
-    metadata = _tool_context.get("metadata", {})
-    aws_ctx = _tool_context.get("aws", {})
+    metadata = get_tool_context().get("metadata", {})
+    aws_ctx = get_tool_context().get("aws", {})
     
     # Extract infrastructure parameters from context
     account_id = aws_ctx.get("account_id", "500330120558")
@@ -46,8 +65,8 @@ def ecs_call_tool(api_operation: str = "ListClusters", api_params: dict = None)
         "region": region
     }
     
-    with measure_execution("ecs_call_tool", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("ecs_call_tool", final_params, _tool_context)
+    with measure_execution("ecs_call_tool", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("ecs_call_tool", final_params, get_tool_context())
     return format_tool_result("ecs_call_tool", result)
 
 @tool(name="iac_call_tool", description="Query CloudFormation templates by stack_name")
@@ -58,8 +77,8 @@ def iac_call_tool(stack_name: str = "") -> str:
         stack_name: CloudFormation stack name to query
     """
     # Get context parameters from metadata (fallback values)
-    metadata = _tool_context.get("metadata", {})
-    aws_ctx = _tool_context.get("aws", {})
+    metadata = get_tool_context().get("metadata", {})
+    aws_ctx = get_tool_context().get("aws", {})
     
     # Extract infrastructure parameters from context
     account_id = aws_ctx.get("account_id", "500330120558")
@@ -74,33 +93,33 @@ def iac_call_tool(stack_name: str = "") -> str:
         "region": region
     }
     
-    with measure_execution("iac_call_tool", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("iac_call_tool", final_params, _tool_context)
+    with measure_execution("iac_call_tool", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("iac_call_tool", final_params, get_tool_context())
     return format_tool_result("iac_call_tool", result)
 
 @tool(name="deploy_get_run", description="Get deployment run details by run_id")
 def deploy_get_run_tool(run_id: str) -> str:
     """Get deployment run details"""
-    with measure_execution("deploy_get_run", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("deploy_get_run", {"run_id": run_id}, _tool_context)
+    with measure_execution("deploy_get_run", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("deploy_get_run", {"run_id": run_id}, get_tool_context())
     return format_tool_result("deploy_get_run", result)
 
 @tool(name="deploy_get_steps", description="Get deployment steps by run_id")
 def deploy_get_steps_tool(run_id: str) -> str:
     """Get deployment steps"""
     # Get limit from metadata context, default to 200
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     limit = metadata.get("limit", 200)
     
-    with measure_execution("deploy_get_steps", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("deploy_get_steps", {"run_id": run_id, "limit": limit}, _tool_context)
+    with measure_execution("deploy_get_steps", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("deploy_get_steps", {"run_id": run_id, "limit": limit}, get_tool_context())
     return format_tool_result("deploy_get_steps", result)
 
 @tool(name="deploy_find_latest", description="Find latest deployment runs")
 def deploy_find_latest_tool() -> str:
     """Find latest deployment"""
     # Get repository and limit from metadata context
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     repository = metadata.get("repository") or metadata.get("repo", "")
     limit = metadata.get("limit", 10)
     
@@ -110,90 +129,90 @@ def deploy_find_latest_tool() -> str:
         return format_tool_result("deploy_find_latest", {"error": "Repository is required"})
     
     params = {"repository": repository, "limit": limit}
-    with measure_execution("deploy_find_latest", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("deploy_find_latest", params, _tool_context)
+    with measure_execution("deploy_find_latest", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("deploy_find_latest", params, get_tool_context())
     return format_tool_result("deploy_find_latest", result)
 
 @tool(name="deploy_find_active", description="Find active/running deployment runs")
 def deploy_find_active_tool() -> str:
     """Find active deployments"""
     # Get repository and limit from metadata context
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     repository = metadata.get("repository", "") or metadata.get("repo", "")
     limit = metadata.get("limit", 10)
     
     print(f"[DEBUG] deploy_find_active - repository: {repository}, limit: {limit}")
     
     params = {"repository": repository, "limit": limit}
-    with measure_execution("deploy_find_active", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("deploy_find_active", params, _tool_context)
+    with measure_execution("deploy_find_active", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("deploy_find_active", params, get_tool_context())
     return format_tool_result("deploy_find_active", result)
 
 @tool(name="deploy_get_summary", description="Get deployment summary by run_id")
 def deploy_get_summary_tool(run_id: str) -> str:
     """Get deployment summary"""
-    with measure_execution("deploy_get_summary", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("deploy_get_summary", {"run_id": run_id}, _tool_context)
+    with measure_execution("deploy_get_summary", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("deploy_get_summary", {"run_id": run_id}, get_tool_context())
     return format_tool_result("deploy_get_summary", result)
 
 @tool(name="deploy_status", description="Check deployment status - auto-detects latest run_id from GitHub comments if not provided")
 def deploy_status_tool(repository: str, pr_number: Optional[int] = None, limit: int = 3, run_id: Optional[str] = None) -> str:
     """Check deployment status"""
-    with measure_execution("deploy_status", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
+    with measure_execution("deploy_status", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
         result = execute_tool("deploy_status", {
             "repository": repository,
             "pr_number": pr_number,
             "limit": limit,
             "run_id": run_id
-        }, _tool_context)
+        }, get_tool_context())
     return format_tool_result("deploy_status", result)
 
 @tool(name="deploy_workflow", description="Complete deployment workflow with auto-diagnostics")
 def deploy_workflow_tool(repository: str, branch: str = "main", pr_number: Optional[int] = None, environment: str = "auto", region: str = "us-east-1") -> str:
     """Complete deployment workflow"""
-    with measure_execution("deploy_workflow", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
+    with measure_execution("deploy_workflow", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
         result = execute_tool("deploy_workflow", {
             "repository": repository,
             "branch": branch, 
             "pr_number": pr_number,
             "environment": environment,
             "region": region
-        }, _tool_context)
+        }, get_tool_context())
     return format_tool_result("deploy_workflow", result)
 
 @tool(name="deploy_rollback", description="Rollback to previous successful deployment")
 def deploy_rollback_tool(repository: str, environment: str = "staging", target_run_id: Optional[str] = None) -> str:
     """Rollback deployment"""
-    with measure_execution("deploy_rollback", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
+    with measure_execution("deploy_rollback", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
         result = execute_tool("deploy_rollback", {
             "repository": repository,
             "environment": environment,
             "target_run_id": target_run_id
-        }, _tool_context)
+        }, get_tool_context())
     return format_tool_result("deploy_rollback", result)
 
 @tool(name="pricingcalc_estimate_from_cfn", description="Calculate pricing from CloudFormation template")
 def pricingcalc_estimate_from_cfn_tool(template_content: str) -> str:
     """Estimate pricing from CloudFormation template"""
     # Get region from metadata context, default to us-east-1
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     region = metadata.get("region", "us-east-1")
     
     params = {"template_content": template_content, "region": region}
-    with measure_execution("pricingcalc_estimate_from_cfn", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("pricingcalc_estimate_from_cfn", params, _tool_context)
+    with measure_execution("pricingcalc_estimate_from_cfn", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("pricingcalc_estimate_from_cfn", params, get_tool_context())
     return format_tool_result("pricingcalc_estimate_from_cfn", result)
 
 @tool(name="pricingcalc_estimate_with_custom_specs", description="Calculate pricing with custom specifications")
 def pricingcalc_estimate_with_custom_specs_tool(custom_specs: str) -> str:
     """Estimate pricing with custom specifications"""
     # Get region from metadata context, default to us-east-1
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     region = metadata.get("region", "us-east-1")
     
     params = {"custom_specs": custom_specs, "region": region}
-    with measure_execution("pricingcalc_estimate_with_custom_specs", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("pricingcalc_estimate_with_custom_specs", params, _tool_context)
+    with measure_execution("pricingcalc_estimate_with_custom_specs", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("pricingcalc_estimate_with_custom_specs", params, get_tool_context())
     return format_tool_result("pricingcalc_estimate_with_custom_specs", result)
 
 @tool(name="pricingcalc_estimate_from_stack", description="Estimate costs for an existing CloudFormation stack.")
@@ -205,11 +224,11 @@ def pricingcalc_estimate_from_stack_tool(stack_name: str) -> str:
     # Debug: Print everything we can see
     print(f"[DEBUG] === PRICING TOOL CALLED ===")
     print(f"[DEBUG] Input stack_name: '{stack_name}'")
-    print(f"[DEBUG] Full _tool_context: {_tool_context}")
+    print(f"[DEBUG] Full tool context: {get_tool_context()}")
     
     # Pull the data Nova is blind to from the verified request context
-    aws_ctx = _tool_context.get("aws", {})
-    metadata = _tool_context.get("metadata", {})
+    aws_ctx = get_tool_context().get("aws", {})
+    metadata = get_tool_context().get("metadata", {})
     
     print(f"[DEBUG] AWS context: {aws_ctx}")
     print(f"[DEBUG] Metadata: {metadata}")
@@ -235,8 +254,8 @@ def pricingcalc_estimate_from_stack_tool(stack_name: str) -> str:
         return error_msg
     
     # Execute with full payload
-    with measure_execution("pricingcalc_estimate_from_stack", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("pricingcalc_estimate_from_stack", final_params, _tool_context)
+    with measure_execution("pricingcalc_estimate_from_stack", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("pricingcalc_estimate_from_stack", final_params, get_tool_context())
     
     print(f"[DEBUG] MCP result: {result}")
     return format_tool_result("pricingcalc_estimate_from_stack", result)
@@ -247,14 +266,14 @@ def pr_get_diff_tool(repo: str, pr_number: int, actor: str, run_id: str, options
     params = {"repo": repo, "pr_number": pr_number, "actor": actor, "run_id": run_id}
     if options:
         params["options"] = options
-    with measure_execution("pr_get_diff", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("pr_get_diff", params, _tool_context)
+    with measure_execution("pr_get_diff", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("pr_get_diff", params, get_tool_context())
     return format_tool_result("pr_get_diff", result)
 
 @tool(name="pr_summarize", description="Analyze PR security by repo, pr_number, actor, run_id, diff, changed_files, and optional options")
 def pr_summarize_tool(repo: str, pr_number: int, actor: str, run_id: str, diff: str, changed_files: List[str], options: dict = None) -> str:
     """Analyze PR security"""
-    with measure_execution("pr_summarize", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
+    with measure_execution("pr_summarize", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
         result = execute_tool("pr_summarize", {
             "repo": repo, 
             "pr_number": pr_number, 
@@ -263,45 +282,45 @@ def pr_summarize_tool(repo: str, pr_number: int, actor: str, run_id: str, diff:
             "diff": diff, 
             "changed_files": changed_files, 
             "options": options
-        }, _tool_context)
+        }, get_tool_context())
     return format_tool_result("pr_summarize", result)
 
 @tool(name="deploy_run", description="Run deployment workflow by repo, workflow, and optional branch")
 def deploy_run_tool(repo: str, workflow: str, branch: str = "main") -> str:
     """Run deployment workflow"""
-    with measure_execution("deploy_run", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("deploy_run", {"repo": repo, "workflow": workflow, "branch": branch}, _tool_context)
+    with measure_execution("deploy_run", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("deploy_run", {"repo": repo, "workflow": workflow, "branch": branch}, get_tool_context())
     return format_tool_result("deploy_run", result)
 
 @tool(name="pricingcalc_estimate", description="Calculate AWS pricing by service, region, and additional parameters")
 def pricingcalc_estimate_tool(service: str, region: str = "us-east-1", **kwargs) -> str:
     """Calculate AWS pricing estimates"""
     params = {"service": service, "region": region, **kwargs}
-    with measure_execution("pricingcalc_estimate", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("pricingcalc_estimate", params, _tool_context)
+    with measure_execution("pricingcalc_estimate", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("pricingcalc_estimate", params, get_tool_context())
     return format_tool_result("pricingcalc_estimate", result)
 
 @tool(name="pricingcalc_compare", description="Compare pricing across regions by service and regions list")
 def pricingcalc_compare_tool(service: str, regions: List[str], **kwargs) -> str:
     """Compare pricing across regions"""
     params = {"service": service, "regions": regions, **kwargs}
-    with measure_execution("pricingcalc_compare", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("pricingcalc_compare", params, _tool_context)
+    with measure_execution("pricingcalc_compare", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("pricingcalc_compare", params, get_tool_context())
     return format_tool_result("pricingcalc_compare", result)
 
 @tool(name="repo_list", description="List repositories by optional organization name")
 def repo_list_tool(org: str = None) -> str:
     """List repositories"""
     params = {"org": org} if org else {}
-    with measure_execution("repo_list", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("repo_list", params, _tool_context)
+    with measure_execution("repo_list", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("repo_list", params, get_tool_context())
     return format_tool_result("repo_list", result)
 
 @tool(name="repo_info", description="Get repository information by repo name")
 def repo_info_tool(repo: str) -> str:
     """Get repository information"""
-    with measure_execution("repo_info", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("repo_info", {"repo": repo}, _tool_context)
+    with measure_execution("repo_info", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("repo_info", {"repo": repo}, get_tool_context())
     return format_tool_result("repo_info", result)
 
 @tool(name="pr_analyze", description="Comprehensive PR analysis with security scanning, best practices review, and Checkov integration. Use this for all PR analysis requests.")
@@ -310,7 +329,7 @@ def pr_analyze_tool(repo_hint: str = "") -> str:
     Combined tool: Programmatically handles large data transfers.
     Keeps large diffs out of LLM context during the planning phase.
     """
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     repo = metadata.get("repository") or repo_hint
     pr_num = metadata.get("pr_number")
     actor = metadata.get("actor", "")
@@ -324,7 +343,7 @@ def pr_analyze_tool(repo_hint: str = "") -> str:
         "pr_number": pr_num,
         "actor": actor,
         "run_id": run_id
-    }, _tool_context)
+    }, get_tool_context())
     
     if isinstance(diff_response, dict) and "error" in diff_response:
         return json.dumps(diff_response)
@@ -354,7 +373,7 @@ def pr_analyze_tool(repo_hint: str = "") -> str:
             "run_id": run_id,
             "diff": diff_text,  # Passed directly to backend tool
             "changed_files": changed_files
-        }, _tool_context)
+        }, get_tool_context())
         
         # Step 4: Return only final analysis to Nova - no raw diff content
         if isinstance(analysis_result, dict) and "result" in analysis_result:
@@ -368,7 +387,7 @@ def pr_analyze_tool(repo_hint: str = "") -> str:
 def pr_get_diff_tool() -> str:
     """Get PR diff and changed files from GitHub"""
     # Get context parameters from metadata (fallback values)
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     
     # User input takes precedence, context provides fallback
     final_repo = metadata.get("repository") or metadata.get("repo", "")
@@ -389,8 +408,8 @@ def pr_get_diff_tool() -> str:
         "run_id": final_run_id
     }
 
-    with measure_execution("pr_get_diff", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("pr_get_diff", final_params, _tool_context)
+    with measure_execution("pr_get_diff", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("pr_get_diff", final_params, get_tool_context())
     
     # Return clean result without JSON-RPC wrapper that confuses Nova
     if isinstance(result, dict) and "result" in result:
@@ -401,7 +420,7 @@ def pr_get_diff_tool() -> str:
 def pr_summarize_tool(diff: str, changed_files: list) -> str:
     """Analyze pull request for security and best practices"""
     # Get context parameters from metadata (fallback values)
-    metadata = _tool_context.get("metadata", {})
+    metadata = get_tool_context().get("metadata", {})
     
     # User input takes precedence, context provides fallback
     final_repo = metadata.get("repository") or metadata.get("repo", "")
@@ -424,8 +443,8 @@ def pr_summarize_tool(diff: str, changed_files: list) -> str:
         "changed_files": changed_files
     }
 
-    with measure_execution("pr_summarize", _tool_context.get("tier", "unknown"), metadata):
-        result = execute_tool("pr_summarize", final_params, _tool_context)
+    with measure_execution("pr_summarize", get_tool_context().get("tier", "unknown"), metadata):
+        result = execute_tool("pr_summarize", final_params, get_tool_context())
     
     # Return clean result without JSON-RPC wrapper that confuses Nova
     if isinstance(result, dict) and "result" in result:
@@ -435,8 +454,8 @@ def pr_summarize_tool(diff: str, changed_files: list) -> str:
 @tool(name="workflow_list", description="List workflows by repository name")
 def workflow_list_tool(repo: str) -> str:
     """List workflows for repository"""
-    with measure_execution("workflow_list", _tool_context.get("tier", "unknown"), _tool_context.get("metadata", {})):
-        result = execute_tool("workflow_list", {"repo": repo}, _tool_context)
+    with measure_execution("workflow_list", get_tool_context().get("tier", "unknown"), get_tool_context().get("metadata", {})):
+        result = execute_tool("workflow_list", {"repo": repo}, get_tool_context())
     return format_tool_result("workflow_list", result)
 
 # Map tool names to functions
@@ -468,8 +487,7 @@ ALL_TOOL_FUNCTIONS = {
 
 def build_user_agent(ctx: dict) -> Agent:
     """Build user agent with restricted tool set"""
-    global _tool_context
-    _tool_context = ctx
+    set_tool_context(ctx)
     
     model = BedrockModel(
         model_id="us.amazon.nova-pro-v1:0",
@@ -486,8 +504,7 @@ def build_user_agent(ctx: dict) -> Agent:
 
 def build_admin_agent(ctx: dict) -> Agent:
     """Build admin agent with full tool set"""
-    global _tool_context
-    _tool_context = ctx
+    set_tool_context(ctx)
     
     model = BedrockModel(
         model_id="us.amazon.nova-pro-v1:0", 
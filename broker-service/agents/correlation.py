@@ -4,6 +4,7 @@ Correlation ID generation and propagation for end-to-end request tracing
 import uuid
 import hashlib
 from typing import Dict, Any, Optional
+from opentelemetry import propagate
 
 
 def get_or_create_correlation_id(
@@ -48,9 +49,12 @@ def get_or_create_correlation_id(
 
 
 def add_correlation_headers(headers: Dict[str, str], correlation_id: str) -> Dict[str, str]:
-    """Add correlation ID to outbound request headers"""
+    """Add correlation ID and the current trace context to outbound request headers"""
     headers = headers.copy()
-    headers['x-correlation-id'] = correlation_id
+    if correlation_id:
+        headers['x-correlation-id'] = correlation_id
+    # W3C traceparent so backend spans join the broker's trace
+    propagate.inject(headers)
     return headers
 
 
@@ -3,6 +3,7 @@ Context-aware parameter resolution with alias handling
 """
 import json
 from typing import Dict, Any, Optional, List
+from observability import timed_stage, record_tokens
 
 def build_request_context(request_data: dict, tier: str) -> dict:
     """Build request context from inbound request"""
@@ -89,15 +90,20 @@ Examples:
 
         bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
         
-        response = bedrock.invoke_model(
-            modelId='amazon.nova-micro-v1:0',
-            body=json.dumps({
-                "messages": [{"role": "user", "content": [{"text": extraction_prompt}]}],
-                "inferenceConfig": {"maxTokens": 100, "temperature": 0}
-            })
-        )
-        
-        result = json.loads(response['body'].read())
+        with timed_stage("param_extraction", **{"gen_ai.request.model": "amazon.nova-micro-v1:0"}) as span:
+            response = bedrock.invoke_model(
+                modelId='amazon.nova-micro-v1:0',
+                body=json.dumps({
+                    "messages": [{"role": "user", "content": [{"text": extraction_prompt}]}],
+                    "inferenceConfig": {"maxTokens": 100, "temperature": 0}
+                })
+            )
+            
+            result = json.loads(response['body'].read())
+            usage = result.get('usage', {})
+            span.set_attribute("gen_ai.usage.input_tokens", usage.get('inputTokens', 0))
+            span.set_attribute("gen_ai.usage.output_tokens", usage.get('outputTokens', 0))
+            record_tokens(usage.get('inputTokens', 0), usage.get('outputTokens', 0))
         content = result['output']['message']['content'][0]['text'].strip()
         
         print(f"[DEBUG] Nova extraction - Input: {prompt[:50]}...")
@@ -0,0 +1,118 @@
+"""
+Tool result cache with per-tool TTLs and in-flight request coalescing
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+from platform_aws_context.tool_results import is_error_response
+from response_cache import is_write_call
+
+TOOL_CACHE_MAX_ENTRIES = int(os.environ.get('TOOL_CACHE_MAX_ENTRIES', '512'))
+
+# TTL in seconds by tool name prefix; tools not listed here are never cached
+TOOL_RESULT_TTLS = {
+    "pricingcalc_": 3600,   # price lists move slowly
+    "pr_summarize": 300,
+    "pr_get_diff": 120,
+    "ecs_call_tool": 30,
+    "iac_call_tool": 30,
+    "deploy_": 15           # run status changes while a deployment is live
+}
+
+
+def get_tool_result_ttl(tool_name: str, args: dict) -> Optional[int]:
+    """TTL for this call's result, or None if it must always hit the backend"""
+    if is_write_call(tool_name, args):
+        return None
+    for prefix, ttl in TOOL_RESULT_TTLS.items():
+        if tool_name.startswith(prefix):
+            return ttl
+    return None
+
+
+def make_tool_cache_key(tool_name: str, args: dict) -> str:
+    """Key on the tool name and canonicalized final args"""
+    canonical = json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{tool_name}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+
+class ToolResultCache:
+    """
+    Size-bounded LRU of tool results
+
+    Concurrent calls with the same key share one backend request: the first
+    caller executes, the rest wait on its future.
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_call(self, key: str, ttl: int, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                self.misses += 1
+                inflight = Future()
+                self._inflight[key] = inflight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return inflight.result()
+
+        try:
+            value = call()
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        else:
+            inflight.set_result(value)
+            # Error payloads are shared with waiters but never cached - including the gateway
+            # envelope's in-band result.structuredContent.error for ecs_call_tool/iac_call_tool
+            if not is_error_response(value):
+                self._store(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _store(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
+
+
+tool_result_cache = ToolResultCache()
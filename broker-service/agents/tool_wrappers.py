@@ -6,6 +6,9 @@ import json
 from typing import Dict, Any, Optional
 from .tool_policy import is_tool_allowed, get_denied_tool_response
 from .param_resolution import resolve_required_params, MissingParamsError, get_missing_params_response
+from .tool_cache import tool_result_cache, get_tool_result_ttl, make_tool_cache_key
+from .correlation import add_correlation_headers
+from observability import timed_stage
 
 def execute_tool(tool_name: str, model_args: dict, ctx: dict) -> dict:
     """
@@ -27,7 +30,15 @@ def execute_tool(tool_name: str, model_args: dict, ctx: dict) -> dict:
     # Step 3: Merge with model args (metadata wins on conflicts)
     final_args = merge_params(resolved_params, model_args, ctx)
     
-    # Step 4: Route to appropriate backend
+    # Step 4: Serve read-only results from cache, sharing in-flight calls
+    ttl = get_tool_result_ttl(tool_name, final_args)
+    if not ttl:
+        return route_tool_call(tool_name, final_args, ctx)
+    cache_key = make_tool_cache_key(tool_name, final_args)
+    return tool_result_cache.get_or_call(cache_key, ttl, lambda: route_tool_call(tool_name, final_args, ctx))
+
+def route_tool_call(tool_name: str, final_args: dict, ctx: dict) -> dict:
+    """Route to appropriate backend"""
     try:
         if tool_name.startswith("pr_"):
             return call_mcp_tool("pr", tool_name, final_args, ctx)
@@ -85,9 +96,11 @@ def call_mcp_tool(service: str, tool_name: str, args: dict, ctx: dict) -> dict:
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=120)
-        response.raise_for_status()
-        result = response.json()
+        with timed_stage("backend", service, **{"tool.name": tool_name}):
+            headers = add_correlation_headers({"Content-Type": "application/json"}, ctx.get("correlation_id"))
+            response = requests.post(url, json=payload, headers=headers, timeout=120)
+            response.raise_for_status()
+            result = response.json()
         
         # Debug: Log the actual MCP response structure
         print(f"[DEBUG] MCP Response for {tool_name}: {result}")
@@ -150,9 +163,11 @@ def call_legacy_gateway(tool_name: str, args: dict, ctx: dict) -> dict:
         else:
             return {"error": f"Unknown legacy tool: {tool_name}"}
         
-        response = requests.post(f"{shim_url}/call-tool", json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with timed_stage("backend", payload["server"], **{"tool.name": tool_name}):
+            headers = add_correlation_headers({"Content-Type": "application/json", "x-request-tier": ctx.get("tier", "user")}, ctx.get("correlation_id"))
+            response = requests.post(f"{shim_url}/call-tool", json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
+            return response.json()
         
     except Exception as e:
         return {"error": f"Legacy gateway call failed: {str(e)}"}
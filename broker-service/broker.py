@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
+import asyncio
 import json
 import os
-import requests
+import time
+import httpx
 import boto3
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from tool_policy import is_tool_allowed
 from agents.correlation import get_or_create_correlation_id, add_correlation_headers
 from agents.tool_policy import get_denied_tool_response
+from agents.tool_policy import is_tool_allowed as is_tool_advertised
+from tool_catalog import ToolCatalog
+from response_cache import RESPONSE_CACHE_ENABLED, response_cache, make_cache_key, store_if_cacheable
+from observability import start_request_timings, timed_stage, record_tokens, render_metrics, REQUEST_LATENCY
 
 app = FastAPI(title="MCP Broker Service")
 
@@ -27,8 +34,12 @@ class CorrelationMiddleware(BaseHTTPMiddleware):
         request.state.correlation_id = correlation_id
         
         # Process request
+        start = time.time()
         response = await call_next(request)
         
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(time.time() - start, getattr(route, "path", "unmatched"), str(response.status_code))
+        
         # Add to response headers
         response.headers['x-correlation-id'] = correlation_id
         
@@ -36,34 +47,75 @@ class CorrelationMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(CorrelationMiddleware)
 
-# Cache tools at startup to avoid delays on each request
-_cached_tools = None
+# Bounded fan-out for the toolUse blocks of a single model turn
+MAX_PARALLEL_TOOL_CALLS = int(os.environ.get('MAX_PARALLEL_TOOL_CALLS', '4'))
+
+# Per-tool deadlines in seconds, matched by tool name prefix
+TOOL_CALL_DEADLINES = {
+    'pr_': 120,
+    'pricingcalc_': 60,
+    'deploy_': 100  # run auto-selection may add a second metrics round trip
+}
+DEFAULT_TOOL_CALL_DEADLINE = 120
+
+# Keep-alive connection pool per MCP backend, shared across requests
+BACKEND_TIMEOUTS = {
+    'pr': 120,
+    'metrics': 50,
+    'pricingcalc': 60,
+    'call-tool': 120
+}
+BACKEND_MAX_CONNECTIONS = int(os.environ.get('BACKEND_MAX_CONNECTIONS', '50'))
+BACKEND_MAX_KEEPALIVE = int(os.environ.get('BACKEND_MAX_KEEPALIVE', '20'))
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+# boto3 clients are thread-safe; build once and call off the event loop
+_bedrock_client = None
+
+def get_http_client(backend: str) -> httpx.AsyncClient:
+    """Get the pooled async HTTP client for a backend"""
+    client = _http_clients.get(backend)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=BACKEND_TIMEOUTS[backend],
+            limits=httpx.Limits(
+                max_connections=BACKEND_MAX_CONNECTIONS,
+                max_keepalive_connections=BACKEND_MAX_KEEPALIVE
+            )
+        )
+        _http_clients[backend] = client
+    return client
+
+def get_bedrock_client():
+    global _bedrock_client
+    if _bedrock_client is None:
+        _bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+    return _bedrock_client
 
-def initialize_tools():
-    """Initialize tools cache at startup"""
-    global _cached_tools
-    _cached_tools = get_available_tools()
-    print(f"[STARTUP] Cached {len(_cached_tools)} tools")
+# Tool catalog refreshed in the background; requests read the last good snapshot
+tool_catalog = ToolCatalog(
+    alb_url=os.environ.get('ALB_URL', 'http://internal-mcp-internal-alb-2059913293.us-east-1.elb.amazonaws.com'),
+    get_client=get_http_client,
+    is_tool_allowed=is_tool_advertised,
+    ttl_seconds=int(os.environ.get('TOOL_CATALOG_TTL_SECONDS', '300'))
+)
 
 def get_filtered_tools(tier: str) -> List[Dict]:
     """Get tools filtered by tier policy with fail-closed security"""
-    if not _cached_tools:
-        initialize_tools()
-    
-    from agents.tool_policy import is_tool_allowed
-    
-    filtered_tools = []
-    for tool in _cached_tools:
-        tool_name = tool["toolSpec"]["name"]
-        if is_tool_allowed(tool_name, tier):
-            filtered_tools.append(tool)
-    
-    print(f"[TOOLS] {tier} tier: {len(filtered_tools)}/{len(_cached_tools)} tools allowed")
-    return filtered_tools
+    return tool_catalog.get_tools(tier)
 
 @app.on_event("startup")
 async def startup_event():
-    initialize_tools()
+    await tool_catalog.refresh()
+    tool_catalog.start()
+    print(f"[STARTUP] Cached {len(tool_catalog.all_tools)} tools")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await tool_catalog.stop()
+    for client in _http_clients.values():
+        await client.aclose()
+    _http_clients.clear()
 
 class AskRequest(BaseModel):
     ask_text: str  # Changed from question to ask_text for workflow alignment
@@ -83,6 +135,11 @@ class AdminRequest(BaseModel):
 async def health_check():
     return {"status": "OK", "service": "MCP Broker"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/tools")
 async def list_tools():
     """Debug endpoint to list available tools by tier"""
@@ -94,7 +151,9 @@ async def list_tools():
         "user_tools": list(USER_ALLOWED_TOOL_NAMES),
         "admin_tools": list(ALL_ADMIN_TOOLS),
         "counts": counts,
-        "total_available": len(_cached_tools) if _cached_tools else 0
+        "total_available": len(tool_catalog.all_tools),
+        "catalog": tool_catalog.status(),
+        "response_cache": response_cache.stats()
     }
 
 @app.post("/ask")
@@ -129,30 +188,60 @@ async def handle_request(request, tier: str, correlation_id: str):
     """Shared handler for both /ask and /admin endpoints"""
     import time
     start_time = time.time()
+    timings = start_request_timings()
     
     # A) Filter tools by tier before sending to model
     filtered_tools = get_filtered_tools(tier)
     tools_called = []
     denied_tool_calls = []
+    tool_call_log = []
+    
+    # Opt-in cache for repeated read-only questions
+    cache_debug = {"status": "disabled"}
+    cache_key = None
+    if RESPONSE_CACHE_ENABLED:
+        cache_key = make_cache_key(tier, request.account_id, request.region, request.ask_text, request.metadata)
+        cached = response_cache.get(cache_key)
+        if cached:
+            cached_response, age_seconds = cached
+            print(f"[CACHE] Hit {cache_key[:12]} (age {age_seconds}s) | Correlation: {correlation_id}")
+            return {
+                "answer": cached_response["answer"],
+                "timings": timings.summary(),
+                "debug": {
+                    "tier": tier,
+                    "correlation_id": correlation_id,
+                    "tools_advertised_count": len(filtered_tools),
+                    "tools_called": [],
+                    "denied_tool_calls": [],
+                    "cache": {"status": "hit", "key": cache_key[:12], "age_seconds": age_seconds},
+                    "total_ms": int((time.time() - start_time) * 1000)
+                }
+            }
     
-    result = call_bedrock(request.ask_text, filtered_tools, request.shim_url, request.account_id, request.region, request.metadata, tier, tools_called, denied_tool_calls, correlation_id)
+    result = await call_bedrock(request.ask_text, filtered_tools, request.shim_url, request.account_id, request.region, request.metadata, tier, tools_called, denied_tool_calls, correlation_id, tool_call_log)
+    
+    if cache_key:
+        cache_debug = store_if_cacheable(cache_key, {"answer": result}, tool_call_log)
     
     total_ms = int((time.time() - start_time) * 1000)
     
     return {
         "answer": result,
+        "timings": timings.summary(),
         "debug": {
             "tier": tier,
             "correlation_id": correlation_id,
             "tools_advertised_count": len(filtered_tools),
             "tools_called": tools_called,
             "denied_tool_calls": denied_tool_calls,
+            "cache": cache_debug,
             "total_ms": total_ms
         }
     }
 
-def call_bedrock(ask_text: str, tools: list, shim_url: str, account_id: str, region: str, metadata: Dict[str, Any], tier: str, tools_called: List[str], denied_tool_calls: List[str], correlation_id: str) -> str:
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+async def call_bedrock(ask_text: str, tools: list, shim_url: str, account_id: str, region: str, metadata: Dict[str, Any], tier: str, tools_called: List[str], denied_tool_calls: List[str], correlation_id: str, tool_call_log: Optional[List] = None) -> str:
+    bedrock = get_bedrock_client()
     
     # System prompt is passed separately in Converse API
     system_prompts = [{"text": "You are an AWS infrastructure assistant. For ECS operations, use ecs_call_tool with tool='ecs_resource_management'. ALWAYS include api_operation (e.g., 'ListClusters', 'DescribeServices') and api_params object. For ListClusters, use empty api_params: {}. For DescribeServices, put cluster name and services array in api_params. Example: {\"tool\": \"ecs_resource_management\", \"params\": {\"api_operation\": \"ListClusters\", \"api_params\": {}, \"account_id\": \"500330120558\", \"region\": \"us-east-1\"}}. For CloudFormation, use iac_call_tool with tool='troubleshoot_cloudformation_deployment'. Example: {\"tool\": \"troubleshoot_cloudformation_deployment\", \"params\": {\"stack_name\": \"my-stack\", \"account_id\": \"500330120558\", \"region\": \"us-east-1\"}}. Always include account_id='500330120558' and region='us-east-1', if this information is not provided."}]
@@ -167,16 +256,23 @@ def call_bedrock(ask_text: str, tools: list, shim_url: str, account_id: str, reg
         print(f"[BEDROCK] Iteration {iteration} | Correlation: {correlation_id}")
         
         # Use Converse API for Nova Pro
-        response = bedrock.converse(
-            modelId='us.amazon.nova-pro-v1:0',
-            messages=messages,
-            system=system_prompts,
-            toolConfig={"tools": tools},
-            inferenceConfig={
-                "maxTokens": 4096, 
-                "temperature": 0  # Greedy decoding prevents JSON "invalid sequence"
-            }
-        )
+        with timed_stage("bedrock", **{"gen_ai.request.model": "us.amazon.nova-pro-v1:0", "bedrock.iteration": iteration}) as span:
+            response = await asyncio.to_thread(
+                bedrock.converse,
+                modelId='us.amazon.nova-pro-v1:0',
+                messages=messages,
+                system=system_prompts,
+                toolConfig={"tools": tools},
+                inferenceConfig={
+                    "maxTokens": 4096, 
+                    "temperature": 0  # Greedy decoding prevents JSON "invalid sequence"
+                }
+            )
+            usage = response.get('usage', {})
+            span.set_attribute("gen_ai.usage.input_tokens", usage.get('inputTokens', 0))
+            span.set_attribute("gen_ai.usage.output_tokens", usage.get('outputTokens', 0))
+            span.set_attribute("gen_ai.response.finish_reason", response['stopReason'])
+            record_tokens(usage.get('inputTokens', 0), usage.get('outputTokens', 0))
         
         print(f"[BEDROCK] Stop reason: {response['stopReason']}")
         
@@ -191,139 +287,210 @@ def call_bedrock(ask_text: str, tools: list, shim_url: str, account_id: str, reg
                     return block['text']
             return "No text response received from model."
 
-        # Handle tool calls
-        tool_results = []
-        for block in output_message['content']:
-            if 'toolUse' in block:
-                tool_use = block['toolUse']
-                tool_name = tool_use['name']
-                tool_input = tool_use['input']
-                
-                print(f"Executing tool: {tool_name}")
-                print(f"[BEDROCK] Tool input: {tool_input}")
-
-                # B) Enforce tool execution gating - fail closed
-                if not is_tool_allowed(tool_name, tier):
-                    error_response = get_denied_tool_response(tool_name, tier, correlation_id)
-                    print(f"[SECURITY] {error_response['message']} | Correlation: {correlation_id}")
-                    denied_tool_calls.append(tool_name)
-                    
-                    tool_results.append({
-                        "toolResult": {
-                            "toolUseId": tool_use['toolUseId'],
-                            "content": [{"json": error_response}],
-                            "status": "error"
-                        }
-                    })
-                    continue
-                
-                # Tool is allowed, track it and execute
-                tools_called.append(tool_name)
-
-                # Route to appropriate MCP backend
-                if tool_name.startswith('pr_'):
-                    # Route PR tools to PR Context MCP
-                    result_data = call_mcp_tool(f"{shim_url}/pr", tool_name, tool_input, metadata, correlation_id)
-                elif tool_name.startswith('pricingcalc_'):
-                    # Route pricing calculator tools to pricing MCP server
-                    result_data = call_pricing_tool(tool_name, tool_input, correlation_id)
-                elif tool_name.startswith('deploy_'):
-                    # Route deployment metrics tools to metrics MCP server
-                    # Extract missing parameters from metadata
-                    if metadata:
-                        # Always prefer metadata repository over Bedrock's guess
-                        if 'repository' in metadata:
-                            tool_input['repository'] = metadata['repository']
-                        elif 'repository' not in tool_input or '/' not in tool_input.get('repository', ''):
-                            # No metadata repo and Bedrock didn't provide org/repo format, use default
-                            tool_input['repository'] = 'Demo-MCP/mcp-cross-account-pipeline'
-                        
-                        # If run_id not provided, check metadata
-                        if 'run_id' not in tool_input and 'run_id' in metadata:
-                            tool_input['run_id'] = metadata['run_id']
-                    else:
-                        # No metadata, use default if repository not provided or doesn't look like org/repo
-                        if 'repository' not in tool_input or '/' not in tool_input.get('repository', ''):
-                            tool_input['repository'] = 'Demo-MCP/mcp-cross-account-pipeline'
-                    
-                    # If still no run_id, try to auto-select from latest runs
-                    if 'run_id' not in tool_input and tool_name in ['deploy_get_summary', 'deploy_get_run', 'deploy_get_steps']:
-                        try:
-                            repo_name = tool_input['repository']
-                            # First try to find RUNNING deployments
-                            latest_runs_result = call_metrics_tool('deploy_find_latest', {'repository': repo_name, 'limit': 10})
-                            if isinstance(latest_runs_result, dict) and 'result' in latest_runs_result:
-                                result_text = latest_runs_result['result']
-                                # Look for RUNNING status in the result
-                                if 'RUNNING' in result_text:
-                                    # Extract run_id from RUNNING deployment
-                                    lines = result_text.split('\n')
-                                    for i, line in enumerate(lines):
-                                        if 'RUNNING' in line and i > 0:
-                                            # Look for Run ID in previous lines
-                                            for j in range(i-1, max(i-5, -1), -1):
-                                                if 'Run ID:' in lines[j]:
-                                                    run_id = lines[j].split('Run ID:')[1].strip()
-                                                    tool_input['run_id'] = run_id
-                                                    print(f"[METRICS] Auto-selected RUNNING deployment: {run_id}")
-                                                    break
-                                            break
-                                else:
-                                    # No RUNNING deployment, use latest (first in list)
-                                    lines = result_text.split('\n')
-                                    for line in lines:
-                                        if 'Run ID:' in line:
-                                            run_id = line.split('Run ID:')[1].strip()
-                                            tool_input['run_id'] = run_id
-                                            print(f"[METRICS] Auto-selected latest deployment: {run_id}")
-                                            break
-                        except Exception as e:
-                            print(f"[METRICS] Could not auto-select run: {e}")
-                    
-                    result_data = call_metrics_tool(tool_name, tool_input, correlation_id)
-                else:
-                    # Route to existing MCP servers via gateway
-                    server_type = 'iac' if 'iac' in tool_name else 'ecs'
-                    result_data = call_shim_tool(
-                        shim_url, 
-                        server_type, 
-                        tool_input.get('tool', ''), 
-                        {**tool_input.get('params', {}), 'account_id': account_id, 'region': region, '_metadata': metadata},
-                        correlation_id
-                    )
-                
-                print(f"[BEDROCK] Tool result: {result_data}")
-                
-                # Format the result for the next turn
-                tool_results.append({
-                    "toolResult": {
-                        "toolUseId": tool_use['toolUseId'],
-                        "content": [{"json": result_data}],
-                        "status": "success"
-                    }
-                })
+        # Handle tool calls - fan out this turn's toolUse blocks concurrently
+        tool_uses = [block['toolUse'] for block in output_message['content'] if 'toolUse' in block]
+        tool_results = await run_tool_uses(tool_uses, shim_url, account_id, region, metadata, tier, tools_called, denied_tool_calls, correlation_id, tool_call_log)
         
         # Add tool results to conversation and loop back
         messages.append({"role": "user", "content": tool_results})
 
     return "Reached maximum iteration limit."
 
-def call_shim_tool(shim_url: str, server: str, tool: str, params: Dict[str, Any], correlation_id: str) -> Dict[str, Any]:
+async def run_tool_uses(tool_uses: List[Dict[str, Any]], shim_url: str, account_id: str, region: str, metadata: Dict[str, Any], tier: str, tools_called: List[str], denied_tool_calls: List[str], correlation_id: str, tool_call_log: Optional[List] = None) -> List[Dict[str, Any]]:
+    """Execute one model turn's toolUse blocks concurrently, returning results in toolUseId order"""
+    tool_results = [None] * len(tool_uses)
+    pending = []
+    
+    for index, tool_use in enumerate(tool_uses):
+        tool_name = tool_use['name']
+        
+        print(f"Executing tool: {tool_name}")
+        print(f"[BEDROCK] Tool input: {tool_use['input']}")
+
+        # B) Enforce tool execution gating - fail closed
+        if not is_tool_allowed(tool_name, tier):
+            error_response = get_denied_tool_response(tool_name, tier, correlation_id)
+            print(f"[SECURITY] {error_response['message']} | Correlation: {correlation_id}")
+            denied_tool_calls.append(tool_name)
+            
+            tool_results[index] = {
+                "toolResult": {
+                    "toolUseId": tool_use['toolUseId'],
+                    "content": [{"json": error_response}],
+                    "status": "error"
+                }
+            }
+            continue
+        
+        # Tool is allowed, track it and queue for execution
+        tools_called.append(tool_name)
+        if tool_call_log is not None:
+            tool_call_log.append((tool_name, tool_use['input']))
+        pending.append((index, tool_use))
+    
+    if not pending:
+        return tool_results
+    
+    # Bounded per-request fan-out; each call gets its own deadline
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOL_CALLS)
+    
+    # ECS/IaC calls in the same turn share one /call-tools hop to the gateway
+    gateway_calls = [(index, tool_use) for index, tool_use in pending if is_gateway_tool(tool_use['name'])]
+    if len(gateway_calls) > 1:
+        pending = [(index, tool_use) for index, tool_use in pending if not is_gateway_tool(tool_use['name'])]
+    else:
+        gateway_calls = []
+    
+    async def run_gateway_batch() -> List[Dict[str, Any]]:
+        calls = [gateway_call_for(tool_use, account_id, region, metadata) for _, tool_use in gateway_calls]
+        for call, (_, tool_use) in zip(calls, gateway_calls):
+            call["timeout_seconds"] = get_tool_deadline(tool_use['name'])
+        deadline = max(call["timeout_seconds"] for call in calls)
+        async with semaphore:
+            results = await call_shim_tools(shim_url, calls, correlation_id, deadline, tier)
+        
+        tool_results_batch = []
+        for (_, tool_use), result_data in zip(gateway_calls, results):
+            print(f"[BEDROCK] Tool result: {result_data}")
+            tool_results_batch.append({
+                "toolResult": {
+                    "toolUseId": tool_use['toolUseId'],
+                    "content": [{"json": result_data}],
+                    "status": "error" if "error" in result_data else "success"
+                }
+            })
+        return tool_results_batch
+    
+    async def run_one(tool_use: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = tool_use['name']
+        deadline = get_tool_deadline(tool_name)
+        async with semaphore:
+            try:
+                result_data = await asyncio.wait_for(
+                    execute_tool_use(tool_use, shim_url, account_id, region, metadata, correlation_id, tier),
+                    timeout=deadline
+                )
+                status = "success"
+            except asyncio.TimeoutError:
+                status = "error"
+                result_data = {"error": f"Tool {tool_name} exceeded its {deadline}s deadline | Correlation: {correlation_id}"}
+            except Exception as e:
+                status = "error"
+                result_data = {"error": f"Tool {tool_name} failed: {str(e)} | Correlation: {correlation_id}"}
+        
+        print(f"[BEDROCK] Tool result: {result_data}")
+        
+        # Format the result for the next turn
+        return {
+            "toolResult": {
+                "toolUseId": tool_use['toolUseId'],
+                "content": [{"json": result_data}],
+                "status": status
+            }
+        }
+    
+    if gateway_calls:
+        results, batch_results = await asyncio.gather(
+            asyncio.gather(*(run_one(tool_use) for _, tool_use in pending)),
+            run_gateway_batch()
+        )
+        for (index, _), tool_result in zip(gateway_calls, batch_results):
+            tool_results[index] = tool_result
+    else:
+        results = await asyncio.gather(*(run_one(tool_use) for _, tool_use in pending))
+    for (index, _), tool_result in zip(pending, results):
+        tool_results[index] = tool_result
+    
+    return tool_results
+
+def is_gateway_tool(tool_name: str) -> bool:
+    """ECS and IaC tools are served by the stdio MCP gateway"""
+    return not tool_name.startswith(('pr_', 'pricingcalc_', 'deploy_'))
+
+def gateway_call_for(tool_use: Dict[str, Any], account_id: str, region: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Gateway {server, tool, params} for an ECS/IaC toolUse block"""
+    tool_name = tool_use['name']
+    tool_input = tool_use['input']
+    return {
+        "server": 'iac' if 'iac' in tool_name else 'ecs',
+        "tool": tool_input.get('tool', ''),
+        "params": {**tool_input.get('params', {}), 'account_id': account_id, 'region': region, '_metadata': metadata}
+    }
+
+def get_tool_deadline(tool_name: str) -> int:
+    """Per-tool deadline in seconds, matched by tool name prefix"""
+    for prefix, deadline in TOOL_CALL_DEADLINES.items():
+        if tool_name.startswith(prefix):
+            return deadline
+    return DEFAULT_TOOL_CALL_DEADLINE
+
+async def execute_tool_use(tool_use: Dict[str, Any], shim_url: str, account_id: str, region: str, metadata: Dict[str, Any], correlation_id: str, tier: str = "user") -> Dict[str, Any]:
+    """Route a single allowed toolUse block to its MCP backend"""
+    tool_name = tool_use['name']
+    tool_input = tool_use['input']
+    
+    # Route to appropriate MCP backend
+    if tool_name.startswith('pr_'):
+        # Route PR tools to PR Context MCP
+        return await call_mcp_tool(f"{shim_url}/pr", tool_name, tool_input, metadata, correlation_id)
+    elif tool_name.startswith('pricingcalc_'):
+        # Route pricing calculator tools to pricing MCP server
+        return await call_pricing_tool(tool_name, tool_input, correlation_id)
+    elif tool_name.startswith('deploy_'):
+        # Route deployment metrics tools to metrics MCP server
+        # Extract missing parameters from metadata
+        if metadata:
+            # Always prefer metadata repository over Bedrock's guess
+            if 'repository' in metadata:
+                tool_input['repository'] = metadata['repository']
+            elif 'repository' not in tool_input or '/' not in tool_input.get('repository', ''):
+                # No metadata repo and Bedrock didn't provide org/repo format, use default
+                tool_input['repository'] = 'Demo-MCP/mcp-cross-account-pipeline'
+            
+            # If run_id not provided, check metadata
+            if 'run_id' not in tool_input and 'run_id' in metadata:
+                tool_input['run_id'] = metadata['run_id']
+        else:
+            # No metadata, use default if repository not provided or doesn't look like org/repo
+            if 'repository' not in tool_input or '/' not in tool_input.get('repository', ''):
+                tool_input['repository'] = 'Demo-MCP/mcp-cross-account-pipeline'
+        
+        # If still no run_id, resolve it server-side: latest RUNNING run, else latest run
+        if 'run_id' not in tool_input and tool_name in ['deploy_get_summary', 'deploy_get_run', 'deploy_get_steps']:
+            try:
+                resolve_args = {'repository': tool_input['repository']}
+                if metadata and metadata.get('branch'):
+                    resolve_args['branch'] = metadata['branch']
+                resolved = await call_metrics_tool('deploy_resolve_run', resolve_args, correlation_id, structured=True)
+                if isinstance(resolved, dict) and resolved.get('run_id'):
+                    tool_input['run_id'] = resolved['run_id']
+                    print(f"[METRICS] Auto-selected {resolved.get('selected')} deployment: {resolved['run_id']}")
+            except Exception as e:
+                print(f"[METRICS] Could not auto-select run: {e}")
+        
+        return await call_metrics_tool(tool_name, tool_input, correlation_id)
+    else:
+        # Route to existing MCP servers via gateway
+        call = gateway_call_for(tool_use, account_id, region, metadata)
+        return await call_shim_tool(shim_url, call["server"], call["tool"], call["params"], correlation_id, tier)
+
+async def call_shim_tool(shim_url: str, server: str, tool: str, params: Dict[str, Any], correlation_id: str, tier: str = "user") -> Dict[str, Any]:
     try:
         print(f"[SHIM] Calling {server}/{tool} | Correlation: {correlation_id}")
         
-        headers = add_correlation_headers({"Content-Type": "application/json"}, correlation_id)
+        # The gateway queues admin-tier calls ahead of user-tier ones
+        headers = add_correlation_headers({"Content-Type": "application/json", "x-request-tier": tier}, correlation_id)
         
-        response = requests.post(
-            f"{shim_url}/call-tool",
-            json={"server": server, "tool": tool, "params": params},
-            headers=headers,
-            timeout=120
-        )
-        response.raise_for_status()
+        with timed_stage("backend", server, **{"tool.name": tool}):
+            response = await get_http_client('call-tool').post(
+                f"{shim_url}/call-tool",
+                json={"server": server, "tool": tool, "params": params},
+                headers=headers
+            )
+            response.raise_for_status()
         print(f"[SHIM] Success: {server}/{tool} | Correlation: {correlation_id}")
         return response.json()
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = f"Timeout calling {server}/{tool} after 120 seconds | Correlation: {correlation_id}"
         print(f"[SHIM] {error_msg}")
         return {"error": error_msg}
@@ -332,8 +499,40 @@ def call_shim_tool(shim_url: str, server: str, tool: str, params: Dict[str, Any]
         print(f"[SHIM] {error_msg}")
         return {"error": error_msg}
 
-def call_metrics_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id: str) -> Dict[str, Any]:
-    """Call deployment metrics MCP server directly via ALB"""
+async def call_shim_tools(shim_url: str, calls: List[Dict[str, Any]], correlation_id: str, deadline: float, tier: str = "user") -> List[Dict[str, Any]]:
+    """Run several gateway calls in one /call-tools round trip; results in call order"""
+    try:
+        print(f"[SHIM] Batch of {len(calls)} calls: {[c['server'] + '/' + c['tool'] for c in calls]} | Correlation: {correlation_id}")
+        
+        headers = add_correlation_headers({"Content-Type": "application/json", "x-request-tier": tier}, correlation_id)
+        
+        with timed_stage("backend", "call-tools", **{"batch.size": len(calls)}):
+            response = await get_http_client('call-tool').post(
+                f"{shim_url}/call-tools",
+                json={"calls": calls, "deadline_seconds": deadline},
+                headers=headers,
+                timeout=deadline + 5
+            )
+            response.raise_for_status()
+        
+        results = []
+        for call, item in zip(calls, response.json()["results"]):
+            if item.get("ok"):
+                results.append(item["result"])
+            else:
+                error = item.get("error", {})
+                results.append({"error": f"Error calling {call['server']}/{call['tool']}: {error.get('detail')} | Correlation: {correlation_id}"})
+        print(f"[SHIM] Batch done: {sum(1 for r in results if 'error' not in r)}/{len(calls)} succeeded | Correlation: {correlation_id}")
+        return results
+    except httpx.TimeoutException:
+        error_msg = f"Timeout calling /call-tools after {deadline} seconds | Correlation: {correlation_id}"
+    except Exception as e:
+        error_msg = f"Error calling /call-tools: {str(e)} | Correlation: {correlation_id}"
+    print(f"[SHIM] {error_msg}")
+    return [{"error": error_msg} for _ in calls]
+
+async def call_metrics_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id: str, structured: bool = False) -> Dict[str, Any]:
+    """Call deployment metrics MCP server directly via ALB; structured=True returns structuredContent unrendered"""
     try:
         # Get ALB URL from environment or use actual ALB
         alb_url = os.environ.get('ALB_URL', 'http://internal-mcp-internal-alb-2059913293.us-east-1.elb.amazonaws.com')
@@ -350,21 +549,26 @@ def call_metrics_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id
                 "arguments": tool_input
             }
         }
+        if structured:
+            # Skip the server's text rendering; only structuredContent is read
+            mcp_request["params"]["_meta"] = {"render": False}
         
         headers = add_correlation_headers({"Content-Type": "application/json"}, correlation_id)
         
-        response = requests.post(
-            f"{alb_url}/metrics",
-            json=mcp_request,
-            headers=headers,
-            timeout=50
-        )
-        response.raise_for_status()
+        with timed_stage("backend", "metrics", **{"tool.name": tool_name}):
+            response = await get_http_client('metrics').post(
+                f"{alb_url}/metrics",
+                json=mcp_request,
+                headers=headers
+            )
+            response.raise_for_status()
         
         result = response.json()
         print(f"[METRICS] Success: {tool_name} | Correlation: {correlation_id}")
         
         # Extract result from MCP response
+        if structured and 'structuredContent' in result.get('result', {}):
+            return result['result']['structuredContent']
         if 'result' in result and 'content' in result['result']:
             content = result['result']['content']
             if isinstance(content, list) and len(content) > 0:
@@ -386,7 +590,7 @@ def call_metrics_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id
         print(f"[METRICS] Error calling {tool_name}: {e} | Correlation: {correlation_id}")
         return {"error": str(e)}
 
-def call_mcp_tool(mcp_url: str, tool_name: str, tool_input: Dict[str, Any], metadata: Dict[str, Any] = None, correlation_id: str = None) -> Dict[str, Any]:
+async def call_mcp_tool(mcp_url: str, tool_name: str, tool_input: Dict[str, Any], metadata: Dict[str, Any] = None, correlation_id: str = None) -> Dict[str, Any]:
     """Call MCP service tool directly"""
     try:
         print(f"[MCP] Calling {mcp_url} tool {tool_name} | Correlation: {correlation_id}")
@@ -407,21 +611,21 @@ def call_mcp_tool(mcp_url: str, tool_name: str, tool_input: Dict[str, Any], meta
         
         headers = add_correlation_headers({"Content-Type": "application/json"}, correlation_id)
         
-        response = requests.post(
-            mcp_url,
-            json={
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": tool_input
-                }
-            },
-            headers=headers,
-            timeout=120
-        )
-        response.raise_for_status()
+        with timed_stage("backend", "pr", **{"tool.name": tool_name}):
+            response = await get_http_client('pr').post(
+                mcp_url,
+                json={
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "tools/call",
+                    "params": {
+                        "name": tool_name,
+                        "arguments": tool_input
+                    }
+                },
+                headers=headers
+            )
+            response.raise_for_status()
         result = response.json()
         
         if "error" in result:
@@ -429,12 +633,12 @@ def call_mcp_tool(mcp_url: str, tool_name: str, tool_input: Dict[str, Any], meta
         
         return result.get("result", {})
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return {"error": f"MCP tool {tool_name} timed out after 120 seconds | Correlation: {correlation_id}"}
     except Exception as e:
         return {"error": f"MCP tool {tool_name} failed: {str(e)} | Correlation: {correlation_id}"}
 
-def call_pricing_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id: str) -> Dict[str, Any]:
+async def call_pricing_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id: str) -> Dict[str, Any]:
     """Call pricing calculator MCP server directly via ALB"""
     try:
         # Get ALB URL from environment or use actual ALB
@@ -455,13 +659,13 @@ def call_pricing_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id
         
         headers = add_correlation_headers({"Content-Type": "application/json"}, correlation_id)
         
-        response = requests.post(
-            f"{alb_url}/pricingcalc",
-            json=mcp_request,
-            headers=headers,
-            timeout=60
-        )
-        response.raise_for_status()
+        with timed_stage("backend", "pricingcalc", **{"tool.name": tool_name}):
+            response = await get_http_client('pricingcalc').post(
+                f"{alb_url}/pricingcalc",
+                json=mcp_request,
+                headers=headers
+            )
+            response.raise_for_status()
         
         result = response.json()
         print(f"[PRICING] Success: {tool_name} | Correlation: {correlation_id}")
@@ -473,133 +677,6 @@ def call_pricing_tool(tool_name: str, tool_input: Dict[str, Any], correlation_id
         print(f"[PRICING] Error calling {tool_name}: {e} | Correlation: {correlation_id}")
         return {"error": str(e)}
 
-def get_available_tools() -> list:
-    """Get tools - static IAC/ECS + dynamic metrics tools"""
-    # Static IAC and ECS tools
-    tools = [
-        {
-            "toolSpec": {
-                "name": "iac_call_tool",
-                "description": "Call Infrastructure as Code tools",
-                "inputSchema": {
-                    "json": {
-                        "type": "object",
-                        "properties": {
-                            "tool": {"type": "string"},
-                            "params": {
-                                "type": "object",
-                                "properties": {
-                                    "account_id": {"type": "string"},
-                                    "region": {"type": "string"},
-                                    "stack_name": {"type": "string"}
-                                },
-                                "required": ["account_id", "region"]
-                            }
-                        },
-                        "required": ["tool", "params"]
-                    }
-                }
-            }
-        },
-        {
-            "toolSpec": {
-                "name": "ecs_call_tool",
-                "description": "Call ECS tools",
-                "inputSchema": {
-                    "json": {
-                        "type": "object",
-                        "properties": {
-                            "tool": {"type": "string"},
-                            "params": {
-                                "type": "object",
-                                "properties": {
-                                    "api_operation": {"type": "string"},
-                                    "api_params": {"type": "object"},
-                                    "account_id": {"type": "string"},
-                                    "region": {"type": "string"}
-                                },
-                                "required": ["api_operation", "api_params", "account_id", "region"]
-                            }
-                        },
-                        "required": ["tool", "params"]
-                    }
-                }
-            }
-        }
-    ]
-    
-    # Dynamically fetch metrics tools
-    try:
-        alb_url = os.environ.get('ALB_URL', 'http://internal-mcp-internal-alb-2059913293.us-east-1.elb.amazonaws.com')
-        response = requests.post(
-            f"{alb_url}/metrics",
-            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
-            headers={"Content-Type": "application/json"},
-            timeout=5
-        )
-        if response.status_code == 200:
-            result = response.json()
-            if 'result' in result and 'tools' in result['result']:
-                for tool in result['result']['tools']:
-                    tools.append({
-                        "toolSpec": {
-                            "name": tool['name'],
-                            "description": tool['description'],
-                            "inputSchema": {"json": tool['inputSchema']}
-                        }
-                    })
-                print(f"[TOOLS] Added {len(result['result']['tools'])} metrics tools")
-    except Exception as e:
-        print(f"[TOOLS] Failed to fetch metrics tools: {e}")
-    
-    # Dynamically fetch pricing calculator tools
-    try:
-        response = requests.post(
-            f"{alb_url}/pricingcalc",
-            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
-            headers={"Content-Type": "application/json"},
-            timeout=5
-        )
-        if response.status_code == 200:
-            result = response.json()
-            if 'result' in result and 'tools' in result['result']:
-                for tool in result['result']['tools']:
-                    tools.append({
-                        "toolSpec": {
-                            "name": tool['name'],
-                            "description": tool['description'],
-                            "inputSchema": {"json": tool['inputSchema']}
-                        }
-                    })
-                print(f"[TOOLS] Added {len(result['result']['tools'])} pricing calculator tools")
-    except Exception as e:
-        print(f"[TOOLS] Failed to fetch pricing calculator tools: {e}")
-    
-    # Dynamically fetch PR tools
-    try:
-        response = requests.post(
-            f"{alb_url}/pr",
-            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
-            headers={"Content-Type": "application/json"},
-            timeout=5
-        )
-        if response.status_code == 200:
-            result = response.json()
-            if 'result' in result and 'tools' in result['result']:
-                for tool in result['result']['tools']:
-                    tools.append({
-                        "toolSpec": {
-                            "name": tool['name'],
-                            "description": tool['description'],
-                            "inputSchema": {"json": tool['inputSchema']}
-                        }
-                    })
-                print(f"[TOOLS] Added {len(result['result']['tools'])} PR tools")
-    except Exception as e:
-        print(f"[TOOLS] Failed to fetch PR tools: {e}")
-    
-    return tools
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
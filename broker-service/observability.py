@@ -3,15 +3,159 @@ Observability hooks for Strands broker
 """
 import time
 import logging
-from typing import Dict, Any, Optional
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Tuple
 from opentelemetry import trace as trace_api
 
 logger = logging.getLogger(__name__)
 tracer = trace_api.get_tracer(__name__)
 
-def log_tool_execution(tool_name: str, outcome: str, latency_ms: int, tier: str, metadata: Optional[Dict] = None):
+# Per-request listener for tool start/finish events, set by the streaming
+# endpoints. Tools run via asyncio.to_thread, which copies this context.
+_tool_event_sink: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = contextvars.ContextVar("tool_event_sink", default=None)
+
+def set_tool_event_sink(sink: Optional[Callable[[Dict[str, Any]], None]]) -> contextvars.Token:
+    """Bind a tool event listener to the current request"""
+    return _tool_event_sink.set(sink)
+
+def emit_tool_event(event: Dict[str, Any]):
+    """Send a tool event to the current request's listener, if any"""
+    sink = _tool_event_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(event)
+    except Exception as e:
+        logger.warning(f"Tool event sink failed: {e}")
+
+# Histogram buckets in seconds, from cache hits up to the 120s tool deadlines
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class LatencyHistogram:
+    """Minimal Prometheus histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[label_values] = series
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+                prefix = labels + "," if labels else ""
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines)
+
+REQUEST_LATENCY = LatencyHistogram("broker_request_duration_seconds", "End-to-end broker request latency", ("endpoint", "status"))
+STAGE_LATENCY = LatencyHistogram("broker_stage_duration_seconds", "Latency of one pipeline stage", ("stage", "target"))
+TOOL_LATENCY = LatencyHistogram("broker_tool_duration_seconds", "Tool execution latency as seen by the agent", ("tool", "outcome"))
+
+def render_metrics() -> str:
+    """Prometheus text exposition of all broker histograms"""
+    return "\n".join(h.render() for h in (REQUEST_LATENCY, STAGE_LATENCY, TOOL_LATENCY)) + "\n"
+
+class RequestTimings:
+    """Per-request latency breakdown, shared with the request's tool threads"""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self._stages: Dict[Tuple[str, Optional[str]], list] = {}
+        self._tokens = {"input": 0, "output": 0}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float, target: Optional[str] = None, count: int = 1):
+        with self._lock:
+            totals = self._stages.setdefault((stage, target), [0.0, 0])
+            totals[0] += ms
+            totals[1] += count
+
+    def add_tokens(self, input_tokens: int, output_tokens: int):
+        with self._lock:
+            self._tokens["input"] += input_tokens or 0
+            self._tokens["output"] += output_tokens or 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact breakdown, e.g. {"guards_ms": 3, "bedrock_ms": 2100, "bedrock_calls": 2, "backend_ms": {"metrics": 180}}"""
+        out: Dict[str, Any] = {"total_ms": int((time.time() - self.start_time) * 1000)}
+        with self._lock:
+            for (stage, target), (ms, count) in sorted(self._stages.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+                if target:
+                    out.setdefault(f"{stage}_ms", {})[target] = int(ms)
+                else:
+                    out[f"{stage}_ms"] = int(ms)
+                out[f"{stage}_calls"] = out.get(f"{stage}_calls", 0) + count
+            if self._tokens["input"] or self._tokens["output"]:
+                out["tokens"] = dict(self._tokens)
+        return out
+
+_request_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+def start_request_timings() -> RequestTimings:
+    """Begin a latency breakdown for the current request"""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+def get_request_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+def record_tokens(input_tokens: int, output_tokens: int):
+    """Add model token usage to the current request's breakdown"""
+    timings = _request_timings.get()
+    if timings:
+        timings.add_tokens(input_tokens, output_tokens)
+
+@contextmanager
+def timed_stage(stage: str, target: Optional[str] = None, **attributes):
+    """
+    Span plus timing for one pipeline stage (guards, param_extraction, bedrock, backend)
+
+    The elapsed time is added to the request's breakdown and the stage histogram.
+    """
+    span_name = f"broker.{stage}.{target}" if target else f"broker.{stage}"
+    start = time.time()
+    with tracer.start_as_current_span(span_name) as span:
+        span.set_attribute("broker.stage", stage)
+        if target:
+            span.set_attribute("broker.target", target)
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+        try:
+            yield span
+        finally:
+            elapsed = time.time() - start
+            STAGE_LATENCY.observe(elapsed, stage, target or "")
+            timings = _request_timings.get()
+            if timings:
+                timings.add(stage, elapsed * 1000, target)
+
+def log_tool_execution(tool_name: str, outcome: str, latency_ms: int, tier: str, metadata: Optional[Dict] = None, span=None):
     """Log tool execution with redacted args"""
-    
+
     # Redact sensitive metadata
     safe_metadata = {}
     if metadata:
@@ -20,38 +164,52 @@ def log_tool_execution(tool_name: str, outcome: str, latency_ms: int, tier: str,
             "repository": metadata.get("repository", "").split("/")[-1] if metadata.get("repository") else None,
             "tier": tier
         }
-    
+
     logger.info(
         f"TOOL_EXEC tool={tool_name} outcome={outcome} latency_ms={latency_ms} tier={tier} metadata={safe_metadata}"
     )
-    
+    TOOL_LATENCY.observe(latency_ms / 1000, tool_name, outcome)
+
     # OpenTelemetry span
-    with tracer.start_as_current_span(f"tool.{tool_name}") as span:
-        span.set_attribute("tool.name", tool_name)
-        span.set_attribute("tool.outcome", outcome)
-        span.set_attribute("tool.latency_ms", latency_ms)
-        span.set_attribute("tool.tier", tier)
-        if safe_metadata.get("pr_number"):
-            span.set_attribute("pr.number", safe_metadata["pr_number"])
+    if span is None:
+        with tracer.start_as_current_span(f"tool.{tool_name}") as span:
+            _set_tool_span_attributes(span, tool_name, outcome, latency_ms, tier, safe_metadata)
+    else:
+        _set_tool_span_attributes(span, tool_name, outcome, latency_ms, tier, safe_metadata)
+
+def _set_tool_span_attributes(span, tool_name: str, outcome: str, latency_ms: int, tier: str, safe_metadata: Dict):
+    span.set_attribute("tool.name", tool_name)
+    span.set_attribute("tool.outcome", outcome)
+    span.set_attribute("tool.latency_ms", latency_ms)
+    span.set_attribute("tool.tier", tier)
+    if safe_metadata.get("pr_number"):
+        span.set_attribute("pr.number", safe_metadata["pr_number"])
 
 def measure_execution(tool_name: str, tier: str, metadata: Dict):
     """Context manager to measure and log tool execution"""
     class ExecutionTimer:
         def __init__(self):
             self.start_time = None
-            
+            self._span_cm = None
+
         def __enter__(self):
             self.start_time = time.time()
+            # Open the tool span up front so backend spans nest under it
+            self._span_cm = tracer.start_as_current_span(f"tool.{tool_name}")
+            self.span = self._span_cm.__enter__()
+            emit_tool_event({"type": "tool_start", "tool": tool_name})
             return self
-            
+
         def __exit__(self, exc_type, exc_val, exc_tb):
             latency_ms = int((time.time() - self.start_time) * 1000)
-            
+
             if exc_type:
                 outcome = "ERROR"
             else:
                 outcome = "SUCCESS"
-                
-            log_tool_execution(tool_name, outcome, latency_ms, tier, metadata)
-    
+
+            log_tool_execution(tool_name, outcome, latency_ms, tier, metadata, span=self.span)
+            self._span_cm.__exit__(exc_type, exc_val, exc_tb)
+            emit_tool_event({"type": "tool_end", "tool": tool_name, "outcome": outcome, "latency_ms": latency_ms})
+
     return ExecutionTimer()
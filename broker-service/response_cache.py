@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Opt-in response cache for repeated read-only broker questions
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from platform_aws_context.tool_results import is_error_response
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '1000'))
+
+# TTL in seconds for answers that used only read-only tools, by tool name prefix.
+# An answer lives as long as its shortest-lived tool result.
+READ_ONLY_TOOL_TTLS = {
+    'deploy_': 30,
+    'ecs_call_tool': 60,
+    'iac_call_tool': 60,
+    'pr_': 120,
+    'pricingcalc_': 600
+}
+
+# Answers that needed no tools at all
+NO_TOOL_TTL = 300
+
+# Tools that can change state - any call to one bypasses the cache
+WRITE_CAPABLE_TOOLS = {
+    'deploy_workflow',
+    'deploy_monitor',
+    'deploy_rollback',
+    'deploy_multi_env',
+    'deploy_run'
+}
+
+# ECS API operations that only read
+READ_ONLY_ECS_PREFIXES = ('List', 'Describe', 'Get')
+
+# How agents.format_tool_result hands a failed call back to the model
+TOOL_ERROR_PREFIX = 'Error: '
+
+# Metadata that changes what a question refers to
+KEY_METADATA_FIELDS = ('repository', 'pr_number', 'run_id', 'stack_name', 'branch')
+
+CONTRACTIONS = {
+    "what's": "what is",
+    "where's": "where is",
+    "how's": "how is",
+    "isn't": "is not",
+    "aren't": "are not",
+    "didn't": "did not",
+    "doesn't": "does not"
+}
+
+FILLER_WORDS = {'please', 'pls', 'can', 'could', 'you', 'me', 'tell', 'show', 'the', 'a', 'an', 'my', 'our', 'hey', 'hi'}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Reduce a prompt to the words that change its meaning"""
+    text = prompt.lower()
+    for contraction, expanded in CONTRACTIONS.items():
+        text = text.replace(contraction, expanded)
+    words = re.findall(r"[a-z0-9_\-/#.]+", text)
+    words = [word.strip('.') for word in words]
+    return ' '.join(word for word in words if word and word not in FILLER_WORDS)
+
+
+def make_cache_key(tier: str, account_id: str, region: str, prompt: str, metadata: Optional[Dict[str, Any]]) -> str:
+    metadata = metadata or {}
+    key_parts = {
+        "tier": tier,
+        "account_id": account_id,
+        "region": region,
+        "prompt": normalize_prompt(prompt),
+        "metadata": {field: str(metadata.get(field)) for field in KEY_METADATA_FIELDS if metadata.get(field) is not None}
+    }
+    return hashlib.sha256(json.dumps(key_parts, sort_keys=True).encode()).hexdigest()
+
+
+def is_write_call(tool_name: str, tool_input: Optional[Dict[str, Any]]) -> bool:
+    """Whether a tool call could change state"""
+    if tool_name in WRITE_CAPABLE_TOOLS:
+        return True
+    if tool_name == 'ecs_call_tool':
+        tool_input = tool_input or {}
+        # Broker passes {"tool", "params"}; Strands agents pass the params flat
+        params = tool_input.get('params', tool_input)
+        if tool_input.get('tool', 'ecs_resource_management') != 'ecs_resource_management':
+            return True
+        operation = params.get('api_operation', 'ListClusters')
+        return not str(operation).startswith(READ_ONLY_ECS_PREFIXES)
+    return False
+
+
+def ttl_for_tool_calls(tool_calls: List[Tuple[str, Dict[str, Any]]]) -> Optional[int]:
+    """TTL for an answer produced by these (name, input) calls, or None to bypass"""
+    ttl = NO_TOOL_TTL
+    for tool_name, tool_input in tool_calls:
+        if is_write_call(tool_name, tool_input):
+            return None
+        tool_ttl = next((t for prefix, t in READ_ONLY_TOOL_TTLS.items() if tool_name.startswith(prefix)), None)
+        if tool_ttl is None:
+            # Unclassified tool - don't guess
+            return None
+        ttl = min(ttl, tool_ttl)
+    return ttl
+
+
+def tool_calls_from_messages(messages: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Extract (name, input) for every toolUse block in a Converse-style conversation"""
+    calls = []
+    for message in messages:
+        for block in message.get('content', []):
+            if isinstance(block, dict) and 'toolUse' in block:
+                calls.append((block['toolUse'].get('name', ''), block['toolUse'].get('input', {})))
+    return calls
+
+
+def is_failed_tool_result(tool_result: Dict[str, Any]) -> bool:
+    """Whether a toolResult block reports a failure, including ones a tool returned in-band"""
+    if tool_result.get('status') == 'error':
+        return True
+    for item in tool_result.get('content', []):
+        if not isinstance(item, dict):
+            continue
+        if 'json' in item and is_error_response(item['json']):
+            return True
+        text = item.get('text')
+        if isinstance(text, str) and (text.startswith(TOOL_ERROR_PREFIX) or is_error_response({'result': {'content': [item]}})):
+            return True
+    return False
+
+
+def tool_errors_from_messages(messages: List[Dict[str, Any]]) -> int:
+    """Count toolResult blocks that failed in a Converse-style conversation"""
+    return sum(
+        1
+        for message in messages
+        for block in message.get('content', [])
+        if isinstance(block, dict) and 'toolResult' in block and is_failed_tool_result(block['toolResult'])
+    )
+
+
+class ResponseCache:
+    """Size-bounded LRU of answers with per-entry expiry"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, int]]:
+        """Return (value, age_seconds) or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, int(now - stored_at)
+
+    def put(self, key: str, value: Any, ttl: int):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (now, now + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": RESPONSE_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses
+            }
+
+
+response_cache = ResponseCache()
+
+
+def store_if_cacheable(cache_key: str, value: Any, tool_calls: List[Tuple[str, Dict[str, Any]]], tool_errors: int = 0) -> Dict[str, Any]:
+    """Cache an answer unless a write-capable or unclassified tool ran or a tool call failed; returns the debug block"""
+    if tool_errors:
+        # An answer built around a throttled or denied call would outlive the failure
+        response_cache.record_bypass()
+        return {"status": "bypass", "key": cache_key[:12], "reason": "tool_error", "tool_errors": tool_errors}
+    ttl = ttl_for_tool_calls(tool_calls)
+    if ttl:
+        response_cache.put(cache_key, value, ttl)
+        return {"status": "miss", "key": cache_key[:12], "ttl_seconds": ttl}
+    response_cache.record_bypass()
+    return {"status": "bypass", "key": cache_key[:12]}
@@ -1,6 +1,7 @@
 """
 Strands-based broker service with tier-based security and correlation ID tracking
 """
+import asyncio
 import time
 import json
 import hmac
@@ -9,17 +10,21 @@ import hashlib
 import urllib.parse
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 
 from agents.param_resolution import build_request_context
 from agents.guards import check_intent_guards
-from agents.agents import build_user_agent, build_admin_agent
+from agents.agent_pool import pooled_agent, warm_agent_pools, AGENT_POOLS
+from agents.tool_cache import tool_result_cache
 from agents.tool_policy import USER_ALLOWED_TOOL_NAMES, ALL_ADMIN_TOOLS
 from agents.correlation import get_or_create_correlation_id
 from agents.response_curator import curate_response
+from response_cache import RESPONSE_CACHE_ENABLED, response_cache, make_cache_key, store_if_cacheable, tool_calls_from_messages, tool_errors_from_messages
 from schemas import CostAnalysis, PRAnalysis, DeploymentStatus
+from observability import set_tool_event_sink, start_request_timings, get_request_timings, timed_stage, render_metrics, REQUEST_LATENCY
 
 app = FastAPI(title="MCP Strands Broker Service")
 
@@ -137,8 +142,13 @@ class CorrelationMiddleware(BaseHTTPMiddleware):
         request.state.correlation_id = correlation_id
         
         # Process request
+        start = time.time()
         response = await call_next(request)
         
+        # Streaming responses are measured to first byte; their full run is in the final event's timings
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(time.time() - start, getattr(route, "path", "unmatched"), str(response.status_code))
+        
         # Add to response headers
         response.headers['x-correlation-id'] = correlation_id
         
@@ -153,9 +163,33 @@ class BrokerRequest(BaseModel):
     shim_url: str = "http://internal-mcp-internal-alb-2059913293.us-east-1.elb.amazonaws.com"
     metadata: Dict[str, Any] = {}
 
+def record_agent_usage(agent):
+    """Fold Strands' accumulated model latency and token usage into the request breakdown"""
+    timings = get_request_timings()
+    if timings is None:
+        return
+    metrics = agent.event_loop_metrics
+    usage = metrics.accumulated_usage
+    timings.add("bedrock", metrics.accumulated_metrics.get("latencyMs", 0), count=metrics.cycle_count)
+    timings.add_tokens(usage.get("inputTokens", 0), usage.get("outputTokens", 0))
+
+@app.on_event("startup")
+async def startup_event():
+    warm_agent_pools()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "OK", "service": "MCP Strands Broker"}
+    return {
+        "status": "OK",
+        "service": "MCP Strands Broker",
+        "agent_pools": {tier: pool.stats() for tier, pool in AGENT_POOLS.items()},
+        "tool_cache": tool_result_cache.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.post("/ask")
 async def ask_endpoint(request: BrokerRequest, req: Request):
@@ -167,6 +201,7 @@ async def ask_endpoint(request: BrokerRequest, req: Request):
     correlation_id = req.state.correlation_id
     print(f"🔍 USER PROMPT: {request.ask_text} | Correlation: {correlation_id}")
     start_time = time.time()
+    timings = start_request_timings()
     
     try:
         # STAGE 1: Validate AWS SigV4 signature for authentication
@@ -178,10 +213,12 @@ async def ask_endpoint(request: BrokerRequest, req: Request):
         ctx["correlation_id"] = correlation_id
         
         # Check intent guards
-        guard_result = check_intent_guards(ctx)
+        with timed_stage("guards"):
+            guard_result = await asyncio.to_thread(check_intent_guards, ctx)
         if guard_result:
             return {
                 "final_response": f"Request blocked: {guard_result['message']}",
+                "timings": timings.summary(),
                 "debug": {
                     "tier": "user",
                     "correlation_id": correlation_id,
@@ -190,30 +227,55 @@ async def ask_endpoint(request: BrokerRequest, req: Request):
                 }
             }
         
-        # Build and execute user agent with structured output and retry logic
-        agent = build_user_agent(ctx)
-        prompt_lower = request.ask_text.lower()
+        # Opt-in cache for repeated read-only questions
+        cache_key = None
+        cache_debug = {"status": "disabled"}
+        if RESPONSE_CACHE_ENABLED:
+            cache_key = make_cache_key("user", request.account_id, request.region, request.ask_text, request.metadata)
+            cached = response_cache.get(cache_key)
+            if cached:
+                cached_response, age_seconds = cached
+                print(f"[CACHE] Hit {cache_key[:12]} (age {age_seconds}s) | Correlation: {correlation_id}")
+                return {
+                    **cached_response,
+                    "timings": timings.summary(),
+                    "debug": {
+                        "tier": "user",
+                        "correlation_id": correlation_id,
+                        "cache": {"status": "hit", "key": cache_key[:12], "age_seconds": age_seconds},
+                        "total_ms": int((time.time() - start_time) * 1000)
+                    }
+                }
         
-        # Retry logic for streaming failures
-        max_retries = 2
-        for attempt in range(max_retries + 1):
-            try:
-                # Apply structured output based on intent
-                if any(word in prompt_lower for word in ["cost", "price", "pricing", "estimate"]):
-                    try:
-                        answer = agent(request.ask_text, output_type=CostAnalysis)
-                    except:
-                        answer = agent(request.ask_text)
-                else:
-                    answer = agent(request.ask_text)
-                break  # Success, exit retry loop
-            except Exception as e:
-                if "Response ended prematurely" in str(e) and attempt < max_retries:
-                    print(f"Bedrock streaming failed (attempt {attempt + 1}), retrying...")
-                    time.sleep(1)  # Brief delay before retry
-                    continue
-                else:
-                    raise  # Re-raise if not a streaming error or max retries exceeded
+        # Check out a warm user agent and execute with structured output and retry logic
+        with pooled_agent("user", ctx) as (agent, agent_setup_ms), timed_stage("agent", "user"):
+            prompt_lower = request.ask_text.lower()
+        
+            # Retry logic for streaming failures
+            max_retries = 2
+            for attempt in range(max_retries + 1):
+                try:
+                    # Apply structured output based on intent
+                    if any(word in prompt_lower for word in ["cost", "price", "pricing", "estimate"]):
+                        try:
+                            answer = await agent.invoke_async(request.ask_text, output_type=CostAnalysis)
+                        except:
+                            answer = await agent.invoke_async(request.ask_text)
+                    else:
+                        answer = await agent.invoke_async(request.ask_text)
+                    break  # Success, exit retry loop
+                except Exception as e:
+                    if "Response ended prematurely" in str(e) and attempt < max_retries:
+                        print(f"Bedrock streaming failed (attempt {attempt + 1}), retrying...")
+                        await asyncio.sleep(1)  # Brief delay before retry
+                        continue
+                    else:
+                        raise  # Re-raise if not a streaming error or max retries exceeded
+            
+            # Record what ran before the pool resets the conversation
+            tool_calls = tool_calls_from_messages(agent.messages)
+            tool_errors = tool_errors_from_messages(agent.messages)
+            record_agent_usage(agent)
         
         # Curate response for PR comments
         if hasattr(answer, 'content'):
@@ -228,12 +290,18 @@ async def ask_endpoint(request: BrokerRequest, req: Request):
             raw_response = {"message": {"content": [{"text": str(answer)}]}}
             curated_answer = curate_response(raw_response)
         
+        if cache_key:
+            cache_debug = store_if_cacheable(cache_key, {"final_response": curated_answer}, tool_calls, tool_errors)
+        
         return {
             "final_response": curated_answer,
+            "timings": timings.summary(),
             "debug": {
                 "tier": "user",
                 "correlation_id": correlation_id,
                 "tools_advertised_count": len(USER_ALLOWED_TOOL_NAMES),
+                "agent_setup_ms": agent_setup_ms,
+                "cache": cache_debug,
                 "total_ms": int((time.time() - start_time) * 1000)
             }
         }
@@ -251,6 +319,7 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
     correlation_id = req.state.correlation_id
     print(f"🔍 ADMIN PROMPT: {request.ask_text} | Correlation: {correlation_id}")
     start_time = time.time()
+    timings = start_request_timings()
     
     try:
         # STAGE 4: Broker safety check - validate AWS SigV4 signature for admin access
@@ -265,10 +334,12 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
         
         # Admin tier skips most guards (has full access)
         # But still check for missing critical params
-        guard_result = check_intent_guards(ctx)
+        with timed_stage("guards"):
+            guard_result = await asyncio.to_thread(check_intent_guards, ctx)
         if guard_result and guard_result.get("error_type") == "MISSING_PARAMS":
             return {
                 "final_response": f"Missing information: {guard_result['message']}",
+                "timings": timings.summary(),
                 "debug": {
                     "tier": "admin",
                     "correlation_id": correlation_id,
@@ -277,37 +348,62 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
                 }
             }
         
-        # Build and execute admin agent with structured output and retry logic
-        agent = build_admin_agent(ctx)
-        prompt_lower = request.ask_text.lower()
+        # Opt-in cache for repeated read-only questions
+        cache_key = None
+        cache_debug = {"status": "disabled"}
+        if RESPONSE_CACHE_ENABLED:
+            cache_key = make_cache_key("admin", request.account_id, request.region, request.ask_text, request.metadata)
+            cached = response_cache.get(cache_key)
+            if cached:
+                cached_response, age_seconds = cached
+                print(f"[CACHE] Hit {cache_key[:12]} (age {age_seconds}s) | Correlation: {correlation_id}")
+                return {
+                    **cached_response,
+                    "timings": timings.summary(),
+                    "debug": {
+                        "tier": "admin",
+                        "correlation_id": correlation_id,
+                        "cache": {"status": "hit", "key": cache_key[:12], "age_seconds": age_seconds},
+                        "total_ms": int((time.time() - start_time) * 1000)
+                    }
+                }
         
-        # Retry logic for streaming failures
-        max_retries = 2
-        for attempt in range(max_retries + 1):
-            try:
-                # Apply structured output based on intent
-                if any(word in prompt_lower for word in ["cost", "price", "pricing", "estimate"]):
-                    try:
-                        answer = agent(request.ask_text, output_type=CostAnalysis)
-                    except Exception as e:
-                        print(f"Structured output failed: {e}")
-                        answer = agent(request.ask_text)
-                elif any(word in prompt_lower for word in ["pull request", "pr", "security"]):
-                    try:
-                        answer = agent(request.ask_text, output_type=PRAnalysis)
-                    except Exception as e:
-                        print(f"Structured output failed: {e}")
-                        answer = agent(request.ask_text)
-                else:
-                    answer = agent(request.ask_text)
-                break  # Success, exit retry loop
-            except Exception as e:
-                if "Response ended prematurely" in str(e) and attempt < max_retries:
-                    print(f"Bedrock streaming failed (attempt {attempt + 1}), retrying...")
-                    time.sleep(1)  # Brief delay before retry
-                    continue
-                else:
-                    raise  # Re-raise if not a streaming error or max retries exceeded
+        # Check out a warm admin agent and execute with structured output and retry logic
+        with pooled_agent("admin", ctx) as (agent, agent_setup_ms), timed_stage("agent", "admin"):
+            prompt_lower = request.ask_text.lower()
+        
+            # Retry logic for streaming failures
+            max_retries = 2
+            for attempt in range(max_retries + 1):
+                try:
+                    # Apply structured output based on intent
+                    if any(word in prompt_lower for word in ["cost", "price", "pricing", "estimate"]):
+                        try:
+                            answer = await agent.invoke_async(request.ask_text, output_type=CostAnalysis)
+                        except Exception as e:
+                            print(f"Structured output failed: {e}")
+                            answer = await agent.invoke_async(request.ask_text)
+                    elif any(word in prompt_lower for word in ["pull request", "pr", "security"]):
+                        try:
+                            answer = await agent.invoke_async(request.ask_text, output_type=PRAnalysis)
+                        except Exception as e:
+                            print(f"Structured output failed: {e}")
+                            answer = await agent.invoke_async(request.ask_text)
+                    else:
+                        answer = await agent.invoke_async(request.ask_text)
+                    break  # Success, exit retry loop
+                except Exception as e:
+                    if "Response ended prematurely" in str(e) and attempt < max_retries:
+                        print(f"Bedrock streaming failed (attempt {attempt + 1}), retrying...")
+                        await asyncio.sleep(1)  # Brief delay before retry
+                        continue
+                    else:
+                        raise  # Re-raise if not a streaming error or max retries exceeded
+            
+            # Record what ran before the pool resets the conversation
+            tool_calls = tool_calls_from_messages(agent.messages)
+            tool_errors = tool_errors_from_messages(agent.messages)
+            record_agent_usage(agent)
         
         # Curate response for PR comments
         if hasattr(answer, 'content'):
@@ -328,9 +424,13 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
             final_answer = str(answer)
             structured_data = None
         
+        if cache_key:
+            cache_debug = store_if_cacheable(cache_key, {"final_response": curated_answer, "structured_data": structured_data}, tool_calls, tool_errors)
+        
         return {
             "final_response": curated_answer,
             "structured_data": structured_data,
+            "timings": timings.summary(),
             "debug": {
                 "tier": "admin",
                 "correlation_id": correlation_id,
@@ -339,6 +439,8 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
                 "aws_region": identity_info.get("region"),
                 "aws_service": identity_info.get("service"),
                 "tools_advertised_count": len(ALL_ADMIN_TOOLS),
+                "agent_setup_ms": agent_setup_ms,
+                "cache": cache_debug,
                 "total_ms": int((time.time() - start_time) * 1000)
             }
         }
@@ -346,6 +448,213 @@ async def admin_endpoint(request: BrokerRequest, req: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def single_event(event: str, data: Dict[str, Any]):
+    yield sse_event(event, data)
+
+async def stream_agent_answer(tier: str, request: BrokerRequest, ctx: dict, correlation_id: str, start_time: float, debug_extra: Dict[str, Any]):
+    """
+    Run a pooled agent and yield SSE events: start, token, tool_start, tool_end,
+    then final (or error). Tool events arrive from worker threads through the
+    request's tool event sink; closing the stream cancels the agent run.
+    """
+    timings = get_request_timings()
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    done = object()
+    set_tool_event_sink(lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+    
+    yield sse_event("start", {"tier": tier, "correlation_id": correlation_id})
+    
+    # Opt-in cache for repeated read-only questions
+    cache_key = None
+    cache_debug = {"status": "disabled"}
+    if RESPONSE_CACHE_ENABLED:
+        cache_key = make_cache_key(tier, request.account_id, request.region, request.ask_text, request.metadata)
+        cached = response_cache.get(cache_key)
+        if cached:
+            cached_response, age_seconds = cached
+            print(f"[CACHE] Hit {cache_key[:12]} (age {age_seconds}s) | Correlation: {correlation_id}")
+            yield sse_event("final", {
+                **cached_response,
+                "timings": timings.summary(),
+                "debug": {
+                    "tier": tier,
+                    "correlation_id": correlation_id,
+                    "cache": {"status": "hit", "key": cache_key[:12], "age_seconds": age_seconds},
+                    "total_ms": int((time.time() - start_time) * 1000)
+                }
+            })
+            return
+    
+    result = None
+    error = None
+    first_token_ms = None
+    with pooled_agent(tier, ctx) as (agent, agent_setup_ms):
+        async def produce():
+            # Structured output can't be streamed, so the stream always runs free-form
+            emitted = False
+            max_retries = 2
+            with timed_stage("agent", tier):
+                for attempt in range(max_retries + 1):
+                    try:
+                        async for event in agent.stream_async(request.ask_text):
+                            if event.get("data"):
+                                emitted = True
+                                events.put_nowait({"type": "token", "text": event["data"]})
+                            elif "result" in event:
+                                events.put_nowait({"type": "result", "result": event["result"]})
+                        break
+                    except Exception as e:
+                        # Only retry if the client hasn't seen any output yet
+                        if "Response ended prematurely" in str(e) and attempt < max_retries and not emitted:
+                            print(f"Bedrock streaming failed (attempt {attempt + 1}), retrying...")
+                            await asyncio.sleep(1)
+                            continue
+                        events.put_nowait({"type": "error", "error": str(e)})
+                        break
+            events.put_nowait(done)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await events.get()
+                if event is done:
+                    break
+                event_type = event.pop("type")
+                if event_type == "result":
+                    result = event["result"]
+                elif event_type == "error":
+                    error = event["error"]
+                else:
+                    if event_type == "token" and first_token_ms is None:
+                        first_token_ms = int((time.time() - start_time) * 1000)
+                    yield sse_event(event_type, event)
+        finally:
+            if not producer.done():
+                # Client disconnected - stop the agent before it goes back to the pool
+                print(f"[STREAM] Client closed stream early | Correlation: {correlation_id}")
+                producer.cancel()
+                try:
+                    await producer
+                except BaseException:
+                    pass
+        
+        # Record what ran before the pool resets the conversation
+        tool_calls = tool_calls_from_messages(agent.messages)
+        tool_errors = tool_errors_from_messages(agent.messages)
+        record_agent_usage(agent)
+    
+    if error is not None:
+        yield sse_event("error", {"error": error, "correlation_id": correlation_id})
+        return
+    
+    curated_answer = curate_response({"message": {"content": [{"text": str(result)}]}})
+    
+    if cache_key:
+        cached_value = {"final_response": curated_answer}
+        if tier == "admin":
+            cached_value["structured_data"] = None
+        cache_debug = store_if_cacheable(cache_key, cached_value, tool_calls, tool_errors)
+    
+    yield sse_event("final", {
+        "final_response": curated_answer,
+        "timings": timings.summary(),
+        "debug": {
+            "tier": tier,
+            "correlation_id": correlation_id,
+            **debug_extra,
+            "agent_setup_ms": agent_setup_ms,
+            "tool_calls_count": len(tool_calls),
+            "cache": cache_debug,
+            "first_token_ms": first_token_ms,
+            "total_ms": int((time.time() - start_time) * 1000)
+        }
+    })
+
+@app.post("/ask/stream")
+async def ask_stream_endpoint(request: BrokerRequest, req: Request):
+    """User tier endpoint streaming tokens, tool events and the curated answer as SSE"""
+    req.state.metadata = request.metadata
+    req.state.prompt = request.ask_text
+    
+    correlation_id = req.state.correlation_id
+    print(f"🔍 USER STREAM PROMPT: {request.ask_text} | Correlation: {correlation_id}")
+    start_time = time.time()
+    timings = start_request_timings()
+    
+    # Authentication and guards fail with a normal HTTP status before the stream opens
+    validate_aws_signature(req, "ask")
+    
+    ctx = build_request_context(request.dict(), tier="user")
+    ctx["prompt"] = request.ask_text
+    ctx["correlation_id"] = correlation_id
+    
+    with timed_stage("guards"):
+        guard_result = await asyncio.to_thread(check_intent_guards, ctx)
+    if guard_result:
+        return sse_response(single_event("final", {
+            "final_response": f"Request blocked: {guard_result['message']}",
+            "timings": timings.summary(),
+            "debug": {
+                "tier": "user",
+                "correlation_id": correlation_id,
+                "guard_triggered": guard_result["error_type"],
+                "total_ms": int((time.time() - start_time) * 1000)
+            }
+        }))
+    
+    return sse_response(stream_agent_answer("user", request, ctx, correlation_id, start_time, {
+        "tools_advertised_count": len(USER_ALLOWED_TOOL_NAMES)
+    }))
+
+@app.post("/admin/stream")
+async def admin_stream_endpoint(request: BrokerRequest, req: Request):
+    """Admin tier endpoint streaming tokens, tool events and the curated answer as SSE"""
+    req.state.metadata = request.metadata
+    req.state.prompt = request.ask_text
+    
+    correlation_id = req.state.correlation_id
+    print(f"🔍 ADMIN STREAM PROMPT: {request.ask_text} | Correlation: {correlation_id}")
+    start_time = time.time()
+    timings = start_request_timings()
+    
+    identity_info = validate_aws_signature(req, "admin")
+    
+    ctx = build_request_context(request.dict(), tier="admin")
+    ctx["prompt"] = request.ask_text
+    ctx["correlation_id"] = correlation_id
+    ctx["aws_identity"] = identity_info
+    
+    with timed_stage("guards"):
+        guard_result = await asyncio.to_thread(check_intent_guards, ctx)
+    if guard_result and guard_result.get("error_type") == "MISSING_PARAMS":
+        return sse_response(single_event("final", {
+            "final_response": f"Missing information: {guard_result['message']}",
+            "timings": timings.summary(),
+            "debug": {
+                "tier": "admin",
+                "correlation_id": correlation_id,
+                "guard_triggered": guard_result["error_type"],
+                "total_ms": int((time.time() - start_time) * 1000)
+            }
+        }))
+    
+    return sse_response(stream_agent_answer("admin", request, ctx, correlation_id, start_time, {
+        "aws_signature_validated": identity_info.get("validated", False),
+        "tools_advertised_count": len(ALL_ADMIN_TOOLS)
+    }))
+
 @app.get("/tools")
 async def list_tools():
     """Debug endpoint to list available tools by tier"""
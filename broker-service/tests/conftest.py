@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The broker's modules are top-level, and its image installs platform_aws_context from the repo root
+BROKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BROKER_DIR)
+sys.path.insert(0, os.path.dirname(BROKER_DIR))
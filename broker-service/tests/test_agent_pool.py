@@ -0,0 +1,44 @@
+"""Tests for checking agents out of the warm pools."""
+
+import pytest
+
+from agents import agent_pool
+from agents.agent_pool import AgentPool, pooled_agent
+from agents.agents import get_tool_context
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = AgentPool("user", set(), "You are a test agent.")
+    pool.warm(1)
+    monkeypatch.setitem(agent_pool.AGENT_POOLS, "user", pool)
+    return pool
+
+
+def test_tool_context_is_unbound_after_the_request(pool):
+    with pooled_agent("user", {"aws": {"account_id": "111111111111"}}):
+        assert get_tool_context()["aws"]["account_id"] == "111111111111"
+
+    assert get_tool_context() == {}
+
+
+def test_released_agent_is_reset_including_interrupt_state(pool):
+    with pooled_agent("user", {}) as (agent, _):
+        agent.messages.append({"role": "user", "content": [{"text": "hi"}]})
+        agent._interrupt_state.activate()
+
+    with pooled_agent("user", {}) as (reused, _):
+        assert reused is agent
+        assert reused.messages == []
+        assert not reused._interrupt_state.activated
+
+
+def test_agent_from_a_failed_request_is_dropped(pool):
+    with pytest.raises(RuntimeError):
+        with pooled_agent("user", {"aws": {"account_id": "111111111111"}}) as (agent, _):
+            raise RuntimeError("stream ended prematurely")
+
+    assert get_tool_context() == {}
+    assert pool.stats() == {"idle": 0, "built": 1, "reused": 1, "discarded": 1}
+    with pooled_agent("user", {}) as (replacement, _):
+        assert replacement is not agent
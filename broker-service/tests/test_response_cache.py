@@ -0,0 +1,58 @@
+"""Tests for which answers the response cache keeps."""
+
+import json
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, store_if_cacheable, tool_calls_from_messages, tool_errors_from_messages
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+    return cache
+
+
+def conversation(*tool_results):
+    """An assistant turn calling ecs_call_tool once per result, then the user turn carrying the results"""
+    uses = [{"toolUse": {"toolUseId": f"t{i}", "name": "ecs_call_tool", "input": {"api_operation": "DescribeServices"}}} for i in range(len(tool_results))]
+    results = [{"toolResult": dict(result, toolUseId=f"t{i}")} for i, result in enumerate(tool_results)]
+    return [
+        {"role": "user", "content": [{"text": "are my services healthy?"}]},
+        {"role": "assistant", "content": uses},
+        {"role": "user", "content": results}
+    ]
+
+
+def store(messages):
+    return store_if_cacheable("k" * 64, {"final_response": "answer"}, tool_calls_from_messages(messages), tool_errors_from_messages(messages))
+
+
+def test_successful_read_only_answer_is_cached(fresh_cache):
+    messages = conversation({"status": "success", "content": [{"text": json.dumps({"services": [{"status": "ACTIVE"}]})}]})
+
+    assert store(messages)["status"] == "miss"
+    assert fresh_cache.get("k" * 64) is not None
+
+
+@pytest.mark.parametrize("tool_result", [
+    # Raised inside the tool
+    {"status": "error", "content": [{"text": "Tool ecs_call_tool exceeded its 30s deadline"}]},
+    # execute_tool's {"error": ...}, as format_tool_result renders it
+    {"status": "success", "content": [{"text": "Error: Legacy gateway call failed: 503 Server Error"}]},
+    # In-band ECS failure from the gateway
+    {"status": "success", "content": [{"text": json.dumps({"error": "ThrottlingException", "status": "failed"}, indent=2)}]},
+    # Gateway envelope passed through as JSON
+    {"status": "success", "content": [{"json": {"jsonrpc": "2.0", "result": {"structuredContent": {"status": "error", "error": "AccessDenied"}, "isError": False}}}]},
+])
+def test_answer_built_on_a_failed_tool_call_bypasses_the_cache(fresh_cache, tool_result):
+    ok = {"status": "success", "content": [{"text": "[]"}]}
+    debug = store(conversation(ok, tool_result))
+
+    assert debug["status"] == "bypass"
+    assert debug["reason"] == "tool_error"
+    assert debug["tool_errors"] == 1
+    assert fresh_cache.get("k" * 64) is None
+    assert fresh_cache.stats()["bypasses"] == 1
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Background-refreshed tool catalog for the broker service
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+# Static IAC and ECS tools, served through the gateway's /call-tool
+STATIC_TOOLS = [
+    {
+        "toolSpec": {
+            "name": "iac_call_tool",
+            "description": "Call Infrastructure as Code tools",
+            "inputSchema": {
+                "json": {
+                    "type": "object",
+                    "properties": {
+                        "tool": {"type": "string"},
+                        "params": {
+                            "type": "object",
+                            "properties": {
+                                "account_id": {"type": "string"},
+                                "region": {"type": "string"},
+                                "stack_name": {"type": "string"}
+                            },
+                            "required": ["account_id", "region"]
+                        }
+                    },
+                    "required": ["tool", "params"]
+                }
+            }
+        }
+    },
+    {
+        "toolSpec": {
+            "name": "ecs_call_tool",
+            "description": "Call ECS tools",
+            "inputSchema": {
+                "json": {
+                    "type": "object",
+                    "properties": {
+                        "tool": {"type": "string"},
+                        "params": {
+                            "type": "object",
+                            "properties": {
+                                "api_operation": {"type": "string"},
+                                "api_params": {"type": "object"},
+                                "account_id": {"type": "string"},
+                                "region": {"type": "string"}
+                            },
+                            "required": ["api_operation", "api_params", "account_id", "region"]
+                        }
+                    },
+                    "required": ["tool", "params"]
+                }
+            }
+        }
+    }
+]
+
+# Dynamic backends, in the order their tools are advertised
+CATALOG_BACKENDS = ["metrics", "pricingcalc", "pr"]
+
+TIERS = ["user", "admin"]
+
+
+class ToolCatalog:
+    """
+    Serves the last good tool snapshot while refreshing each backend's
+    tools/list concurrently in the background on a TTL.
+
+    Per-tier filtered lists are rebuilt only when a backend's tool set changes.
+    """
+
+    def __init__(self, alb_url: str, get_client: Callable[[str], httpx.AsyncClient], is_tool_allowed: Callable[[str, str], bool], ttl_seconds: int = 300, retry_seconds: int = 30, list_timeout: float = 5):
+        self.alb_url = alb_url
+        self.get_client = get_client
+        self.is_tool_allowed = is_tool_allowed
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.list_timeout = list_timeout
+
+        # Last good snapshot per backend
+        self._backend_tools: Dict[str, List[Dict]] = {backend: [] for backend in CATALOG_BACKENDS}
+        self._backend_hash: Dict[str, Optional[str]] = {backend: None for backend in CATALOG_BACKENDS}
+        self._freshness: Dict[str, Dict[str, Any]] = {
+            backend: {"last_success": None, "last_attempt": None, "last_error": None, "tool_count": 0, "changes": 0}
+            for backend in CATALOG_BACKENDS
+        }
+
+        self._all_tools: List[Dict] = list(STATIC_TOOLS)
+        self._tier_tools: Dict[str, List[Dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild()
+
+    async def _fetch_backend(self, backend: str) -> List[Dict]:
+        response = await self.get_client(backend).post(
+            f"{self.alb_url}/{backend}",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            headers={"Content-Type": "application/json"},
+            timeout=self.list_timeout
+        )
+        response.raise_for_status()
+        result = response.json()
+        if 'result' not in result or 'tools' not in result['result']:
+            raise ValueError(f"Malformed tools/list response: {str(result)[:200]}")
+
+        return [
+            {
+                "toolSpec": {
+                    "name": tool['name'],
+                    "description": tool['description'],
+                    "inputSchema": {"json": tool['inputSchema']}
+                }
+            }
+            for tool in result['result']['tools']
+        ]
+
+    async def _refresh_backend(self, backend: str) -> bool:
+        """Refresh one backend; returns True if its tool set changed"""
+        freshness = self._freshness[backend]
+        freshness["last_attempt"] = time.time()
+        try:
+            tools = await self._fetch_backend(backend)
+        except Exception as e:
+            # Keep serving the last good snapshot
+            freshness["last_error"] = str(e)
+            print(f"[TOOLS] Failed to fetch {backend} tools: {e}")
+            return False
+
+        freshness["last_success"] = time.time()
+        freshness["last_error"] = None
+        freshness["tool_count"] = len(tools)
+
+        digest = hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+        if digest == self._backend_hash[backend]:
+            return False
+
+        old_names = {tool["toolSpec"]["name"] for tool in self._backend_tools[backend]}
+        new_names = {tool["toolSpec"]["name"] for tool in tools}
+        print(f"[TOOLS] {backend} catalog changed: {len(tools)} tools (+{sorted(new_names - old_names)} -{sorted(old_names - new_names)})")
+
+        self._backend_tools[backend] = tools
+        self._backend_hash[backend] = digest
+        freshness["changes"] += 1
+        return True
+
+    def _rebuild(self):
+        """Recompute the combined list and the per-tier filtered lists"""
+        all_tools = list(STATIC_TOOLS)
+        for backend in CATALOG_BACKENDS:
+            all_tools.extend(self._backend_tools[backend])
+
+        tier_tools = {
+            tier: [tool for tool in all_tools if self.is_tool_allowed(tool["toolSpec"]["name"], tier)]
+            for tier in TIERS
+        }
+
+        # Swap in whole lists so readers never see a half-built snapshot
+        self._all_tools = all_tools
+        self._tier_tools = tier_tools
+        for tier in TIERS:
+            print(f"[TOOLS] {tier} tier: {len(tier_tools[tier])}/{len(all_tools)} tools allowed")
+
+    async def refresh(self):
+        """Refresh all backends concurrently"""
+        changed = await asyncio.gather(*(self._refresh_backend(backend) for backend in CATALOG_BACKENDS))
+        if any(changed):
+            self._rebuild()
+
+    async def _run(self):
+        while True:
+            # Come back sooner while any backend has never loaded or is failing
+            degraded = any(f["last_error"] or f["last_success"] is None for f in self._freshness.values())
+            await asyncio.sleep(self.retry_seconds if degraded else self.ttl_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[TOOLS] Catalog refresh failed: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_tools(self, tier: str) -> List[Dict]:
+        """Precomputed tool list for a tier; unknown tiers get nothing (fail closed)"""
+        return self._tier_tools.get(tier, [])
+
+    @property
+    def all_tools(self) -> List[Dict]:
+        return self._all_tools
+
+    def status(self) -> Dict[str, Any]:
+        """Per-backend freshness for debugging"""
+        now = time.time()
+        backends = {}
+        for backend, freshness in self._freshness.items():
+            last_success = freshness["last_success"]
+            age = int(now - last_success) if last_success else None
+            backends[backend] = {
+                "tool_count": freshness["tool_count"],
+                "age_seconds": age,
+                "stale": age is None or age > 2 * self.ttl_seconds,
+                "last_error": freshness["last_error"],
+                "changes": freshness["changes"]
+            }
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "total_tools": len(self._all_tools),
+            "tier_counts": {tier: len(tools) for tier, tools in self._tier_tools.items()},
+            "backends": backends
+        }
@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import Any, Dict, List, Optional, Union
 import json
 import logging
-from db import get_db_connection
+import db
 from mcp_protocol import handle_mcp_request
 
 # Configure logging
@@ -12,6 +12,14 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Deployment Metrics MCP Server")
 
+@app.on_event("startup")
+async def startup():
+    await db.warm_pool()
+
+@app.on_event("shutdown")
+def shutdown():
+    db.close_pool()
+
 class JSONRPCRequest(BaseModel):
     jsonrpc: str = "2.0"
     id: Union[str, int]
@@ -28,11 +36,9 @@ class JSONRPCResponse(BaseModel):
 async def health_check():
     """Health check endpoint for ALB"""
     try:
-        # Test database connection
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-        return {"status": "healthy", "service": "deployment-metrics-mcp"}
+        # Test database connection on a pooled connection, off the event loop
+        await db.fetchone("SELECT 1")
+        return {"status": "healthy", "service": "deployment-metrics-mcp", "db_pool": db.pool.stats()}
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Database connection failed")
@@ -1,6 +1,13 @@
+import asyncio
 import os
+import threading
+import time
 import psycopg2
+import psycopg2.errors
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,23 +22,174 @@ DB_PASSWORD = os.environ.get('DB_PASSWORD')  # Required from Secrets Manager
 if not DB_PASSWORD:
     raise ValueError("DB_PASSWORD environment variable is required")
 
+# Pool sizing - DB_POOL_MAX is also the number of query threads
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))
+# How long a query waits for a free connection before failing
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', '10'))
+# Connections idle longer than this get a SELECT 1 before reuse
+DB_POOL_CHECK_IDLE_SECONDS = float(os.environ.get('DB_POOL_CHECK_IDLE_SECONDS', '30'))
+# Server-side cap per statement, so a bad plan can't hold a connection indefinitely
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '5000'))
+DB_CONNECT_TIMEOUT_SECONDS = int(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS', '10'))
+
+
+class ConnectionPool:
+    """psycopg2 ThreadedConnectionPool that blocks when exhausted and checks idle connections before reuse"""
+
+    def __init__(self, minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used: Dict[int, float] = {}
+        self.in_use = 0
+        self.discarded = 0
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        # Created on first use so the service starts (and reports unhealthy) while RDS is unreachable
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(
+                    self.minconn,
+                    self.maxconn,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    database=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
+                    options=f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+                    application_name="deployment-metrics-mcp",
+                    keepalives=1,
+                    keepalives_idle=30
+                )
+                # psycopg2 closes returned connections beyond minconn; open DB_POOL_MIN now but keep up to DB_POOL_MAX warm
+                self._pool.minconn = self.maxconn
+                logger.info(f"Database pool ready ({self.minconn}-{self.maxconn} connections to {DB_HOST})")
+            return self._pool
+
+    def _is_alive(self, conn) -> bool:
+        last_used = self._last_used.get(id(conn))
+        # Fresh and recently used connections skip the round trip
+        if last_used is None or time.time() - last_used < DB_POOL_CHECK_IDLE_SECONDS:
+            return True
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return True
+
+    def _discard(self, pool: ThreadedConnectionPool, conn):
+        self._last_used.pop(id(conn), None)
+        self.discarded += 1
+        pool.putconn(conn, close=True)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT_SECONDS):
+            raise psycopg2.OperationalError(f"No database connection free after {DB_POOL_TIMEOUT_SECONDS:.0f}s")
+        try:
+            conn = self._checkout(self._get_pool())
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_use += 1
+        return conn
+
+    def _checkout(self, pool: ThreadedConnectionPool):
+        # Every pooled connection may have died (e.g. RDS failover); the last try opens a new one
+        for _ in range(self.maxconn + 1):
+            conn = pool.getconn()
+            try:
+                if not conn.closed:
+                    # Reads only; autocommit avoids an open transaction between queries
+                    conn.autocommit = True
+                    if self._is_alive(conn):
+                        return conn
+            except psycopg2.Error:
+                pass
+            logger.warning("Discarding dead pooled database connection")
+            self._discard(pool, conn)
+        raise psycopg2.OperationalError("Could not get a live database connection")
+
+    def release(self, conn, broken: bool = False):
+        pool = self._get_pool()
+        self.in_use -= 1
+        try:
+            if broken or conn.closed:
+                self._discard(pool, conn)
+            else:
+                self._last_used[id(conn)] = time.time()
+                pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        idle = len(self._pool._pool) if self._pool else 0
+        return {"min": self.minconn, "max": self.maxconn, "in_use": self.in_use, "idle": idle, "discarded": self.discarded}
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
+pool = ConnectionPool()
+
+# One thread per pooled connection, so waiting for a connection queues on the event loop, not in threads
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+
+
 @contextmanager
 def get_db_connection():
-    """Get database connection with context manager"""
-    conn = None
+    """Borrow a pooled connection; broken connections are closed instead of returned"""
+    conn = pool.acquire()
+    broken = False
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            connect_timeout=10
-        )
         yield conn
-    except Exception as e:
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
         logger.error(f"Database connection error: {e}")
+        # A statement timeout leaves the connection usable
+        broken = not isinstance(e, psycopg2.errors.QueryCanceled)
         raise
     finally:
-        if conn:
-            conn.close()
+        pool.release(conn, broken)
+
+
+async def run_db(fn: Callable, *args) -> Any:
+    """Run fn(cursor, *args) on a pooled connection in a query thread"""
+    def call():
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                return fn(cur, *args)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def fetchone(sql: str, params=()) -> Optional[tuple]:
+    def query(cur):
+        cur.execute(sql, params)
+        return cur.fetchone()
+
+    return await run_db(query)
+
+
+async def fetchall(sql: str, params=()) -> List[tuple]:
+    def query(cur):
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+    return await run_db(query)
+
+
+async def warm_pool():
+    """Open the minimum connections at startup; failures are logged and retried on first use"""
+    try:
+        await fetchone("SELECT 1")
+    except Exception as e:
+        logger.error(f"Database pool warm-up failed: {e}")
+
+
+def close_pool():
+    pool.close()
+    _executor.shutdown(wait=False)
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Optional
+import json
 import logging
-from db import get_db_connection
+from db import fetchall, fetchone, run_db
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -64,6 +65,18 @@ TOOLS = {
             "required": ["run_id"]
         }
     },
+    "deploy_resolve_run": {
+        "name": "deploy_resolve_run",
+        "description": "Resolve which run to inspect (internal tool) - latest RUNNING run, else latest run. Returns JSON.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "repository": {"type": "string", "description": "Repository name"},
+                "branch": {"type": "string", "description": "Restrict to a branch (optional)"}
+            },
+            "required": ["repository"]
+        }
+    },
     "deploy_workflow": {
         "name": "deploy_workflow",
         "description": "Complete deployment workflow - triggers deploy via PR comment and monitors progress with auto-diagnostics",
@@ -136,6 +149,9 @@ TOOLS = {
     }
 }
 
+class ToolError(Exception):
+    """A tool that ran but has nothing to act on; reported as an MCP isError result"""
+
 async def handle_mcp_request(method: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """Handle MCP JSON-RPC requests"""
     
@@ -167,22 +183,37 @@ async def handle_mcp_request(method: str, params: Optional[Dict[str, Any]]) -> D
             raise ValueError(f"Unknown tool: {tool_name}")
         
         # Call the appropriate tool function
-        result = await call_tool(tool_name, arguments)
+        try:
+            result = await call_tool(tool_name, arguments)
+        except Exception as e:
+            if not isinstance(e, ToolError):
+                logger.error(f"Tool {tool_name} failed: {e}")
+            return {
+                "content": [{"type": "text", "text": f"❌ {e}"}],
+                "isError": True
+            }
+        
+        # Callers that only read structuredContent can skip rendering with _meta.render = false
+        if (params.get("_meta") or {}).get("render", True):
+            text = RENDERERS[tool_name](result)
+        else:
+            text = json.dumps(result)
         
         return {
             "content": [
                 {
                     "type": "text",
-                    "text": result
+                    "text": text
                 }
-            ]
+            ],
+            "structuredContent": result
         }
     
     else:
         raise ValueError(f"Unknown method: {method}")
 
-async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
-    """Execute tool and return formatted result"""
+async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute tool and return its structured result"""
     
     if tool_name == "deploy_get_run":
         return await get_run_details(arguments["run_id"])
@@ -199,6 +230,9 @@ async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
     elif tool_name == "deploy_get_summary":
         return await get_run_summary(arguments["run_id"])
     
+    elif tool_name == "deploy_resolve_run":
+        return await resolve_run(arguments["repository"], arguments.get("branch"))
+    
     elif tool_name == "deploy_workflow":
         return await deploy_workflow(
             arguments["repository"],
@@ -234,342 +268,275 @@ async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
     else:
         raise ValueError(f"Tool not implemented: {tool_name}")
 
-async def get_run_details(run_id: str) -> str:
+# Row shapes shared by every tool result
+RUN_COLUMNS = """run_id, repository, organization, branch, workflow_name, 
+       job_name, runner_name, job_status, job_start_time, 
+       job_end_time, job_duration_seconds, job_error_message"""
+
+STEP_COLUMNS = """step_name, step_index, step_status, step_start_time, 
+       step_end_time, step_duration_seconds"""
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _run(row: tuple) -> Dict[str, Any]:
+    """job_metrics row selected with RUN_COLUMNS"""
+    return {
+        "run_id": row[0],
+        "repository": row[1],
+        "organization": row[2],
+        "branch": row[3],
+        "workflow": row[4],
+        "job": row[5],
+        "runner": row[6],
+        "status": row[7],
+        "start_time": _iso(row[8]),
+        "end_time": _iso(row[9]),
+        "duration_seconds": row[10],
+        "error": row[11]
+    }
+
+# A run with its step rollup in one round trip; the lateral aggregate walks idx_steps_run_step per run
+SUMMARY_SELECT = f"""
+    SELECT {RUN_COLUMNS},
+           s.total, s.succeeded, s.failed, s.running
+    FROM job_metrics j
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE step_status = 'SUCCEEDED') AS succeeded,
+               COUNT(*) FILTER (WHERE step_status = 'FAILED') AS failed,
+               COUNT(*) FILTER (WHERE step_status = 'RUNNING') AS running
+        FROM job_step_metrics
+        WHERE job_step_metrics.run_id = j.run_id
+    ) s"""
+
+def _stats(row: tuple) -> Dict[str, int]:
+    """Step counts selected by SUMMARY_SELECT, after the run columns"""
+    return {"total": row[12], "succeeded": row[13], "failed": row[14], "running": row[15]}
+
+def _step(row: tuple) -> Dict[str, Any]:
+    """job_step_metrics row selected with STEP_COLUMNS"""
+    return {
+        "name": row[0],
+        "index": row[1],
+        "status": row[2],
+        "start_time": _iso(row[3]),
+        "end_time": _iso(row[4]),
+        "duration_seconds": row[5]
+    }
+
+async def get_run_details(run_id: str) -> Dict[str, Any]:
     """Get deployment run details"""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT run_id, repository, organization, branch, workflow_name, 
-                       job_name, runner_name, job_status, job_start_time, 
-                       job_end_time, job_duration_seconds, job_error_message
-                FROM job_metrics 
-                WHERE run_id = %s
-            """, (run_id,))
-            
-            row = cur.fetchone()
-            if not row:
-                return f"No deployment run found with ID: {run_id}"
-            
-            return f"""Deployment Run Details:
-Run ID: {row[0]}
-Repository: {row[1]}
-Organization: {row[2]}
-Branch: {row[3]}
-Workflow: {row[4]}
-Job: {row[5]}
-Runner: {row[6]}
-Status: {row[7]}
-Start Time: {row[8]}
-End Time: {row[9]}
-Duration: {row[10]} seconds
-Error: {row[11] or 'None'}"""
-
-async def get_run_steps(run_id: str, limit: int) -> str:
-    """Get deployment steps for a run"""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT step_name, step_index, step_status, 
-                       step_start_time, step_end_time, step_duration_seconds
-                FROM job_step_metrics 
-                WHERE run_id = %s 
-                ORDER BY step_index
-                LIMIT %s
-            """, (run_id, limit))
-            
-            rows = cur.fetchall()
-            if not rows:
-                return f"No steps found for run ID: {run_id}"
-            
-            result = f"Deployment Steps for Run {run_id}:\n"
-            for row in rows:
-                result += f"\nStep {row[1]}: {row[0]}"
-                result += f"\n  Status: {row[2]}"
-                result += f"\n  Start: {row[3]}"
-                result += f"\n  End: {row[4]}"
-                result += f"\n  Duration: {row[5]} seconds"
-            
-            return result
+    row = await fetchone(f"""
+        SELECT {RUN_COLUMNS}
+        FROM job_metrics 
+        WHERE run_id = %s
+    """, (run_id,))
+    
+    return {"run_id": run_id, "run": _run(row) if row else None}
 
-async def find_latest_runs(repository: str, limit: int) -> str:
-    """Find latest deployment runs"""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT run_id, workflow_name, job_status, job_start_time, 
-                       job_end_time, branch
-                FROM job_metrics 
-                WHERE repository = %s 
-                ORDER BY job_start_time DESC 
-                LIMIT %s
-            """, (repository, limit))
-            
-            rows = cur.fetchall()
-            if not rows:
-                return f"No deployment runs found for repository: {repository}"
-            
-            result = f"Latest Deployment Runs for {repository}:\n"
-            for row in rows:
-                result += f"\nRun ID: {row[0]}"
-                result += f"\n  Workflow: {row[1]}"
-                result += f"\n  Status: {row[2]}"
-                result += f"\n  Branch: {row[5]}"
-                result += f"\n  Start: {row[3]}"
-                result += f"\n  End: {row[4]}"
-            
-            return result
+def _query_run_steps(cur, run_id: str, limit: int):
+    """Steps for a run, or its job_metrics row when no steps were recorded"""
+    # Query job_step_metrics table for steps
+    cur.execute(f"""
+        SELECT {STEP_COLUMNS}
+        FROM job_step_metrics 
+        WHERE run_id = %s 
+        ORDER BY step_index ASC
+        LIMIT %s
+    """, (run_id, limit))
+    
+    steps = cur.fetchall()
+    if steps:
+        return steps, None
+    
+    # No step-level data, try to get job-level info instead
+    cur.execute(f"""
+        SELECT {RUN_COLUMNS}
+        FROM job_metrics 
+        WHERE run_id = %s
+    """, (run_id,))
+    
+    return steps, cur.fetchone()
 
-async def find_active_runs(repository: str, limit: int) -> str:
-    """Find active/running deployment runs"""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            where_clause = "WHERE job_status = 'RUNNING'"
-            params = [limit]
-            
-            if repository:
-                where_clause += " AND repository = %s"
-                params = [repository, limit]
-            
-            cur.execute(f"""
-                SELECT run_id, repository, workflow_name, job_start_time, runner_name
-                FROM job_metrics 
-                {where_clause}
-                ORDER BY job_start_time DESC 
-                LIMIT %s
-            """, params)
-            
-            rows = cur.fetchall()
-            if not rows:
-                return "No active deployment runs found"
-            
-            result = "Active Deployment Runs:\n"
-            for row in rows:
-                result += f"\nRun ID: {row[0]}"
-                result += f"\n  Repository: {row[1]}"
-                result += f"\n  Workflow: {row[2]}"
-                result += f"\n  Started: {row[3]}"
-                result += f"\n  Runner: {row[4]}"
-            
-            return result
-
-async def get_run_summary(run_id: str) -> str:
-    """Get comprehensive deployment summary"""
-    # Get run details
-    run_details = await get_run_details(run_id)
-    
-    # Get step count
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT COUNT(*), 
-                       COUNT(CASE WHEN step_status = 'SUCCEEDED' THEN 1 END) as succeeded,
-                       COUNT(CASE WHEN step_status = 'FAILED' THEN 1 END) as failed,
-                       COUNT(CASE WHEN step_status = 'RUNNING' THEN 1 END) as running
-                FROM job_step_metrics 
-                WHERE run_id = %s
-            """, (run_id,))
-            
-            step_stats = cur.fetchone()
-            
-    if step_stats and step_stats[0] > 0:
-        summary = f"{run_details}\n\nStep Summary:"
-        summary += f"\n  Total Steps: {step_stats[0]}"
-        summary += f"\n  Succeeded: {step_stats[1]}"
-        summary += f"\n  Failed: {step_stats[2]}"
-        summary += f"\n  Running: {step_stats[3]}"
-        return summary
-    else:
-        return f"{run_details}\n\nNo steps recorded for this run."
+async def get_run_steps(run_id: str, limit: int = 200) -> Dict[str, Any]:
+    """Get deployment steps for a specific run_id; run is the job-level fallback when there are none"""
+    # Both queries on one pooled connection
+    steps, job_info = await run_db(_query_run_steps, run_id, limit)
+    
+    return {
+        "run_id": run_id,
+        "steps": [_step(row) for row in steps],
+        "run": _run(job_info) if job_info else None
+    }
 
-async def deploy_workflow(repository: str, branch: str, pr_number: Optional[int], environment: str, region: str) -> str:
-    """Complete deployment workflow - starts deployment and returns immediately"""
-    import time
+async def find_latest_runs(repository: str, limit: int) -> Dict[str, Any]:
+    """Find latest deployment runs"""
+    rows = await fetchall(f"""
+        SELECT {RUN_COLUMNS}
+        FROM job_metrics 
+        WHERE repository = %s 
+        ORDER BY job_start_time DESC 
+        LIMIT %s
+    """, (repository, limit))
     
-    try:
-        # Step 1: Request local GitHub CLI execution via special response format
-        if pr_number:
-            gh_command = f"gh pr comment {pr_number} --repo {repository} --body '/deploy {environment}'"
-            
-            # Return immediately with tracking instructions
-            return f"""🚀 **Deployment Started**
+    return {"repository": repository, "runs": [_run(row) for row in rows]}
 
-**Details:**
-- Repository: {repository}
-- Branch: {branch}
-- Environment: {environment}
-- PR: #{pr_number}
-- Region: {region}
+async def find_active_runs(repository: str, limit: int) -> Dict[str, Any]:
+    """Find active/running deployment runs"""
+    where_clause = "WHERE job_status = 'RUNNING'"
+    params = [limit]
+    
+    if repository:
+        where_clause += " AND repository = %s"
+        params = [repository, limit]
+    
+    rows = await fetchall(f"""
+        SELECT {RUN_COLUMNS}
+        FROM job_metrics 
+        {where_clause}
+        ORDER BY job_start_time DESC 
+        LIMIT %s
+    """, params)
+    
+    return {"repository": repository or None, "runs": [_run(row) for row in rows]}
 
-⏳ **Deployment is running in background...**
+async def resolve_run(repository: str, branch: Optional[str] = None) -> Dict[str, Any]:
+    """Resolve the run to inspect: latest RUNNING run, else latest run"""
+    branch_clause = ""
+    params = [repository]
+    if branch:
+        branch_clause = " AND branch = %s"
+        params = [repository, branch]
+    
+    # Both branches walk idx_job_metrics_repo_start and stop at one row
+    row = await fetchone(f"""
+        SELECT run_id, job_status, branch, job_start_time, selected
+        FROM (
+            (SELECT run_id, job_status, branch, job_start_time, 'running' AS selected, 0 AS priority
+             FROM job_metrics
+             WHERE repository = %s{branch_clause} AND job_status = 'RUNNING'
+             ORDER BY job_start_time DESC
+             LIMIT 1)
+            UNION ALL
+            (SELECT run_id, job_status, branch, job_start_time, 'latest' AS selected, 1 AS priority
+             FROM job_metrics
+             WHERE repository = %s{branch_clause}
+             ORDER BY job_start_time DESC
+             LIMIT 1)
+        ) candidates
+        ORDER BY priority
+        LIMIT 1
+    """, params + params)
+    
+    if not row:
+        return {"run_id": None, "repository": repository, "branch": branch, "selected": None}
+    
+    return {
+        "run_id": row[0],
+        "status": row[1],
+        "branch": row[2],
+        "start_time": _iso(row[3]),
+        "repository": repository,
+        "selected": row[4]
+    }
 
-**Track Progress:**
-- Use: `deploy_status {repository}` to check latest status
-- Use: `deploy_get_run <run_id>` when run_id appears in PR comments
-- Check PR #{pr_number} for run_id updates from GitHub Actions
+async def get_run_summary(run_id: str) -> Dict[str, Any]:
+    """Get comprehensive deployment summary: run details and step counts"""
+    row = await fetchone(f"{SUMMARY_SELECT} WHERE j.run_id = %s", (run_id,))
+    
+    if not row:
+        return {"run_id": run_id, "run": None, "stats": {"total": 0, "succeeded": 0, "failed": 0, "running": 0}}
+    return {"run_id": run_id, "run": _run(row), "stats": _stats(row)}
 
-KIRO_LOCAL_COMMAND:{gh_command}"""
-        
-        # If no PR, return guidance
-        return f"""❌ **No PR Found**
+async def latest_run_summaries(repository: str, limit: int) -> List[Dict[str, Any]]:
+    """Latest runs of a repository, each with its step counts"""
+    rows = await fetchall(f"""
+        {SUMMARY_SELECT}
+        WHERE j.repository = %s
+        ORDER BY j.job_start_time DESC
+        LIMIT %s
+    """, (repository, limit))
+    
+    return [dict(_run(row), stats=_stats(row)) for row in rows]
 
-To deploy {repository} to {environment}:
-1. Create a PR from {branch} branch
-2. Run deploy_workflow again with PR number
-3. Or manually post `/deploy {environment}` comment on existing PR"""
-        
-    except Exception as e:
-        return f"❌ Deploy workflow error: {str(e)}"
+async def deploy_workflow(repository: str, branch: str, pr_number: Optional[int], environment: str, region: str) -> Dict[str, Any]:
+    """Complete deployment workflow - starts deployment and returns immediately"""
+    # Request local GitHub CLI execution via special response format
+    command = None
+    if pr_number:
+        command = f"gh pr comment {pr_number} --repo {repository} --body '/deploy {environment}'"
+    
+    return {
+        "repository": repository,
+        "branch": branch,
+        "environment": environment,
+        "pr_number": pr_number,
+        "region": region,
+        "started": command is not None,
+        "command": command
+    }
 
-async def deploy_monitor(repository: str, branch: str, environment: str, region: str) -> str:
+async def deploy_monitor(repository: str, branch: str, environment: str, region: str) -> Dict[str, Any]:
     """Monitor deployment progress after GitHub CLI execution"""
     import asyncio
     
-    try:
-        # Wait for workflow to start
-        await asyncio.sleep(5)
-        
-        # Find latest run
-        latest_run = await find_latest_runs(repository, 1)
-        if "No deployment runs found" in latest_run:
-            return "❌ No deployment runs found after triggering"
-        
-        # Extract run_id
-        lines = latest_run.split('\n')
-        run_id = None
-        for line in lines:
-            if line.startswith("Run ID:"):
-                run_id = line.split(": ")[1].strip()
-                break
-        
-        if not run_id:
-            return "❌ Could not extract run_id from latest run"
-        
-        # Monitor progress
-        status_msg = f"🔄 Monitoring deployment run_id: {run_id}"
+    # Wait for workflow to start
+    await asyncio.sleep(5)
+    
+    # Find latest run
+    latest = await find_latest_runs(repository, 1)
+    if not latest["runs"]:
+        raise ToolError("No deployment runs found after triggering")
+    run_id = latest["runs"][0]["run_id"]
+    
+    # Poll for completion (max 5 minutes for demo)
+    max_polls = 30
+    for poll_count in range(max_polls):
+        summary = await get_run_summary(run_id)
+        status = (summary["run"] or {}).get("status") or ""
         
-        # Poll for completion (max 5 minutes for demo)
-        max_polls = 30
-        for poll_count in range(max_polls):
-            run_details = await get_run_details(run_id)
-            
-            if "SUCCEEDED" in run_details:
-                summary = await get_run_summary(run_id)
-                return f"✅ Deployment completed successfully!\n\n{summary}"
-            
-            elif "FAILED" in run_details or "ERROR" in run_details:
-                diagnosis = await auto_diagnose_failure(run_id, repository, region)
-                return f"❌ Deployment failed!\n\n{run_details}\n\n🔍 Auto-diagnosis:\n{diagnosis}"
-            
-            elif "RUNNING" in run_details:
-                if poll_count % 3 == 0:  # Update every 30 seconds
-                    status_msg += f"\n⏳ Still running... (poll {poll_count + 1}/{max_polls})"
-            
-            await asyncio.sleep(10)
+        if status == "SUCCEEDED":
+            return dict(summary, outcome="succeeded")
         
-        return f"⏰ Deployment monitoring timed out. Run_id: {run_id}"
+        elif "FAILED" in status or "ERROR" in status:
+            diagnosis = await auto_diagnose_failure(run_id, repository, region)
+            return dict(summary, outcome="failed", diagnosis=diagnosis)
         
-    except Exception as e:
-        return f"❌ Deploy monitor error: {str(e)}"
+        await asyncio.sleep(10)
+    
+    return dict(summary, outcome="timed_out")
 
-async def auto_diagnose_failure(run_id: str, repository: str, region: str) -> str:
+async def auto_diagnose_failure(run_id: str, repository: str, region: str) -> List[str]:
     """Auto-diagnose deployment failures"""
     diagnosis = []
     
     try:
         steps = await get_run_steps(run_id, 50)
+        run = steps["run"] or {}
+        text = " ".join(
+            [f"{step['name']} {step['status']}" for step in steps["steps"]]
+            + [str(run.get("job") or ""), str(run.get("error") or "")]
+        ).lower()
         
-        if "cloudformation" in steps.lower():
+        if "cloudformation" in text:
             diagnosis.append("📋 CloudFormation issue detected")
             diagnosis.append("💡 Use: kiro 'check stack status for latest deployment'")
         
-        if "ecs" in steps.lower():
+        if "ecs" in text:
             diagnosis.append("🐳 ECS deployment issue detected") 
             diagnosis.append("💡 Use: kiro 'check ECS service health'")
         
-        if "timeout" in steps.lower():
+        if "timeout" in text:
             diagnosis.append("⏰ Timeout detected - check resource capacity")
         
         if not diagnosis:
             diagnosis.append("🔍 Check deployment steps above for details")
         
-        return "\n".join(diagnosis)
-        
-    except Exception as e:
-        return f"⚠️ Auto-diagnosis failed: {str(e)}"
-
-async def get_run_steps(run_id: str, limit: int = 200) -> str:
-    """Get deployment steps for a specific run_id"""
-    try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            
-            # Query job_step_metrics table for steps
-            cur.execute("""
-                SELECT step_name, step_index, step_status, step_start_time, 
-                       step_end_time, step_duration_seconds
-                FROM job_step_metrics 
-                WHERE run_id = %s 
-                ORDER BY step_index ASC
-                LIMIT %s
-            """, (run_id, limit))
-            
-            steps = cur.fetchall()
-            
-            if not steps:
-                # No step-level data, try to get job-level info instead
-                cur.execute("""
-                    SELECT workflow_name, job_name, job_status, job_start_time, 
-                           job_end_time, job_duration_seconds, job_error_message
-                    FROM job_metrics 
-                    WHERE run_id = %s
-                """, (run_id,))
-                
-                job_info = cur.fetchone()
-                
-                if not job_info:
-                    return f"❌ No deployment data found for run_id: {run_id}"
-                
-                workflow_name, job_name, job_status, start_time, end_time, duration, error_msg = job_info
-                
-                result = [f"📋 **Deployment Info for Run {run_id}**\n"]
-                result.append(f"**Workflow:** {workflow_name}")
-                result.append(f"**Job:** {job_name}")
-                result.append(f"**Status:** {job_status}")
-                result.append(f"**Started:** {start_time}")
-                if end_time:
-                    result.append(f"**Ended:** {end_time}")
-                if duration:
-                    result.append(f"**Duration:** {duration}s")
-                if error_msg:
-                    result.append(f"**Error:** {error_msg}")
-                
-                result.append(f"\n⚠️ **Note:** Step-level details not available")
-                result.append(f"💡 **Tip:** Check GitHub Actions tab for detailed step logs")
-                
-                return "\n".join(result)
-            
-            # Format steps output
-            result = [f"📋 **Deployment Steps for Run {run_id}**\n"]
-            
-            for step_name, step_index, step_status, start_time, end_time, duration in steps:
-                status_emoji = "✅" if step_status == "SUCCEEDED" else "❌" if step_status == "FAILED" else "⏳"
-                
-                result.append(f"{status_emoji} **Step {step_index + 1}: {step_name}**")
-                result.append(f"   Status: {step_status}")
-                
-                if start_time:
-                    result.append(f"   Started: {start_time}")
-                if end_time:
-                    result.append(f"   Ended: {end_time}")
-                if duration:
-                    result.append(f"   Duration: {duration}s")
-                result.append("")
-            
-            return "\n".join(result)
-            
     except Exception as e:
-        logger.error(f"Error getting steps for run_id {run_id}: {e}")
-        return f"❌ Error retrieving steps: {str(e)}"
+        diagnosis.append(f"⚠️ Auto-diagnosis failed: {str(e)}")
+    
+    return diagnosis
 
 async def get_latest_run_id_from_comments(repository: str, pr_number: Optional[int] = None) -> Optional[str]:
     """Extract latest run_id from GitHub PR comments - optimized to read only last comment"""
@@ -629,131 +596,61 @@ async def get_latest_run_id_from_comments(repository: str, pr_number: Optional[i
         print(f"Error reading GitHub comments: {e}")
         return None
 
-async def deploy_status(repository: str, pr_number: Optional[int] = None, limit: int = 3, run_id: Optional[str] = None) -> str:
+
+async def deploy_status(repository: str, pr_number: Optional[int] = None, limit: int = 3, run_id: Optional[str] = None) -> Dict[str, Any]:
     """Check status of deployments - auto-detects latest run_id from GitHub comments if not provided"""
-    try:
-        # If run_id provided, get specific run details
-        if run_id:
-            run_details = await get_run_details(run_id)
-            if "No deployment run found" in run_details:
-                return f"❌ **Run {run_id} not found**\n\nDouble-check the run_id or use `deploy_status {repository}` to see recent deployments."
-            
-            return f"📊 **Deployment Status for Run {run_id}**\n\n{run_details}\n\n💡 **Quick Actions:**\n- `deploy_get_steps {run_id}` - Get deployment steps\n- `deploy_workflow` - Start new deployment"
-        
-        # Try to auto-detect run_id from GitHub comments
-        detected_run_id = await get_latest_run_id_from_comments(repository, pr_number)
-        
-        if detected_run_id:
-            run_details = await get_run_details(detected_run_id)
-            if "No deployment run found" not in run_details:
-                return f"📊 **Latest Deployment Status** (auto-detected from PR comments)\n\n{run_details}\n\n💡 **Quick Actions:**\n- `deploy_get_steps {detected_run_id}` - Get deployment steps\n- `deploy_workflow` - Start new deployment"
-        
-        # Fallback: Get latest deployment runs from database
-        latest_runs = await find_latest_runs(repository, limit)
-        
-        if "No deployment runs found" in latest_runs:
-            return f"📊 **No deployments found for {repository}**\n\nTo start a deployment:\n- Use: `deploy_workflow` with repository and PR details"
-        
-        # Parse and enhance the status information
-        lines = latest_runs.split('\n')
-        enhanced_status = [f"📊 **Latest Deployments for {repository}**\n"]
-        
-        current_run = {}
-        for line in lines:
-            if line.startswith("Run ID:"):
-                if current_run:
-                    # Process previous run
-                    status_emoji = "✅" if current_run.get("status") == "SUCCEEDED" else "❌" if "FAILED" in current_run.get("status", "") else "⏳"
-                    enhanced_status.append(f"{status_emoji} **Run {current_run.get('run_id', 'Unknown')}** - {current_run.get('status', 'Unknown')}")
-                    if current_run.get("branch"):
-                        enhanced_status.append(f"   🌿 Branch: {current_run.get('branch')}")
-                    if current_run.get("start_time"):
-                        enhanced_status.append(f"   🕐 Started: {current_run.get('start_time')}")
-                    enhanced_status.append("")
-                
-                # Start new run
-                current_run = {"run_id": line.split(": ")[1].strip()}
-            elif line.startswith("  Status:"):
-                current_run["status"] = line.split(": ")[1].strip()
-            elif line.startswith("  Branch:"):
-                current_run["branch"] = line.split(": ")[1].strip()
-            elif line.startswith("  Start:"):
-                current_run["start_time"] = line.split(": ")[1].strip()
-        
-        # Process last run
-        if current_run:
-            status_emoji = "✅" if current_run.get("status") == "SUCCEEDED" else "❌" if "FAILED" in current_run.get("status", "") else "⏳"
-            enhanced_status.append(f"{status_emoji} **Run {current_run.get('run_id', 'Unknown')}** - {current_run.get('status', 'Unknown')}")
-            if current_run.get("branch"):
-                enhanced_status.append(f"   🌿 Branch: {current_run.get('branch')}")
-            if current_run.get("start_time"):
-                enhanced_status.append(f"   🕐 Started: {current_run.get('start_time')}")
-        
-        enhanced_status.append(f"\n💡 **Quick Actions:**")
-        enhanced_status.append(f"- `deploy_get_run <run_id>` - Get detailed run info")
-        enhanced_status.append(f"- `deploy_get_steps <run_id>` - Get deployment steps")
-        enhanced_status.append(f"- `deploy_workflow` - Start new deployment")
-        
-        return "\n".join(enhanced_status)
-        
-    except Exception as e:
-        return f"❌ Status check error: {str(e)}"
+    # If run_id provided, get specific run details
+    if run_id:
+        summary = await get_run_summary(run_id)
+        runs = [dict(summary["run"], stats=summary["stats"])] if summary["run"] else []
+        return {"repository": repository, "source": "run_id", "run_id": run_id, "runs": runs}
+    
+    # Try to auto-detect run_id from GitHub comments
+    detected_run_id = await get_latest_run_id_from_comments(repository, pr_number)
+    
+    if detected_run_id:
+        summary = await get_run_summary(detected_run_id)
+        if summary["run"]:
+            runs = [dict(summary["run"], stats=summary["stats"])]
+            return {"repository": repository, "source": "pr_comment", "run_id": detected_run_id, "runs": runs}
+    
+    # Fallback: Get latest deployment runs from database
+    runs = await latest_run_summaries(repository, limit)
+    return {"repository": repository, "source": "latest", "run_id": None, "runs": runs}
 
-async def deploy_rollback(repository: str, environment: str, target_run_id: Optional[str]) -> str:
+async def deploy_rollback(repository: str, environment: str, target_run_id: Optional[str]) -> Dict[str, Any]:
     """Rollback to previous successful deployment"""
-    try:
-        # Find target deployment to rollback to
-        if target_run_id:
-            # Rollback to specific run_id
-            target_details = await get_run_details(target_run_id)
-            if "No deployment run found" in target_details:
-                return f"❌ Target run_id {target_run_id} not found"
-        else:
-            # Find last successful deployment
-            latest_runs = await find_latest_runs(repository, 10)
-            if "No deployment runs found" in latest_runs:
-                return f"❌ No deployment history found for {repository}"
-            
-            # Parse runs to find last successful one
-            lines = latest_runs.split('\n')
-            target_run_id = None
-            for i, line in enumerate(lines):
-                if line.startswith("Run ID:"):
-                    run_id = line.split(": ")[1].strip()
-                    # Check next few lines for status
-                    for j in range(i+1, min(i+6, len(lines))):
-                        if "Status: SUCCEEDED" in lines[j]:
-                            target_run_id = run_id
-                            break
-                    if target_run_id:
-                        break
-            
-            if not target_run_id:
-                return f"❌ No successful deployment found to rollback to"
-        
-        # Trigger rollback deployment
-        rollback_comment = f"/deploy rollback={target_run_id} env={environment}"
-        
-        return f"""🔄 Rollback initiated for {repository}
-        
-Target: Run ID {target_run_id}
-Environment: {environment}
-
-KIRO_LOCAL_COMMAND:echo "Rollback would post: {rollback_comment}"
-KIRO_CONTINUE_WITH:deploy_monitor|{repository}|rollback|{environment}|us-east-1
-
-⚠️  Note: Actual rollback requires GitHub workflow support for rollback commands"""
-        
-    except Exception as e:
-        return f"❌ Rollback error: {str(e)}"
+    # Find target deployment to rollback to
+    if target_run_id:
+        # Rollback to specific run_id
+        details = await get_run_details(target_run_id)
+        if not details["run"]:
+            raise ToolError(f"Target run_id {target_run_id} not found")
+    else:
+        # Find last successful deployment
+        latest = await find_latest_runs(repository, 10)
+        if not latest["runs"]:
+            raise ToolError(f"No deployment history found for {repository}")
+        
+        target_run_id = next((run["run_id"] for run in latest["runs"] if run["status"] == "SUCCEEDED"), None)
+        if not target_run_id:
+            raise ToolError("No successful deployment found to rollback to")
+    
+    # Trigger rollback deployment
+    return {
+        "repository": repository,
+        "environment": environment,
+        "target_run_id": target_run_id,
+        "comment": f"/deploy rollback={target_run_id} env={environment}"
+    }
 
 async def deploy_approve(repository: str, run_id: str, approver: str) -> str:
     """Approve a pending deployment"""
     try:
         # Check if deployment is pending approval
-        run_details = await get_run_details(run_id)
+        details = await get_run_details(run_id)
         
-        if "No deployment run found" in run_details:
+        if not details["run"]:
             return f"❌ Run ID {run_id} not found"
         
         # Post approval comment
@@ -771,3 +668,204 @@ KIRO_LOCAL_COMMAND:echo "Approval would post: {approval_comment}"
         
     except Exception as e:
         return f"❌ Approval error: {str(e)}"
+
+# Text rendering of tool results, for clients that show content[0].text
+
+def _status_emoji(status: Optional[str]) -> str:
+    return "✅" if status == "SUCCEEDED" else "❌" if "FAILED" in (status or "") else "⏳"
+
+def _run_text(run: Dict[str, Any]) -> str:
+    return "\n".join([
+        "Deployment Run Details:",
+        f"Run ID: {run['run_id']}",
+        f"Repository: {run['repository']}",
+        f"Organization: {run['organization']}",
+        f"Branch: {run['branch']}",
+        f"Workflow: {run['workflow']}",
+        f"Job: {run['job']}",
+        f"Runner: {run['runner']}",
+        f"Status: {run['status']}",
+        f"Start Time: {run['start_time']}",
+        f"End Time: {run['end_time']}",
+        f"Duration: {run['duration_seconds']} seconds",
+        f"Error: {run['error'] or 'None'}"
+    ])
+
+def render_run(result: Dict[str, Any]) -> str:
+    if not result["run"]:
+        return f"No deployment run found with ID: {result['run_id']}"
+    return _run_text(result["run"])
+
+def render_steps(result: Dict[str, Any]) -> str:
+    run_id = result["run_id"]
+    
+    if not result["steps"]:
+        run = result["run"]
+        if not run:
+            return f"❌ No deployment data found for run_id: {run_id}"
+        
+        lines = [f"📋 **Deployment Info for Run {run_id}**\n"]
+        lines.append(f"**Workflow:** {run['workflow']}")
+        lines.append(f"**Job:** {run['job']}")
+        lines.append(f"**Status:** {run['status']}")
+        lines.append(f"**Started:** {run['start_time']}")
+        if run["end_time"]:
+            lines.append(f"**Ended:** {run['end_time']}")
+        if run["duration_seconds"]:
+            lines.append(f"**Duration:** {run['duration_seconds']}s")
+        if run["error"]:
+            lines.append(f"**Error:** {run['error']}")
+        
+        lines.append("\n⚠️ **Note:** Step-level details not available")
+        lines.append("💡 **Tip:** Check GitHub Actions tab for detailed step logs")
+        return "\n".join(lines)
+    
+    lines = [f"📋 **Deployment Steps for Run {run_id}**\n"]
+    for step in result["steps"]:
+        lines.append(f"{_status_emoji(step['status'])} **Step {step['index'] + 1}: {step['name']}**")
+        lines.append(f"   Status: {step['status']}")
+        if step["start_time"]:
+            lines.append(f"   Started: {step['start_time']}")
+        if step["end_time"]:
+            lines.append(f"   Ended: {step['end_time']}")
+        if step["duration_seconds"]:
+            lines.append(f"   Duration: {step['duration_seconds']}s")
+        lines.append("")
+    return "\n".join(lines)
+
+def render_latest(result: Dict[str, Any]) -> str:
+    if not result["runs"]:
+        return f"No deployment runs found for repository: {result['repository']}"
+    
+    lines = [f"Latest Deployment Runs for {result['repository']}:"]
+    for run in result["runs"]:
+        lines.append(f"\nRun ID: {run['run_id']}")
+        lines.append(f"  Workflow: {run['workflow']}")
+        lines.append(f"  Status: {run['status']}")
+        lines.append(f"  Branch: {run['branch']}")
+        lines.append(f"  Start: {run['start_time']}")
+        lines.append(f"  End: {run['end_time']}")
+    return "\n".join(lines)
+
+def render_active(result: Dict[str, Any]) -> str:
+    if not result["runs"]:
+        return "No active deployment runs found"
+    
+    lines = ["Active Deployment Runs:"]
+    for run in result["runs"]:
+        lines.append(f"\nRun ID: {run['run_id']}")
+        lines.append(f"  Repository: {run['repository']}")
+        lines.append(f"  Workflow: {run['workflow']}")
+        lines.append(f"  Started: {run['start_time']}")
+        lines.append(f"  Runner: {run['runner']}")
+    return "\n".join(lines)
+
+def _stats_text(stats: Dict[str, int]) -> str:
+    if not stats["total"]:
+        return "No steps recorded for this run."
+    
+    return "\n".join([
+        "Step Summary:",
+        f"  Total Steps: {stats['total']}",
+        f"  Succeeded: {stats['succeeded']}",
+        f"  Failed: {stats['failed']}",
+        f"  Running: {stats['running']}"
+    ])
+
+def render_summary(result: Dict[str, Any]) -> str:
+    return f"{render_run(result)}\n\n{_stats_text(result['stats'])}"
+
+def render_workflow(result: Dict[str, Any]) -> str:
+    if not result["started"]:
+        return f"""❌ **No PR Found**
+
+To deploy {result['repository']} to {result['environment']}:
+1. Create a PR from {result['branch']} branch
+2. Run deploy_workflow again with PR number
+3. Or manually post `/deploy {result['environment']}` comment on existing PR"""
+    
+    return f"""🚀 **Deployment Started**
+
+**Details:**
+- Repository: {result['repository']}
+- Branch: {result['branch']}
+- Environment: {result['environment']}
+- PR: #{result['pr_number']}
+- Region: {result['region']}
+
+⏳ **Deployment is running in background...**
+
+**Track Progress:**
+- Use: `deploy_status {result['repository']}` to check latest status
+- Use: `deploy_get_run <run_id>` when run_id appears in PR comments
+- Check PR #{result['pr_number']} for run_id updates from GitHub Actions
+
+KIRO_LOCAL_COMMAND:{result['command']}"""
+
+def render_monitor(result: Dict[str, Any]) -> str:
+    if result["outcome"] == "succeeded":
+        return f"✅ Deployment completed successfully!\n\n{render_summary(result)}"
+    if result["outcome"] == "failed":
+        diagnosis = "\n".join(result["diagnosis"])
+        return f"❌ Deployment failed!\n\n{render_run(result)}\n\n🔍 Auto-diagnosis:\n{diagnosis}"
+    return f"⏰ Deployment monitoring timed out. Run_id: {result['run_id']}"
+
+def render_status(result: Dict[str, Any]) -> str:
+    repository = result["repository"]
+    runs = result["runs"]
+    quick_actions = "💡 **Quick Actions:**\n- `deploy_get_steps {run_id}` - Get deployment steps\n- `deploy_workflow` - Start new deployment"
+    
+    if result["source"] == "run_id":
+        run_id = result["run_id"]
+        if not runs:
+            return f"❌ **Run {run_id} not found**\n\nDouble-check the run_id or use `deploy_status {repository}` to see recent deployments."
+        return f"📊 **Deployment Status for Run {run_id}**\n\n{_run_text(runs[0])}\n\n{_stats_text(runs[0]['stats'])}\n\n{quick_actions.format(run_id=run_id)}"
+    
+    if result["source"] == "pr_comment":
+        return f"📊 **Latest Deployment Status** (auto-detected from PR comments)\n\n{_run_text(runs[0])}\n\n{_stats_text(runs[0]['stats'])}\n\n{quick_actions.format(run_id=result['run_id'])}"
+    
+    if not runs:
+        return f"📊 **No deployments found for {repository}**\n\nTo start a deployment:\n- Use: `deploy_workflow` with repository and PR details"
+    
+    lines = [f"📊 **Latest Deployments for {repository}**\n"]
+    for run in runs:
+        lines.append(f"{_status_emoji(run['status'])} **Run {run['run_id']}** - {run['status']}")
+        if run["branch"]:
+            lines.append(f"   🌿 Branch: {run['branch']}")
+        if run["start_time"]:
+            lines.append(f"   🕐 Started: {run['start_time']}")
+        stats = run["stats"]
+        if stats["total"]:
+            lines.append(f"   🧩 Steps: {stats['succeeded']}/{stats['total']} succeeded, {stats['failed']} failed, {stats['running']} running")
+        lines.append("")
+    
+    lines.append("\n💡 **Quick Actions:**")
+    lines.append("- `deploy_get_run <run_id>` - Get detailed run info")
+    lines.append("- `deploy_get_steps <run_id>` - Get deployment steps")
+    lines.append("- `deploy_workflow` - Start new deployment")
+    return "\n".join(lines)
+
+def render_rollback(result: Dict[str, Any]) -> str:
+    return f"""🔄 Rollback initiated for {result['repository']}
+        
+Target: Run ID {result['target_run_id']}
+Environment: {result['environment']}
+
+KIRO_LOCAL_COMMAND:echo "Rollback would post: {result['comment']}"
+KIRO_CONTINUE_WITH:deploy_monitor|{result['repository']}|rollback|{result['environment']}|us-east-1
+
+⚠️  Note: Actual rollback requires GitHub workflow support for rollback commands"""
+
+RENDERERS = {
+    "deploy_get_run": render_run,
+    "deploy_get_steps": render_steps,
+    "deploy_find_latest": render_latest,
+    "deploy_find_active": render_active,
+    "deploy_get_summary": render_summary,
+    # Internal tool; its text has always been the JSON itself
+    "deploy_resolve_run": json.dumps,
+    "deploy_workflow": render_workflow,
+    "deploy_monitor": render_monitor,
+    "deploy_rollback": render_rollback,
+    "deploy_status": render_status
+}
@@ -224,6 +224,23 @@ AWS documentation including ECS's newest feature launches
     return mcp, config
 
 
+def _run_server(mcp: FastMCP, config: Dict[str, Any]) -> None:
+    """Serve over stdio, or over streamable HTTP when MCP_TRANSPORT=http."""
+    if config.get("transport", "stdio") not in ("http", "streamable-http"):
+        mcp.run()
+        return
+
+    from platform_aws_context.http_transport import run_streamable_http
+
+    run_streamable_http(
+        mcp,
+        host=config.get("http-host", "0.0.0.0"),
+        port=config.get("http-port", 8000),
+        path=config.get("http-path", "/mcp"),
+        stateless=config.get("http-stateless", True),
+    )
+
+
 def main() -> None:
     """Main entry point for the ECS MCP Server."""
     try:
@@ -234,7 +251,7 @@ def main() -> None:
         logger.info("Server started")
         logger.info(f"Write operations enabled: {config.get('allow-write', False)}")
         logger.info(f"Sensitive data access enabled: {config.get('allow-sensitive-data', False)}")
-        mcp.run()
+        _run_server(mcp, config)
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
         sys.exit(0)
@@ -39,6 +39,14 @@ def get_config() -> Dict[str, Any]:
         "allow-write": os.environ.get("ALLOW_WRITE", "").lower() in ("true", "1", "yes"),
         "allow-sensitive-data": os.environ.get("ALLOW_SENSITIVE_DATA", "").lower()
         in ("true", "1", "yes"),
+        # Transport: "stdio" (default) or "http" for streamable HTTP
+        "transport": os.environ.get("MCP_TRANSPORT", "stdio").lower(),
+        "http-host": os.environ.get("MCP_HTTP_HOST", "0.0.0.0"),
+        "http-port": int(os.environ.get("MCP_HTTP_PORT", "8000")),
+        "http-path": os.environ.get("MCP_HTTP_PATH", "/mcp"),
+        # Each HTTP request gets a fresh MCP session unless MCP_HTTP_STATELESS=false
+        "http-stateless": os.environ.get("MCP_HTTP_STATELESS", "true").lower()
+        in ("true", "1", "yes"),
     }
 
     logger.debug(f"Loaded configuration: {config}")
@@ -402,6 +402,35 @@ class TestMainFunctionBehavior(unittest.TestCase):
         mock_mcp.run.assert_called_once()
         mock_exit.assert_not_called()
 
+    @patch("awslabs.ecs_mcp_server.main.sys.exit")
+    @patch("awslabs.ecs_mcp_server.main._setup_logging")
+    @patch("awslabs.ecs_mcp_server.main._create_ecs_mcp_server")
+    def test_http_transport_startup(self, mock_create_server, mock_setup_logging, mock_exit):
+        """Test MCP_TRANSPORT=http serves stateless streamable HTTP with a health route."""
+        mock_mcp = MagicMock()
+        mock_config = {
+            "transport": "http",
+            "http-host": "127.0.0.1",
+            "http-port": 9001,
+            "http-path": "/mcp",
+        }
+        mock_create_server.return_value = (mock_mcp, mock_config)
+        mock_setup_logging.return_value = MagicMock()
+
+        main()
+
+        mock_mcp.custom_route.assert_any_call("/health", methods=["GET"])
+        mock_mcp.custom_route.assert_any_call("/metrics", methods=["GET"])
+        mock_mcp.run.assert_called_once_with(
+            transport="http",
+            host="127.0.0.1",
+            port=9001,
+            path="/mcp",
+            stateless_http=True,
+            json_response=True,
+        )
+        mock_exit.assert_not_called()
+
     @patch("awslabs.ecs_mcp_server.main.sys.exit")
     @patch("awslabs.ecs_mcp_server.main._setup_logging")
     @patch("awslabs.ecs_mcp_server.main._create_ecs_mcp_server")
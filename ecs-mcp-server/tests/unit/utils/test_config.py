@@ -86,6 +86,35 @@ class TestConfig(unittest.TestCase):
         self.assertTrue(config["allow-write"])
         self.assertTrue(config["allow-sensitive-data"])
 
+    @patch("os.environ")
+    def test_get_config_transport_defaults_to_stdio(self, mock_environ):
+        """Test that the server uses stdio unless MCP_TRANSPORT is set."""
+        mock_environ.get.side_effect = lambda key, default=None: {}.get(key, default)
+
+        config = get_config()
+
+        self.assertEqual(config["transport"], "stdio")
+        self.assertEqual(config["http-port"], 8000)
+        self.assertEqual(config["http-path"], "/mcp")
+        self.assertTrue(config["http-stateless"])
+
+    @patch("os.environ")
+    def test_get_config_with_http_transport(self, mock_environ):
+        """Test that HTTP transport settings are read from the environment."""
+        mock_environ.get.side_effect = lambda key, default=None: {
+            "MCP_TRANSPORT": "HTTP",
+            "MCP_HTTP_HOST": "127.0.0.1",
+            "MCP_HTTP_PORT": "9001",
+            "MCP_HTTP_STATELESS": "false",
+        }.get(key, default)
+
+        config = get_config()
+
+        self.assertEqual(config["transport"], "http")
+        self.assertEqual(config["http-host"], "127.0.0.1")
+        self.assertEqual(config["http-port"], 9001)
+        self.assertFalse(config["http-stateless"])
+
 
 if __name__ == "__main__":
     unittest.main()
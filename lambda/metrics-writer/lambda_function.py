@@ -1,5 +1,20 @@
+"""
+Metrics writer: records GitHub workflow job and step events in the metrics database
+
+Accepts, in order of preference for busy workflows:
+  - SQS event source mapping: each record body is one event, a list of events or
+    {"events": [...]}; failed records are returned as batchItemFailures
+  - Batch invoke: {"action": "batch", "events": [...]} or POST /batch
+  - Single event: {"action": "job_start" | "job_end" | "job_step", ...} or
+    POST /job/start, /job/end, /job/step
+
+A batch is written in one transaction with one prepared statement per event
+type. The connection and its prepared statements are kept open between
+invocations of a warm container, and each invoke logs its DB latency.
+"""
 import json
 import os
+import time
 import psycopg2
 from datetime import datetime
 import logging
@@ -7,151 +22,343 @@ import logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def get_db_connection():
-    return psycopg2.connect(
+# A reused connection idle longer than this gets a SELECT 1 first; a frozen container's socket may be dead
+DB_LIVENESS_CHECK_SECONDS = float(os.environ.get('DB_LIVENESS_CHECK_SECONDS', '30'))
+DB_CONNECT_TIMEOUT_SECONDS = int(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS', '5'))
+
+# Reused by later invocations of the same container
+_conn = None
+_last_used = 0.0
+# DB timings for the current invoke, logged by lambda_handler
+_timings = {}
+
+# Each writer is one prepared statement over column arrays, so any batch size
+# shares a plan. Applied in this order so a batch holding a run's start, steps
+# and end lands whole: steps reference job_metrics, and an end must not be
+# overwritten by its start.
+WRITERS = [
+    # UPSERT job_metrics by run_id - only use fields we actually have
+    ('job_start', 'run_id', [
+        ('run_id', 'varchar'), ('repository', 'varchar'), ('organization', 'varchar'), ('branch', 'varchar'),
+        ('runner_name', 'varchar'), ('workflow_name', 'varchar'), ('job_name', 'varchar'), ('job_status', 'varchar'),
+        ('job_start_time', 'timestamptz')
+    ], """
+    INSERT INTO job_metrics (
+        run_id, repository, organization, branch,
+        runner_name, workflow_name, job_name, job_status, job_start_time
+    )
+    SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    ON CONFLICT (run_id) DO UPDATE SET
+        job_status = EXCLUDED.job_status,
+        job_start_time = EXCLUDED.job_start_time
+    """),
+    # UPSERT job_step_metrics by step_id
+    ('job_step', 'step_id', [
+        ('step_id', 'varchar'), ('run_id', 'varchar'), ('step_name', 'varchar'), ('step_index', 'int'),
+        ('step_status', 'varchar'), ('step_start_time', 'timestamptz'), ('step_end_time', 'timestamptz'),
+        ('step_duration_seconds', 'int')
+    ], """
+    INSERT INTO job_step_metrics (
+        step_id, run_id, step_name, step_index, step_status,
+        step_start_time, step_end_time, step_duration_seconds
+    )
+    SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (step_id) DO UPDATE SET
+        step_status = EXCLUDED.step_status,
+        step_end_time = EXCLUDED.step_end_time,
+        step_duration_seconds = EXCLUDED.step_duration_seconds
+    """),
+    # UPDATE job_metrics set end/status/error/duration where run_id
+    ('job_end', 'run_id', [
+        ('run_id', 'varchar'), ('job_end_time', 'timestamptz'), ('job_status', 'varchar'),
+        ('job_error_message', 'varchar'), ('job_failure_category', 'varchar'), ('job_duration_seconds', 'int')
+    ], """
+    UPDATE job_metrics SET
+        job_end_time = v.job_end_time,
+        job_status = v.job_status,
+        job_error_message = v.job_error_message,
+        job_failure_category = v.job_failure_category,
+        job_duration_seconds = v.job_duration_seconds
+    FROM unnest($1, $2, $3, $4, $5, $6)
+        AS v (run_id, job_end_time, job_status, job_error_message, job_failure_category, job_duration_seconds)
+    WHERE job_metrics.run_id = v.run_id
+    """)
+]
+ACTIONS = {action: key for action, key, _, _ in WRITERS}
+
+def prepare_statements(cur):
+    for action, _, columns, sql in WRITERS:
+        types = ', '.join(f'{sql_type}[]' for _, sql_type in columns)
+        cur.execute(f"PREPARE {action}_write ({types}) AS {sql}")
+
+def connect():
+    conn = psycopg2.connect(
         host=os.environ['DB_HOST'],
         port=os.environ.get('DB_PORT', '5432'),
         database=os.environ['DB_NAME'],
         user=os.environ['DB_USER'],
-        password=os.environ['DB_PASSWORD']
+        password=os.environ['DB_PASSWORD'],
+        connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
+        keepalives=1,
+        keepalives_idle=30
     )
+    with conn.cursor() as cur:
+        prepare_statements(cur)
+    conn.commit()
+    return conn
+
+def get_db_connection():
+    """The container's connection, checked after idling and reopened if it has gone away"""
+    global _conn
+    if _conn is not None and not _conn.closed and time.time() - _last_used > DB_LIVENESS_CHECK_SECONDS:
+        start = time.perf_counter()
+        try:
+            with _conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"Reused database connection is dead ({e}); reconnecting")
+            drop_db_connection()
+        _timings['check_ms'] = (time.perf_counter() - start) * 1000
+
+    if _conn is None or _conn.closed:
+        start = time.perf_counter()
+        _conn = connect()
+        _timings['connect_ms'] = _timings.get('connect_ms', 0) + (time.perf_counter() - start) * 1000
+    return _conn
+
+def drop_db_connection():
+    """Forget a broken connection so the next use reconnects"""
+    global _conn
+    if _conn is not None:
+        try:
+            _conn.close()
+        except psycopg2.Error:
+            pass
+        _conn = None
+
+RESPONSES = {
+    'job_start': ('Job start recorded', 'run_id'),
+    'job_end': ('Job end recorded', 'run_id'),
+    'job_step': ('Job step recorded', 'step_id')
+}
+
+def validate(event):
+    """Error message for an event that can't be written, else None"""
+    if not isinstance(event, dict):
+        return 'Event must be an object'
+    action = event.get('action')
+    if action not in ACTIONS:
+        return f'Unknown action: {action}'
+    if not event.get(ACTIONS[action]):
+        return f'{action} event missing {ACTIONS[action]}'
+    return None
+
+def write_events(cur, events):
+    """One EXECUTE per event type present; returns events applied per action. Caller commits."""
+    written = {}
+    for action, key, columns, _ in WRITERS:
+        # A statement can't touch the same row twice, so the last event per key wins
+        rows = {}
+        count = 0
+        for event in events:
+            if event['action'] == action:
+                rows[event[key]] = event
+                count += 1
+        if rows:
+            # Explicit casts: a list of strings or NULLs adapts to text[], which only casts explicitly
+            args = ', '.join(f'%s::{sql_type}[]' for _, sql_type in columns)
+            cur.execute(f"EXECUTE {action}_write ({args})", [[row.get(column) for row in rows.values()] for column, _ in columns])
+        written[action] = count
+    return written
+
+def _write(valid, failed):
+    global _last_used
+    conn = get_db_connection()
+    start = time.perf_counter()
+    try:
+        try:
+            with conn.cursor() as cur:
+                written = write_events(cur, [event for _, event in valid])
+            conn.commit()
+            return written, failed
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            raise
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.warning(f"Batch of {len(valid)} events rejected ({e}); retrying one by one")
+
+        written = {action: 0 for action in ACTIONS}
+        order = {action: index for index, (action, _, _, _) in enumerate(WRITERS)}
+        with conn.cursor() as cur:
+            for ref, event in sorted(valid, key=lambda item: order[item[1]['action']]):
+                cur.execute("SAVEPOINT event")
+                try:
+                    write_events(cur, [event])
+                    cur.execute("RELEASE SAVEPOINT event")
+                    written[event['action']] += 1
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT event")
+                    failed.append((ref, str(e).strip()))
+        conn.commit()
+        return written, failed
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        drop_db_connection()
+        raise
+    finally:
+        _last_used = time.time()
+        _timings['write_ms'] = _timings.get('write_ms', 0) + (time.perf_counter() - start) * 1000
+
+def write_batch(items):
+    """
+    Write (ref, event) pairs in one transaction. If the batch is rejected (for
+    example a step whose run was never started), retry event by event under
+    savepoints so only the bad events fail. A lost connection is reopened and
+    the batch retried once; the upserts are idempotent. Returns (written, [(ref, error)]).
+    """
+    failed = []
+    valid = []
+    for ref, event in items:
+        error = validate(event)
+        if error:
+            failed.append((ref, error))
+        else:
+            valid.append((ref, event))
+
+    _timings['events'] = _timings.get('events', 0) + len(valid)
+    if not valid:
+        return {action: 0 for action in ACTIONS}, failed
+
+    try:
+        return _write(valid, list(failed))
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        logger.warning(f"Database connection lost ({e}); reconnecting and retrying")
+        _timings['retried'] = True
+        return _write(valid, list(failed))
+
+def handle_event(body):
+    """Single job_start/job_end/job_step event, answered as before batching existed"""
+    action = body.get('action')
+    message, key = RESPONSES[action]
+    logger.info(f"Processing {action} for {key}: {body.get(key)}")
+
+    _, failed = write_batch([(0, body)])
+    if failed:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': failed[0][1]})
+        }
+
+    logger.info(f"Successfully recorded {action} for {key}: {body.get(key)}")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'message': message, key: body.get(key)})
+    }
+
+def handle_batch(events):
+    if not isinstance(events, list):
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': 'events must be a list'})
+        }
+
+    written, failed = write_batch(list(enumerate(events)))
+    logger.info(f"Batch of {len(events)} events: written {written}, failed {len(failed)}")
+    return {
+        'statusCode': 200 if not failed else 207,
+        'body': json.dumps({
+            'written': written,
+            'failed': [{'index': index, 'error': error} for index, error in failed]
+        })
+    }
+
+def handle_queue(records):
+    """SQS batch; returns the partial batch response so only failed messages are retried"""
+    items = []
+    bad_messages = set()
+    for record in records:
+        message_id = record['messageId']
+        try:
+            body = json.loads(record['body'])
+        except (TypeError, ValueError) as e:
+            logger.error(f"Unparseable message {message_id}: {e}")
+            bad_messages.add(message_id)
+            continue
+        events = body.get('events', []) if isinstance(body, dict) and 'events' in body else body
+        for event in events if isinstance(events, list) else [events]:
+            items.append((message_id, event))
+
+    # Connection errors propagate so Lambda fails the whole batch and SQS redelivers it
+    written, failed = write_batch(items)
+    for message_id, error in failed:
+        logger.error(f"Message {message_id} failed: {error}")
+        bad_messages.add(message_id)
+
+    logger.info(f"Queue batch of {len(records)} messages ({len(items)} events): written {written}, failed messages {len(bad_messages)}")
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in sorted(bad_messages)]}
+
+def log_db_latency():
+    if 'write_ms' not in _timings:
+        return
+    connect = f"{_timings['connect_ms']:.1f} ms (new)" if 'connect_ms' in _timings else 'reused'
+    check = f", check {_timings['check_ms']:.1f} ms" if 'check_ms' in _timings else ''
+    retried = ', retried after reconnect' if _timings.get('retried') else ''
+    logger.info(f"DB latency: connect {connect}{check}, write {_timings['write_ms']:.1f} ms, {_timings['events']} events{retried}")
 
 def lambda_handler(event, context):
+    _timings.clear()
+    try:
+        return route(event)
+    finally:
+        log_db_latency()
+
+def route(event):
+    # Handle SQS event source mapping; errors must raise rather than return, or SQS deletes the batch
+    if 'Records' in event:
+        return handle_queue(event['Records'])
+
     try:
-        logger.info(f"Received event: {json.dumps(event)}")
-        
         # Handle direct Lambda invoke (from GitHub workflow)
         if 'action' in event:
             action = event['action']
             logger.info(f"Processing direct invoke action: {action}")
-            
-            conn = get_db_connection()
-            cur = conn.cursor()
-            
-            if action == 'job_start':
-                return handle_job_start(cur, conn, event)
-            elif action == 'job_end':
-                return handle_job_end(cur, conn, event)
-            elif action == 'job_step':
-                return handle_job_step(cur, conn, event)
+
+            if action == 'batch':
+                return handle_batch(event.get('events'))
+            elif action in RESPONSES:
+                return handle_event(event)
             else:
                 logger.error(f"Unknown action: {action}")
                 return {
                     'statusCode': 400,
                     'body': json.dumps({'error': f'Unknown action: {action}'})
                 }
-        
+
         # Handle HTTP API Gateway events (from Function URL)
         if 'body' in event:
             body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
         else:
             body = event
-        
+
         path = event.get('path', event.get('rawPath', ''))
         method = event.get('httpMethod', event.get('requestContext', {}).get('http', {}).get('method', 'POST'))
-        
+
         logger.info(f"Processing {method} {path}")
-        
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        if path == '/job/start':
-            return handle_job_start(cur, conn, body)
-        elif path == '/job/end':
-            return handle_job_end(cur, conn, body)
-        elif path == '/job/step':
-            return handle_job_step(cur, conn, body)
+
+        paths = {'/job/start': 'job_start', '/job/end': 'job_end', '/job/step': 'job_step'}
+        if path == '/batch':
+            return handle_batch(body.get('events') if isinstance(body, dict) else body)
+        elif path in paths:
+            return handle_event(dict(body, action=paths[path]))
         else:
             logger.error(f"Unknown path: {path}")
             return {
                 'statusCode': 404,
                 'body': json.dumps({'error': 'Not found'})
             }
-            
+
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
-    finally:
-        if 'cur' in locals():
-            cur.close()
-        if 'conn' in locals():
-            conn.close()
-
-def handle_job_start(cur, conn, body):
-    logger.info(f"Processing job_start for run_id: {body.get('run_id')}, repository: {body.get('repository')}")
-    
-    # UPSERT job_metrics by run_id - only use fields we actually have
-    sql = """
-    INSERT INTO job_metrics (
-        run_id, repository, organization, branch, 
-        runner_name, workflow_name, job_name, job_status, job_start_time
-    ) VALUES (
-        %(run_id)s, %(repository)s, %(organization)s, %(branch)s,
-        %(runner_name)s, %(workflow_name)s, %(job_name)s, %(job_status)s, %(job_start_time)s
-    )
-    ON CONFLICT (run_id) DO UPDATE SET
-        job_status = EXCLUDED.job_status,
-        job_start_time = EXCLUDED.job_start_time
-    """
-    
-    logger.info(f"Executing job_start SQL for run_id: {body.get('run_id')}")
-    cur.execute(sql, body)
-    conn.commit()
-    logger.info(f"Successfully recorded job_start for run_id: {body.get('run_id')}")
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Job start recorded', 'run_id': body.get('run_id')})
-    }
-
-def handle_job_end(cur, conn, body):
-    logger.info(f"Processing job_end for run_id: {body.get('run_id')}, status: {body.get('job_status')}")
-    
-    # UPDATE job_metrics set end/status/error/duration where run_id
-    sql = """
-    UPDATE job_metrics SET
-        job_end_time = %(job_end_time)s,
-        job_status = %(job_status)s,
-        job_error_message = %(job_error_message)s,
-        job_failure_category = %(job_failure_category)s,
-        job_duration_seconds = %(job_duration_seconds)s
-    WHERE run_id = %(run_id)s
-    """
-    
-    logger.info(f"Executing job_end SQL for run_id: {body.get('run_id')}")
-    cur.execute(sql, body)
-    rows_affected = cur.rowcount
-    conn.commit()
-    logger.info(f"Successfully updated job_end for run_id: {body.get('run_id')}, rows affected: {rows_affected}")
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Job end recorded', 'run_id': body.get('run_id')})
-    }
-
-def handle_job_step(cur, conn, body):
-    # UPSERT job_step_metrics by step_id
-    sql = """
-    INSERT INTO job_step_metrics (
-        step_id, run_id, step_name, step_index, step_status,
-        step_start_time, step_end_time, step_duration_seconds
-    ) VALUES (
-        %(step_id)s, %(run_id)s, %(step_name)s, %(step_index)s, %(step_status)s,
-        %(step_start_time)s, %(step_end_time)s, %(step_duration_seconds)s
-    )
-    ON CONFLICT (step_id) DO UPDATE SET
-        step_status = EXCLUDED.step_status,
-        step_end_time = EXCLUDED.step_end_time,
-        step_duration_seconds = EXCLUDED.step_duration_seconds
-    """
-    
-    cur.execute(sql, body)
-    conn.commit()
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Job step recorded', 'step_id': body.get('step_id')})
-    }
@@ -0,0 +1,185 @@
+"""
+Admission control for one MCP server type: bounded queues with priority lanes
+
+A pool has a fixed number of execution slots (workers x in-flight per worker).
+Calls beyond that wait in a lane queue, admin ahead of user. A call is turned
+away at once, instead of queueing, when its lane is full or when the expected
+wait already exceeds the latency budget or the call's own deadline.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+LANES = ("admin", "user")
+
+# Prometheus buckets in seconds for queue wait and execution time
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class AdmissionRejected(Exception):
+    """Call refused without queueing; status is 429 or 503"""
+
+    def __init__(self, status: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class Histogram:
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        slots: Callable[[], int],
+        max_queue: Dict[str, int],
+        latency_budget: float,
+        initial_exec_seconds: float = 2.0
+    ):
+        self.name = name
+        self.slots = slots
+        self.max_queue = max_queue
+        self.latency_budget = latency_budget
+        self.active = 0
+        self.queues: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        # Moving average of execution time, used to predict queue wait
+        self.exec_seconds = initial_exec_seconds
+        self.rejected = {(lane, status): 0 for lane in LANES for status in (429, 503)}
+        self.queue_wait = {lane: Histogram() for lane in LANES}
+        self.execution = {lane: Histogram() for lane in LANES}
+
+    def queued_ahead(self, lane: str) -> int:
+        """Waiters served before a new call in this lane"""
+        if lane == "admin":
+            return len(self.queues["admin"])
+        return len(self.queues["admin"]) + len(self.queues["user"])
+
+    def estimated_wait(self, lane: str) -> float:
+        slots = max(1, self.slots())
+        return (self.queued_ahead(lane) + 1) / slots * self.exec_seconds
+
+    def _reject(self, lane: str, status: int, detail: str, wait: float):
+        self.rejected[(lane, status)] += 1
+        raise AdmissionRejected(status, f"[{self.name}] {detail}", max(1, math.ceil(wait)))
+
+    async def acquire(self, lane: str, timeout: float) -> float:
+        """Wait for an execution slot; returns seconds spent queued"""
+        lane = lane if lane in self.queues else "user"
+        if self.active < self.slots() and not self.queued_ahead(lane):
+            self.active += 1
+            self.queue_wait[lane].observe(0)
+            return 0.0
+
+        wait = self.estimated_wait(lane)
+        if len(self.queues[lane]) >= self.max_queue[lane]:
+            self._reject(lane, 503, f"{lane} queue full ({len(self.queues[lane])} waiting)", wait)
+        budget = min(self.latency_budget, timeout)
+        if wait > budget:
+            self._reject(lane, 429, f"Expected queue wait {wait:.1f}s exceeds {budget:.1f}s budget", wait)
+
+        start = time.time()
+        future = asyncio.get_running_loop().create_future()
+        self.queues[lane].append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we gave up - hand it on
+                self.release()
+            else:
+                future.cancel()
+                try:
+                    self.queues[lane].remove(future)
+                except ValueError:
+                    pass
+            raise
+        waited = time.time() - start
+        self.queue_wait[lane].observe(waited)
+        return waited
+
+    def release(self, exec_seconds: Optional[float] = None, lane: Optional[str] = None):
+        self.active -= 1
+        if exec_seconds is not None:
+            self.exec_seconds = 0.8 * self.exec_seconds + 0.2 * exec_seconds
+            if lane in self.execution:
+                self.execution[lane].observe(exec_seconds)
+        self.dispatch()
+
+    def dispatch(self):
+        """Grant free slots to waiters, admin lane first; call again when slots grow"""
+        while self.active < self.slots():
+            for lane in LANES:
+                queue = self.queues[lane]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if queue:
+                    queue.popleft().set_result(None)
+                    self.active += 1
+                    break
+            else:
+                return
+
+    def status(self) -> dict:
+        return {
+            "slots": self.slots(),
+            "active": self.active,
+            "queued": {lane: len(queue) for lane, queue in self.queues.items()},
+            "max_queue": self.max_queue,
+            "latency_budget_seconds": self.latency_budget,
+            "avg_exec_ms": int(self.exec_seconds * 1000),
+            "rejected": {f"{lane}_{status}": count for (lane, status), count in self.rejected.items()}
+        }
+
+    def render_metrics(self, family: str) -> list:
+        lines = []
+        for lane in LANES:
+            labels = f'server="{self.name}",lane="{lane}"'
+            if family == "gateway_queue_wait_seconds":
+                lines += self.queue_wait[lane].render(family, labels)
+            elif family == "gateway_execution_seconds":
+                lines += self.execution[lane].render(family, labels)
+            elif family == "gateway_queue_depth":
+                lines.append(f"{family}{{{labels}}} {len(self.queues[lane])}")
+            elif family == "gateway_rejected_total":
+                lines += [f'{family}{{{labels},status="{status}"}} {self.rejected[(lane, status)]}' for status in (429, 503)]
+        return lines
+
+
+METRIC_FAMILIES = (
+    ("gateway_queue_wait_seconds", "histogram", "Time a call waited for an execution slot"),
+    ("gateway_execution_seconds", "histogram", "Time a call held an execution slot"),
+    ("gateway_queue_depth", "gauge", "Calls waiting for an execution slot"),
+    ("gateway_rejected_total", "counter", "Calls turned away by admission control")
+)
+
+
+def render_admission_metrics(controllers) -> str:
+    lines = []
+    for family, kind, help_text in METRIC_FAMILIES:
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} {kind}"]
+        for controller in controllers:
+            lines += controller.render_metrics(family)
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,19 @@
 import asyncio
+import contextvars
 import json
 import os
 import subprocess
 import sys
-from fastapi import FastAPI, HTTPException
+import time
+import httpx
+from fastapi import FastAPI, HTTPException, Header, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Union
 import logging
+from result_cache import result_cache
+from stderr_log import stderr_log
+from admission import AdmissionController, AdmissionRejected, render_admission_metrics
 
 # Ensure module paths are available for imports
 sys.path.insert(0, '/app/aws-iac-mcp-server')
@@ -14,12 +21,61 @@ sys.path.insert(0, '/app/ecs-mcp-server')
 
 app = FastAPI(title="MCP Gateway", version="1.0.0")
 
+# Default per-request deadline for a tools/call round trip
+MCP_CALL_TIMEOUT_SECONDS = float(os.environ.get("MCP_CALL_TIMEOUT_SECONDS", "120"))
+MCP_INIT_TIMEOUT_SECONDS = float(os.environ.get("MCP_INIT_TIMEOUT_SECONDS", "60"))
+
+# Most calls accepted in one /call-tools batch
+GATEWAY_MAX_BATCH_CALLS = int(os.environ.get("GATEWAY_MAX_BATCH_CALLS", "25"))
+
+# Largest single JSON-RPC line we accept from a server (CloudFormation troubleshooting output can be big)
+MCP_STREAM_LIMIT_BYTES = int(os.environ.get("MCP_STREAM_LIMIT_BYTES", str(16 * 1024 * 1024)))
+
+SERVER_TYPES = ["ecs", "iac"]
+
+# Required in x-admin-token for admin endpoints when set
+GATEWAY_ADMIN_TOKEN = os.environ.get("GATEWAY_ADMIN_TOKEN")
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def pool_setting(name: str, server_type: str, default: str) -> str:
+    """Per-server override (e.g. MCP_POOL_MAX_WORKERS_IAC) falling back to the shared setting"""
+    return os.environ.get(f"{name}_{server_type.upper()}", os.environ.get(name, default))
+
+# Worker pool sizing - defaults scale with the container's vCPUs
+MCP_POOL_MIN_WORKERS = "1"
+MCP_POOL_MAX_WORKERS = str(available_cpus())
+# Initialized spares kept out of routing, promoted instantly when a worker dies or load rises
+MCP_POOL_STANDBY_WORKERS = "1"
+# Start another worker when even the least-busy one has this many requests in flight
+MCP_POOL_SCALE_UP_OUTSTANDING = int(os.environ.get("MCP_POOL_SCALE_UP_OUTSTANDING", "1"))
+MCP_POOL_IDLE_SECONDS = float(os.environ.get("MCP_POOL_IDLE_SECONDS", "300"))
+MCP_POOL_CHECK_SECONDS = float(os.environ.get("MCP_POOL_CHECK_SECONDS", "5"))
+
+# Admission control - per-server overrides work as for the pool settings
+# Requests one worker executes at once; the rest queue in the gateway
+MCP_WORKER_MAX_IN_FLIGHT = "8"
+# Waiting requests allowed per lane before new ones get 503
+MCP_QUEUE_MAX_DEPTH = "32"
+MCP_QUEUE_MAX_DEPTH_ADMIN = "16"
+# Reject with 429 when the expected queue wait is longer than this
+MCP_QUEUE_LATENCY_BUDGET_SECONDS = "30"
+
+# Native streamable-HTTP upstreams, e.g. MCP_HTTP_URL_ECS=http://ecs-mcp:8000/mcp
+# (servers started with MCP_TRANSPORT=http). A server type with a URL is called
+# over HTTP instead of through a stdio worker pool.
+def http_upstream_url(server_type: str) -> Optional[str]:
+    return os.environ.get(f"MCP_HTTP_URL_{server_type.upper()}") or None
+
+# Concurrent calls to one HTTP upstream; it scales out behind its own load balancer
+MCP_HTTP_MAX_IN_FLIGHT = "32"
+
 # Per-server state
-locks = {"ecs": asyncio.Lock(), "iac": asyncio.Lock()}
-req_ids = {"ecs": 0, "iac": 0}
-initialized = {"ecs": False, "iac": False}
-processes = {"ecs": None, "iac": None}
-stderr_tasks = {}
+req_ids = {server_type: 0 for server_type in SERVER_TYPES}
 
 class ListToolsRequest(BaseModel):
     server: str
@@ -28,134 +84,727 @@ class CallToolRequest(BaseModel):
     server: str
     tool: str
     params: Dict[str, Any]
+    timeout_seconds: Optional[float] = None
+
+class CallToolsRequest(BaseModel):
+    calls: List[CallToolRequest]
+    deadline_seconds: Optional[float] = None
+
+class CachePurgeRequest(BaseModel):
+    server: Optional[str] = None
+    tool: Optional[str] = None
+
+class McpServerExited(Exception):
+    """The MCP subprocess closed its stdout while requests were outstanding"""
 
 def next_id(server: str) -> int:
     req_ids[server] += 1
     return req_ids[server]
 
-async def drain_stderr(server_type: str, process):
+# Correlation id of the HTTP request being served, for tagging subprocess stderr
+current_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_correlation_id", default=None)
+# Priority lane from x-request-tier ("admin" or "user")
+current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("current_lane", default="user")
+# Queue-wait and execution ms for the tool call being served
+current_call_timing: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("current_call_timing", default=None)
+
+async def drain_stderr(worker: "McpWorker", process):
+    # Hand raw lines off; decoding, level filtering and printing happen on the log thread
     try:
         while True:
             line = await process.stderr.readline()
             if not line:
                 break
-            print(f"[{server_type} stderr] {line.decode().rstrip()}")
+            stderr_log.submit(worker.name, line, worker.correlation_ids())
     except Exception as e:
-        print(f"[{server_type} stderr drain error] {e}")
-
-async def start_mcp_server(server_type: str):
-    if processes[server_type] is not None:
-        # Check if existing process is still alive
-        if processes[server_type].returncode is None:
-            return processes[server_type]
-    
+        print(f"[{worker.name} stderr drain error] {e}")
+    finally:
+        # The process has exited or been stopped; names are never reused, so nothing more arrives
+        stderr_log.retire(worker.name)
+
+def server_command(server_type: str):
     env = os.environ.copy()
-    base_path = "/app"
-    
+    # Image layout by default; point elsewhere to run the gateway from a checkout
+    base_path = os.environ.get("MCP_APP_ROOT", "/app")
+
     # FIX: Point PYTHONPATH to the folders that DIRECTLY contain the 'awslabs' folder
     # For ECS: /app/ecs-mcp-server/
     # For IAC: /app/aws-iac-mcp-server/
     env["PYTHONPATH"] = f"{base_path}/ecs-mcp-server:{base_path}/aws-iac-mcp-server:{base_path}:" + env.get("PYTHONPATH", "")
-    
+    # Workers always speak stdio, whatever the container's MCP_TRANSPORT
+    env["MCP_TRANSPORT"] = "stdio"
+
     if server_type == "ecs":
         # Full module path: awslabs.ecs_mcp_server.main
         cmd = ["python", "-m", "awslabs.ecs_mcp_server.main"]
     elif server_type == "iac":
         # Use direct script execution with explicit PYTHONPATH
-        cmd = ["env", "PYTHONPATH=/app/aws-iac-mcp-server:/app", "python", "/app/aws-iac-mcp-server/awslabs/aws_iac_mcp_server/server.py"]
+        cmd = ["env", f"PYTHONPATH={base_path}/aws-iac-mcp-server:{base_path}", "python", f"{base_path}/aws-iac-mcp-server/awslabs/aws_iac_mcp_server/server.py"]
     else:
         raise ValueError(f"Unknown server type: {server_type}")
- 
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        env=env
+    return cmd, env
+
+def make_admission(server_type: str, slots) -> AdmissionController:
+    return AdmissionController(
+        server_type,
+        slots,
+        {
+            "admin": int(pool_setting("MCP_QUEUE_MAX_DEPTH_ADMIN", server_type, MCP_QUEUE_MAX_DEPTH_ADMIN)),
+            "user": int(pool_setting("MCP_QUEUE_MAX_DEPTH", server_type, MCP_QUEUE_MAX_DEPTH))
+        },
+        float(pool_setting("MCP_QUEUE_LATENCY_BUDGET_SECONDS", server_type, MCP_QUEUE_LATENCY_BUDGET_SECONDS))
     )
-    
-    processes[server_type] = process
-    stderr_tasks[server_type] = asyncio.create_task(drain_stderr(server_type, process))
-    print(f"[{server_type}] Started MCP server with PID {process.pid}")
-    return process
-
-async def ensure_initialized(server_type: str):
-    if initialized[server_type] and processes[server_type] and processes[server_type].returncode is None:
-        return
-    
-    initialized[server_type] = False
-    process = await start_mcp_server(server_type)
-    
-    init_id = next_id(server_type)
-    init_request = {
-        "jsonrpc": "2.0",
-        "id": init_id,
-        "method": "initialize",
-        "params": {
-            "protocolVersion": "0.1.0",
-            "capabilities": {"roots": {}, "sampling": {}},
-            "clientInfo": {"name": "mcp-gateway", "version": "1.0.0"}
+
+async def run_admitted(admission: AdmissionController, lane: str, timeout: float, execute):
+    """Wait for a slot in the caller's lane, then run execute(remaining timeout)"""
+    queue_wait = await admission.acquire(lane, timeout)
+    exec_start = time.time()
+    try:
+        return await execute(max(timeout - queue_wait, 0.001))
+    finally:
+        exec_seconds = time.time() - exec_start
+        admission.release(exec_seconds, lane)
+        timing = current_call_timing.get()
+        if timing is not None:
+            timing["queue_ms"] += int(queue_wait * 1000)
+            timing["exec_ms"] += int(exec_seconds * 1000)
+
+class McpWorker:
+    """
+    One stdio MCP subprocess with pipelined JSON-RPC.
+
+    A single reader task owns stdout and resolves waiting futures by response id,
+    so any number of requests can be in flight at once. Writers take a lock only
+    long enough to put one whole line on stdin. A request that times out or is
+    cancelled just stops waiting; its late response is read and dropped, so the
+    stream never falls out of step.
+    """
+
+    def __init__(self, server_type: str, index: int = 0, on_exit=None):
+        self.server_type = server_type
+        self.index = index
+        self.name = f"{server_type}#{index}"
+        self.on_exit = on_exit
+        self.stopping = False
+        self.last_active = time.time()
+        self.process = None
+        self.initialized = False
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.pending_correlation: Dict[int, str] = {}
+        self.write_lock = asyncio.Lock()
+        self.start_lock = asyncio.Lock()
+        self.reader_task = None
+        self.stderr_task = None
+        self.late_responses = 0
+        self.cold_start_ms = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None and self.reader_task is not None and not self.reader_task.done()
+
+    async def start(self):
+        cmd, env = server_command(self.server_type)
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            limit=MCP_STREAM_LIMIT_BYTES
+        )
+        self.process = process
+        self.initialized = False
+        self.stderr_task = asyncio.create_task(drain_stderr(self, process))
+        self.reader_task = asyncio.create_task(self._read_loop(process))
+        print(f"[{self.name}] Started MCP server with PID {process.pid}")
+
+    async def _read_loop(self, process):
+        error = None
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    response = json.loads(line.decode().strip())
+                except json.JSONDecodeError:
+                    # Servers occasionally log to stdout - skip anything that isn't JSON-RPC
+                    continue
+                if not isinstance(response, dict) or "id" not in response:
+                    continue
+                future = self.pending.pop(response["id"], None)
+                if future is None:
+                    # Caller already timed out or went away
+                    self.late_responses += 1
+                elif not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            error = e
+            print(f"[{self.name}] Reader error: {e}")
+        finally:
+            was_serving = self.initialized
+            self.initialized = False
+            exited = McpServerExited(f"[{self.name}] Process ended with {len(self.pending)} requests in flight" + (f": {error}" if error else ""))
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(exited)
+            self.pending.clear()
+            self.pending_correlation.clear()
+            # Startup failures surface to whoever is starting the worker instead
+            if was_serving and not self.stopping and self.on_exit:
+                self.on_exit(self)
+
+    def correlation_ids(self):
+        """Correlation ids of the requests in flight on this worker"""
+        return tuple(dict.fromkeys(self.pending_correlation.values()))
+
+    async def _write(self, message: dict):
+        data = (json.dumps(message) + "\n").encode()
+        async with self.write_lock:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+
+    async def _roundtrip(self, message: dict, timeout: float) -> dict:
+        request_id = message["id"]
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        correlation_id = current_correlation_id.get()
+        if correlation_id:
+            self.pending_correlation[request_id] = correlation_id
+        try:
+            await self._write(message)
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if self.pending.pop(request_id, None) is not None and self.alive:
+                # Best effort: let the server stop work nobody is waiting for
+                asyncio.create_task(self._notify_cancelled(request_id))
+            raise
+        finally:
+            self.pending.pop(request_id, None)
+            self.pending_correlation.pop(request_id, None)
+
+    async def _notify_cancelled(self, request_id: int):
+        try:
+            await self._write({
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {"requestId": request_id, "reason": "Gateway request timed out or was cancelled"}
+            })
+        except Exception:
+            pass
+
+    async def ensure_initialized(self):
+        if self.initialized and self.alive:
+            return
+        async with self.start_lock:
+            if self.initialized and self.alive:
+                return
+            start_time = time.time()
+            if not self.alive:
+                await self.start()
+
+            init_request = {
+                "jsonrpc": "2.0",
+                "id": next_id(self.server_type),
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "0.1.0",
+                    "capabilities": {"roots": {}, "sampling": {}},
+                    "clientInfo": {"name": "mcp-gateway", "version": "1.0.0"}
+                }
+            }
+            await self._roundtrip(init_request, MCP_INIT_TIMEOUT_SECONDS)
+            await self._write({"jsonrpc": "2.0", "method": "notifications/initialized", "params": {}})
+            self.initialized = True
+            # Spawn to handshake complete: interpreter start, imports and initialize
+            self.cold_start_ms = int((time.time() - start_time) * 1000)
+            print(f"[{self.name}] Initialized in {self.cold_start_ms}ms")
+
+    async def call(self, mcp_request: dict, timeout: float) -> dict:
+        await self.ensure_initialized()
+        self.last_active = time.time()
+        try:
+            return await self._roundtrip(mcp_request, timeout)
+        finally:
+            self.last_active = time.time()
+
+    async def stop(self):
+        """Terminate the subprocess; only called on idle workers or at shutdown"""
+        self.stopping = True
+        self.initialized = False
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in (self.reader_task, self.stderr_task):
+            if task:
+                try:
+                    await asyncio.wait_for(task, 5)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    task.cancel()
+        print(f"[{self.name}] Stopped")
+
+    def status(self) -> dict:
+        return {
+            "worker": self.name,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "initialized": self.initialized,
+            "cold_start_ms": self.cold_start_ms,
+            "in_flight": len(self.pending),
+            "late_responses": self.late_responses
         }
-    }
-    
-    process.stdin.write((json.dumps(init_request) + "\n").encode())
-    await process.stdin.drain()
-    
-    while True:
-        line = await process.stdout.readline()
-        if not line: raise Exception(f"[{server_type}] Process ended during init")
+
+class McpWorkerPool:
+    """
+    Initialized workers for one server type, routed by fewest requests in flight.
+
+    Ties go to the lowest-numbered worker so load concentrates and extra workers
+    go idle. Hot standbys are initialized but not routed: when a worker dies or
+    load rises, a standby is promoted at once and a replacement spare starts in
+    the background. A supervisor keeps the pool at its minimum and retires
+    workers that have been idle too long.
+    """
+
+    def __init__(self, server_type: str):
+        self.server_type = server_type
+        self.min_workers = int(pool_setting("MCP_POOL_MIN_WORKERS", server_type, MCP_POOL_MIN_WORKERS))
+        self.max_workers = max(self.min_workers, int(pool_setting("MCP_POOL_MAX_WORKERS", server_type, MCP_POOL_MAX_WORKERS)))
+        self.standby_target = int(pool_setting("MCP_POOL_STANDBY_WORKERS", server_type, MCP_POOL_STANDBY_WORKERS))
+        self.workers: List[McpWorker] = []
+        self.standby: List[McpWorker] = []
+        self.lock = asyncio.Lock()
+        self.next_index = 0
+        self.scale_task = None
+        self.supervisor_task = None
+        self.restarts = 0
+        self.promotions = 0
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.max_in_flight = int(pool_setting("MCP_WORKER_MAX_IN_FLIGHT", server_type, MCP_WORKER_MAX_IN_FLIGHT))
+        self.admission = make_admission(server_type, self.slots)
+
+    def ready_workers(self) -> List[McpWorker]:
+        return [worker for worker in self.workers if worker.initialized and worker.alive]
+
+    def slots(self) -> int:
+        """Requests that may execute at once across routed workers"""
+        return max(1, len(self.ready_workers())) * self.max_in_flight
+
+    def is_ready(self) -> bool:
+        return len(self.ready_workers()) >= self.min_workers
+
+    def pick(self) -> Optional[McpWorker]:
+        ready = self.ready_workers()
+        if not ready:
+            return None
+        return min(ready, key=lambda worker: (len(worker.pending), worker.index))
+
+    async def spawn(self, into: List[McpWorker]) -> McpWorker:
+        """Start a worker, counting it in `into` while it initializes"""
+        worker = McpWorker(self.server_type, self.next_index, on_exit=self.worker_exited)
+        self.next_index += 1
+        into.append(worker)
         try:
-            response = json.loads(line.decode().strip())
-            if response.get("id") == init_id: break
-        except json.JSONDecodeError: continue
-    
-    process.stdin.write((json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized", "params": {}}) + "\n").encode())
-    await process.stdin.drain()
-    initialized[server_type] = True
-
-async def call_mcp_server(server_type: str, mcp_request: dict):
-    async with locks[server_type]:
-        await ensure_initialized(server_type)
-        process = processes[server_type]
-        request_id = mcp_request["id"]
-        
+            await worker.ensure_initialized()
+        except BaseException:
+            if worker in into:
+                into.remove(worker)
+            await worker.stop()
+            raise
+        return worker
+
+    def promote_standby(self) -> Optional[McpWorker]:
+        for worker in self.standby:
+            if worker.initialized and worker.alive:
+                self.standby.remove(worker)
+                self.workers.append(worker)
+                self.promotions += 1
+                print(f"[{worker.name}] Promoted from standby")
+                self.admission.dispatch()
+                return worker
+        return None
+
+    def worker_exited(self, worker: McpWorker):
+        """Reader saw EOF on a worker we didn't stop - swap in a standby, refill in background"""
+        print(f"[{worker.name}] Exited unexpectedly")
+        self.restarts += 1
+        if worker in self.workers:
+            self.workers.remove(worker)
+            if len(self.workers) < self.min_workers:
+                self.promote_standby()
+        elif worker in self.standby:
+            self.standby.remove(worker)
+        asyncio.create_task(self.top_up())
+
+    async def top_up(self):
+        """Bring routed workers up to the minimum and refill the hot standbys"""
+        async with self.lock:
+            while len(self.workers) < self.min_workers and self.promote_standby():
+                pass
+            starts = [self.spawn(self.workers) for _ in range(self.min_workers - len(self.workers))]
+            starts += [self.spawn(self.standby) for _ in range(self.standby_target - len(self.standby))]
+            for result in await asyncio.gather(*starts, return_exceptions=True):
+                if isinstance(result, BaseException):
+                    print(f"[{self.server_type}] Worker start failed: {result}")
+        self.admission.dispatch()
+
+    async def warm(self):
+        """Start and initialize the minimum workers plus standbys before serving"""
+        start_time = time.time()
+        await self.top_up()
+        print(f"[{self.server_type}] Warm: {len(self.ready_workers())} workers + {len(self.standby)} standby in {int((time.time() - start_time) * 1000)}ms")
+
+    async def scale_up(self):
         try:
-            process.stdin.write((json.dumps(mcp_request) + "\n").encode())
-            await process.stdin.drain()
-        except RuntimeError:
-            # Catch closed transport here to prevent crash
-            initialized[server_type] = False
-            raise HTTPException(status_code=500, detail="Server transport closed")
-        
+            if self.promote_standby():
+                await self.top_up()
+            else:
+                await self.spawn(self.workers)
+            self.scale_ups += 1
+            print(f"[{self.server_type}] Scaled up to {len(self.workers)} workers")
+        except Exception as e:
+            print(f"[{self.server_type}] Scale-up failed: {e}")
+        self.admission.dispatch()
+
+    def maybe_scale_up(self, busy: bool):
+        # Serve this request now; the new worker picks up later ones
+        if busy and len(self.workers) < self.max_workers and (self.scale_task is None or self.scale_task.done()):
+            self.scale_task = asyncio.create_task(self.scale_up())
+
+    async def scale_down_idle(self):
+        ready = self.ready_workers()
+        now = time.time()
+        # Newest workers go first; never drop below the minimum
+        for worker in sorted(ready, key=lambda w: w.index, reverse=True):
+            if len(self.workers) <= self.min_workers:
+                break
+            if not worker.pending and now - worker.last_active > MCP_POOL_IDLE_SECONDS:
+                # Out of the routing set before the first await, so nothing new lands on it
+                self.workers.remove(worker)
+                self.scale_downs += 1
+                print(f"[{worker.name}] Idle for {int(now - worker.last_active)}s, scaling down to {len(self.workers)} workers")
+                if len(self.standby) < self.standby_target:
+                    self.standby.append(worker)
+                else:
+                    await worker.stop()
+
+    async def supervise(self):
         while True:
-            line = await process.stdout.readline()
-            if not line: raise Exception(f"[{server_type}] Process ended during call")
+            await asyncio.sleep(MCP_POOL_CHECK_SECONDS)
             try:
-                response = json.loads(line.decode().strip())
-                if response.get("id") == request_id: return response
-            except json.JSONDecodeError: continue
+                for group in (self.workers, self.standby):
+                    for worker in [w for w in group if w.process is not None and w.process.returncode is not None]:
+                        group.remove(worker)
+                        self.restarts += 1
+                await self.top_up()
+                await self.scale_down_idle()
+            except Exception as e:
+                print(f"[{self.server_type}] Supervisor error: {e}")
+
+    def start(self):
+        if self.supervisor_task is None or self.supervisor_task.done():
+            self.supervisor_task = asyncio.create_task(self.supervise())
+
+    async def stop(self):
+        if self.supervisor_task:
+            self.supervisor_task.cancel()
+        workers = self.workers + self.standby
+        self.workers, self.standby = [], []
+        await asyncio.gather(*(worker.stop() for worker in workers), return_exceptions=True)
+
+    async def acquire(self) -> McpWorker:
+        worker = self.pick()
+        if worker is None:
+            # Nothing initialized (every worker crashed and no standby was ready)
+            async with self.lock:
+                worker = self.pick() or self.promote_standby()
+                if worker is None:
+                    worker = await self.spawn(self.workers)
+        else:
+            self.maybe_scale_up(len(worker.pending) >= MCP_POOL_SCALE_UP_OUTSTANDING)
+        return worker
+
+    async def call(self, mcp_request: dict, timeout: float, lane: str = "user") -> dict:
+        """Queue for an execution slot in the caller's lane, then run on the least-busy worker"""
+        self.maybe_scale_up(self.admission.active >= self.slots())
+
+        async def execute(remaining: float) -> dict:
+            worker = await self.acquire()
+            return await worker.call(mcp_request, remaining)
+
+        return await run_admitted(self.admission, lane, timeout, execute)
+
+    def status(self) -> dict:
+        cold_starts = [w.cold_start_ms for w in self.workers + self.standby if w.cold_start_ms is not None]
+        return {
+            "transport": "stdio",
+            "ready": self.is_ready(),
+            "workers": [worker.status() for worker in self.workers],
+            "standby": [worker.status() for worker in self.standby],
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "standby_target": self.standby_target,
+            "in_flight": sum(len(worker.pending) for worker in self.workers),
+            "cold_start_ms": {"max": max(cold_starts), "min": min(cold_starts)} if cold_starts else None,
+            "admission": self.admission.status(),
+            "restarts": self.restarts,
+            "promotions": self.promotions,
+            "scale_ups": self.scale_ups,
+            "scale_downs": self.scale_downs
+        }
+
+def parse_http_response(response: httpx.Response, request_id: int) -> dict:
+    """JSON-RPC response from a plain JSON or an SSE-framed streamable-HTTP reply"""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                message = json.loads(line[5:].strip())
+                if isinstance(message, dict) and message.get("id") == request_id:
+                    return message
+        raise McpServerExited(f"No response for request {request_id} in event stream")
+    message = response.json()
+    if isinstance(message, list):
+        message = next((m for m in message if m.get("id") == request_id), None)
+    if not isinstance(message, dict):
+        raise McpServerExited(f"No response for request {request_id}")
+    return message
+
+class McpHttpUpstream:
+    """
+    An MCP server running its own streamable-HTTP transport.
+
+    JSON-RPC messages are posted as-is over pooled keep-alive connections, with
+    no stdio bridge in between. Stateless servers (the default) let the URL be
+    a load balancer in front of any number of replicas; for stateful ones the
+    session id is kept and renewed. Calls share the same admission control as
+    the stdio pools.
+    """
+
+    def __init__(self, server_type: str, url: str):
+        self.server_type = server_type
+        self.url = url
+        self.max_in_flight = int(pool_setting("MCP_HTTP_MAX_IN_FLIGHT", server_type, MCP_HTTP_MAX_IN_FLIGHT))
+        self.admission = make_admission(server_type, lambda: self.max_in_flight)
+        self.client: Optional[httpx.AsyncClient] = None
+        self.session_id = None
+        self.ready = False
+        self.supervisor_task = None
+        self.calls = 0
+        self.errors = 0
+        self.last_error = None
+
+    def is_ready(self) -> bool:
+        return self.ready
+
+    async def _post(self, message: dict, timeout: float) -> Optional[dict]:
+        if self.client is None:
+            limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+            self.client = httpx.AsyncClient(limits=limits)
+        headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+        if self.session_id:
+            headers["mcp-session-id"] = self.session_id
+        correlation_id = current_correlation_id.get()
+        if correlation_id:
+            headers["x-correlation-id"] = correlation_id
+        try:
+            response = await self.client.post(self.url, json=message, headers=headers, timeout=timeout)
+            if response.status_code == 404 and self.session_id and message.get("method") != "initialize":
+                # Stateful server restarted or expired our session: start a new one and retry once
+                await self.initialize()
+                headers["mcp-session-id"] = self.session_id
+                response = await self.client.post(self.url, json=message, headers=headers, timeout=timeout)
+        except httpx.TimeoutException:
+            raise asyncio.TimeoutError()
+        except httpx.TransportError as e:
+            self.ready = False
+            raise McpServerExited(f"[{self.server_type}] {self.url} unreachable: {e}")
+        if response.status_code >= 400:
+            raise McpServerExited(f"[{self.server_type}] {self.url} returned HTTP {response.status_code}: {response.text[:200]}")
+        if response.headers.get("mcp-session-id"):
+            self.session_id = response.headers["mcp-session-id"]
+        if "id" not in message:
+            return None
+        return parse_http_response(response, message["id"])
+
+    async def initialize(self):
+        self.session_id = None
+        await self._post({
+            "jsonrpc": "2.0",
+            "id": next_id(self.server_type),
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-gateway", "version": "1.0.0"}
+            }
+        }, MCP_INIT_TIMEOUT_SECONDS)
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized", "params": {}}, MCP_INIT_TIMEOUT_SECONDS)
+        self.ready = True
+
+    async def warm(self):
+        start_time = time.time()
+        try:
+            await self.initialize()
+            print(f"[{self.server_type}] HTTP upstream {self.url} ready in {int((time.time() - start_time) * 1000)}ms")
+        except Exception as e:
+            # Not fatal: /ready stays 503 and the supervisor keeps trying
+            self.last_error = str(e)
+            print(f"[{self.server_type}] HTTP upstream {self.url} not ready: {e}")
+
+    async def supervise(self):
+        while True:
+            await asyncio.sleep(MCP_POOL_CHECK_SECONDS)
+            if not self.ready:
+                await self.warm()
+
+    def start(self):
+        if self.supervisor_task is None or self.supervisor_task.done():
+            self.supervisor_task = asyncio.create_task(self.supervise())
+
+    async def stop(self):
+        if self.supervisor_task:
+            self.supervisor_task.cancel()
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def call(self, mcp_request: dict, timeout: float, lane: str = "user") -> dict:
+        async def execute(remaining: float) -> dict:
+            self.calls += 1
+            try:
+                return await self._post(mcp_request, remaining)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e) or type(e).__name__
+                raise
+
+        return await run_admitted(self.admission, lane, timeout, execute)
+
+    def status(self) -> dict:
+        return {
+            "transport": "http",
+            "url": self.url,
+            "ready": self.ready,
+            "in_flight": self.admission.active,
+            "admission": self.admission.status(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
+
+def make_pool(server_type: str) -> Union[McpWorkerPool, McpHttpUpstream]:
+    url = http_upstream_url(server_type)
+    return McpHttpUpstream(server_type, url) if url else McpWorkerPool(server_type)
+
+pools: Dict[str, Union[McpWorkerPool, McpHttpUpstream]] = {server_type: make_pool(server_type) for server_type in SERVER_TYPES}
+
+startup_ms = None
+
+@app.on_event("startup")
+async def startup_event():
+    # Pay interpreter start, imports and the MCP handshake before taking traffic
+    global startup_ms
+    start_time = time.time()
+    await asyncio.gather(*(pool.warm() for pool in pools.values()))
+    startup_ms = int((time.time() - start_time) * 1000)
+    print(f"[gateway] Worker pools warm in {startup_ms}ms")
+    for pool in pools.values():
+        pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await asyncio.gather(*(pool.stop() for pool in pools.values()))
+    stderr_log.close()
+
+async def call_mcp_server(server_type: str, mcp_request: dict, timeout: Optional[float] = None):
+    pool = pools.get(server_type)
+    if pool is None:
+        raise HTTPException(status_code=400, detail=f"Unknown server type: {server_type}")
+
+    timeout = timeout or MCP_CALL_TIMEOUT_SECONDS
+    try:
+        return await pool.call(mcp_request, timeout, current_lane.get())
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"[{server_type}] Request {mcp_request['id']} timed out after {timeout}s")
+    except McpServerExited as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except (RuntimeError, ConnectionError) as e:
+        # Catch closed transport here to prevent crash
+        raise HTTPException(status_code=500, detail=f"Server transport closed: {e}")
 
 @app.get("/health")
 async def health_check():
-    return {"ok": True}
+    return {
+        "ok": True,
+        "startup_ms": startup_ms,
+        "servers": {server_type: pool.status() for server_type, pool in pools.items()}
+    }
+
+@app.get("/ready")
+async def ready_check():
+    """Succeeds once every stdio pool has its minimum workers initialized and every HTTP upstream answered initialize"""
+    not_ready = [server_type for server_type, pool in pools.items() if not pool.is_ready()]
+    if not_ready:
+        raise HTTPException(status_code=503, detail=f"MCP servers not ready: {', '.join(not_ready)}")
+    return {"ready": True}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Per-tool hit/miss/bypass counts and hit ratios"""
+    return result_cache.stats()
+
+@app.post("/admin/cache/purge")
+async def purge_cache(request: CachePurgeRequest, x_admin_token: Optional[str] = Header(default=None)):
+    if GATEWAY_ADMIN_TOKEN and x_admin_token != GATEWAY_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    purged = result_cache.purge(request.server, request.tool)
+    print(f"[cache] Purged {purged} entries (server={request.server}, tool={request.tool})")
+    return {"purged": purged}
+
+@app.get("/debug/stderr")
+async def debug_stderr(
+    worker: Optional[str] = None,
+    level: Optional[str] = None,
+    correlation_id: Optional[str] = None,
+    limit: int = 100,
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """Recent subprocess stderr per worker; worker may be a name (ecs#0) or a server type"""
+    if GATEWAY_ADMIN_TOKEN and x_admin_token != GATEWAY_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return stderr_log.tail(worker, level, correlation_id, limit)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus counters for the result cache and admission control"""
+    body = result_cache.render_metrics() + render_admission_metrics([pool.admission for pool in pools.values()])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+def build_mcp_request(request: CallToolRequest) -> dict:
+    if request.server not in pools:
+        raise HTTPException(status_code=400, detail=f"Unknown server type: {request.server}")
 
-@app.post("/call-tool")
-async def call_tool(request: CallToolRequest):
     # Handle wrapper tools (ecs_call_tool, iac_call_tool)
     if request.tool in ["ecs_call_tool", "iac_call_tool"]:
         # Extract actual tool name from params
         actual_tool = request.params.get("tool")
         if not actual_tool:
             raise HTTPException(status_code=400, detail="Missing 'tool' parameter in wrapper call")
-        
+
         # Flatten nested params structure - if params.params exists, use it directly
         if "params" in request.params:
             tool_params = request.params["params"]
         else:
             tool_params = request.params.copy()
             tool_params.pop("tool", None)  # Remove the tool name from params
-        
-        mcp_request = {
+
+        return {
             "jsonrpc": "2.0",
             "id": next_id(request.server),
             "method": "tools/call",
@@ -164,19 +813,100 @@ async def call_tool(request: CallToolRequest):
                 "arguments": tool_params
             }
         }
-    else:
-        # Standard MCP tool call structure
-        mcp_request = {
-            "jsonrpc": "2.0",
-            "id": next_id(request.server),
-            "method": "tools/call",
-            "params": {
-                "name": request.tool,
-                "arguments": request.params
-            }
+
+    # Standard MCP tool call structure
+    return {
+        "jsonrpc": "2.0",
+        "id": next_id(request.server),
+        "method": "tools/call",
+        "params": {
+            "name": request.tool,
+            "arguments": request.params
         }
-    
-    return await call_mcp_server(request.server, mcp_request)
+    }
+
+async def run_tool_call(request: CallToolRequest, timeout: Optional[float] = None):
+    """Run one call, returning (JSON-RPC response, cache status, queue/exec timing)"""
+    mcp_request = build_mcp_request(request)
+    timing = {"queue_ms": 0, "exec_ms": 0}
+    current_call_timing.set(timing)
+
+    # Read-only calls may be served from cache; writes always reach the subprocess
+    result, cache_status = await result_cache.get_or_call(
+        request.server,
+        mcp_request["params"]["name"],
+        mcp_request["params"]["arguments"],
+        lambda: call_mcp_server(request.server, mcp_request, timeout or request.timeout_seconds)
+    )
+    return {**result, "id": mcp_request["id"]}, cache_status, timing
+
+def set_request_context(correlation_id: Optional[str], tier: Optional[str]):
+    current_correlation_id.set(correlation_id)
+    current_lane.set("admin" if tier == "admin" else "user")
+
+@app.post("/call-tool")
+async def call_tool(
+    request: CallToolRequest,
+    response: Response,
+    x_correlation_id: Optional[str] = Header(default=None),
+    x_request_tier: Optional[str] = Header(default=None)
+):
+    set_request_context(x_correlation_id, x_request_tier)
+    result, cache_status, timing = await run_tool_call(request)
+    response.headers["x-cache"] = cache_status
+    response.headers["x-queue-ms"] = str(timing["queue_ms"])
+    response.headers["x-exec-ms"] = str(timing["exec_ms"])
+    return result
+
+@app.post("/call-tools")
+async def call_tools(
+    request: CallToolsRequest,
+    x_correlation_id: Optional[str] = Header(default=None),
+    x_request_tier: Optional[str] = Header(default=None)
+):
+    """
+    Run several tool calls concurrently across the worker pools.
+
+    Results come back in request order, each either {"ok": true, "result": ...}
+    or {"ok": false, "error": {"status", "detail"}}, with queue_ms/exec_ms for
+    executed calls and retry_after for admission rejections. Calls still
+    running at the overall deadline are cancelled and reported as 504.
+    """
+    if len(request.calls) > GATEWAY_MAX_BATCH_CALLS:
+        raise HTTPException(status_code=400, detail=f"Batch of {len(request.calls)} calls exceeds the limit of {GATEWAY_MAX_BATCH_CALLS}")
+
+    set_request_context(x_correlation_id, x_request_tier)
+    deadline = request.deadline_seconds or MCP_CALL_TIMEOUT_SECONDS
+    start_time = time.time()
+
+    async def run_item(index: int, call: CallToolRequest) -> dict:
+        item_start = time.time()
+        timeout = min(call.timeout_seconds or deadline, deadline)
+        try:
+            result, cache_status, timing = await run_tool_call(call, timeout)
+            item = {"ok": True, "result": result, "cache": cache_status, **timing}
+        except HTTPException as e:
+            item = {"ok": False, "error": {"status": e.status_code, "detail": e.detail}}
+            if e.headers and "Retry-After" in e.headers:
+                item["error"]["retry_after"] = int(e.headers["Retry-After"])
+        except Exception as e:
+            item = {"ok": False, "error": {"status": 500, "detail": str(e)}}
+        return {"index": index, **item, "ms": int((time.time() - item_start) * 1000)}
+
+    tasks = [asyncio.ensure_future(run_item(index, call)) for index, call in enumerate(request.calls)]
+    if tasks:
+        _, not_done = await asyncio.wait(tasks, timeout=deadline)
+        for task in not_done:
+            task.cancel()
+
+    results = []
+    for index, task in enumerate(tasks):
+        if task.done() and not task.cancelled():
+            results.append(task.result())
+        else:
+            results.append({"index": index, "ok": False, "error": {"status": 504, "detail": f"Batch deadline of {deadline}s exceeded"}})
+
+    return {"results": results, "total_ms": int((time.time() - start_time) * 1000)}
 
 if __name__ == "__main__":
     import uvicorn
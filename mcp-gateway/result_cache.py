@@ -0,0 +1,154 @@
+"""
+Result cache for idempotent read-only ECS/IaC tool calls in the MCP gateway
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from platform_aws_context.tool_results import is_error_response
+
+GATEWAY_CACHE_ENABLED = os.environ.get("GATEWAY_CACHE_ENABLED", "true").lower() == "true"
+GATEWAY_CACHE_MAX_ENTRIES = int(os.environ.get("GATEWAY_CACHE_MAX_ENTRIES", "2000"))
+
+# TTL in seconds per (server, tool). Anything not listed always reaches the subprocess.
+TOOL_TTLS = {
+    ("ecs", "ecs_resource_management"): 30,        # Describe*/List* only, see is_read_only
+    ("ecs", "get_deployment_status"): 15,
+    ("ecs", "ecs_troubleshooting_tool"): 30,
+    ("iac", "troubleshoot_cloudformation_deployment"): 120,
+    # Pure functions of their input
+    ("iac", "validate_cloudformation_template"): 3600,
+    ("iac", "check_cloudformation_template_compliance"): 3600,
+    ("iac", "get_cloudformation_pre_deploy_validation_instructions"): 3600,
+    ("iac", "search_cdk_documentation"): 3600,
+    ("iac", "search_cloudformation_documentation"): 3600,
+    ("iac", "search_cdk_samples_and_constructs"): 3600,
+    ("iac", "cdk_best_practices"): 3600
+}
+
+READ_ONLY_ECS_PREFIXES = ("Describe", "List")
+
+# Request-tracking fields that don't change the result (identity only names the STS session)
+IGNORED_ARGUMENTS = ("_metadata",)
+
+
+def is_read_only(server: str, tool: str, arguments: Dict[str, Any]) -> bool:
+    if (server, tool) not in TOOL_TTLS:
+        return False
+    if tool == "ecs_resource_management":
+        return str(arguments.get("api_operation", "")).startswith(READ_ONLY_ECS_PREFIXES)
+    return True
+
+
+def make_key(server: str, tool: str, arguments: Dict[str, Any]) -> str:
+    """Server, tool and canonical arguments - account_id and region included"""
+    canonical = {k: v for k, v in arguments.items() if k not in IGNORED_ARGUMENTS}
+    payload = json.dumps({"server": server, "tool": tool, "arguments": canonical}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable_response(response: Any) -> bool:
+    # Throttling, AccessDenied or a missing stack often come back in-band with isError false
+    return isinstance(response, dict) and isinstance(response.get("result"), dict) and not is_error_response(response)
+
+
+class GatewayResultCache:
+    """
+    LRU of JSON-RPC responses with per-tool TTLs
+
+    Identical calls that arrive while one is in flight share its result. The
+    shared call runs as its own task, so one caller disconnecting doesn't fail
+    the others.
+    """
+
+    def __init__(self, max_entries: int = GATEWAY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, str, dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def _count(self, server: str, tool: str, outcome: str):
+        counters = self._counters.setdefault((server, tool), {"hit": 0, "coalesced": 0, "miss": 0, "bypass": 0})
+        counters[outcome] += 1
+
+    def _store(self, key: str, server: str, tool: str, ttl: int, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        response = task.result()
+        if not is_cacheable_response(response):
+            return
+        self._entries[key] = (time.time() + ttl, server, tool, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_call(self, server: str, tool: str, arguments: Dict[str, Any], call: Callable[[], Awaitable[dict]]) -> Tuple[dict, str]:
+        """Return (response, cache status)"""
+        if not GATEWAY_CACHE_ENABLED or not is_read_only(server, tool, arguments):
+            self._count(server, tool, "bypass")
+            return await call(), "bypass"
+
+        key = make_key(server, tool, arguments)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._count(server, tool, "hit")
+                return entry[3], "hit"
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(server, tool, "coalesced")
+            status = "coalesced"
+        else:
+            self._count(server, tool, "miss")
+            status = "miss"
+            ttl = TOOL_TTLS[(server, tool)]
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._store(key, server, tool, ttl, t))
+        return await asyncio.shield(task), status
+
+    def purge(self, server: Optional[str] = None, tool: Optional[str] = None) -> int:
+        """Drop entries, optionally only for one server and/or tool"""
+        doomed = [
+            key for key, (_, entry_server, entry_tool, _) in self._entries.items()
+            if (server is None or entry_server == server) and (tool is None or entry_tool == tool)
+        ]
+        for key in doomed:
+            del self._entries[key]
+        return len(doomed)
+
+    def stats(self) -> dict:
+        tools = {}
+        for (server, tool), counters in sorted(self._counters.items()):
+            lookups = counters["hit"] + counters["coalesced"] + counters["miss"]
+            tools[f"{server}/{tool}"] = {
+                **counters,
+                "hit_ratio": round((counters["hit"] + counters["coalesced"]) / lookups, 3) if lookups else None
+            }
+        return {"enabled": GATEWAY_CACHE_ENABLED, "entries": len(self._entries), "inflight": len(self._inflight), "tools": tools}
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP gateway_cache_requests_total Tool calls by cache outcome",
+            "# TYPE gateway_cache_requests_total counter"
+        ]
+        for (server, tool), counters in sorted(self._counters.items()):
+            for outcome, count in counters.items():
+                lines.append(f'gateway_cache_requests_total{{server="{server}",tool="{tool}",outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP gateway_cache_entries Cached tool results",
+            "# TYPE gateway_cache_entries gauge",
+            f"gateway_cache_entries {len(self._entries)}"
+        ]
+        return "\n".join(lines) + "\n"
+
+
+result_cache = GatewayResultCache()
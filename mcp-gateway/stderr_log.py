@@ -0,0 +1,180 @@
+"""
+Bounded, level-filtered capture of MCP subprocess stderr
+
+The event loop only timestamps raw stderr lines and hands them to a queue.
+A single background thread decodes them, works out the level, keeps the last
+lines per worker in a ring buffer and forwards WARNING and above to stdout
+under a per-worker rate limit. Buffers of exited workers are kept for the
+last few only, so worker churn doesn't grow memory.
+"""
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+GATEWAY_STDERR_BUFFER_LINES = int(os.environ.get("GATEWAY_STDERR_BUFFER_LINES", "500"))
+# Lowest level forwarded to the gateway's stdout; everything stays in the buffer
+GATEWAY_STDERR_LEVEL = os.environ.get("GATEWAY_STDERR_LEVEL", "WARNING").upper()
+# Forwarded lines per second per worker; the excess is counted and summarised
+GATEWAY_STDERR_RATE = float(os.environ.get("GATEWAY_STDERR_RATE", "20"))
+# Lines waiting for the log thread; beyond this they're dropped, not buffered
+GATEWAY_STDERR_QUEUE_LINES = int(os.environ.get("GATEWAY_STDERR_QUEUE_LINES", "10000"))
+# Exited workers whose buffers stay readable (e.g. for a crash's traceback); older ones are dropped
+GATEWAY_STDERR_RETIRED_WORKERS = int(os.environ.get("GATEWAY_STDERR_RETIRED_WORKERS", "5"))
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+LEVEL_ALIASES = {"WARN": "WARNING", "FATAL": "CRITICAL", "TRACE": "DEBUG", "SUCCESS": "INFO"}
+LEVEL_PATTERN = re.compile(r"\b(TRACE|DEBUG|INFO|SUCCESS|WARNING|WARN|ERROR|CRITICAL|FATAL)\b")
+
+
+def level_number(level: Optional[str]) -> int:
+    level = (level or "DEBUG").upper()
+    return LEVELS.get(LEVEL_ALIASES.get(level, level), LEVELS["DEBUG"])
+
+
+def detect_level(text: str, previous: str) -> str:
+    """Level named in the line; tracebacks are errors and unmarked lines continue the previous one"""
+    if text.startswith("Traceback"):
+        return "ERROR"
+    match = LEVEL_PATTERN.search(text[:120])
+    if match:
+        level = match.group(1)
+        return LEVEL_ALIASES.get(level, level)
+    return previous
+
+
+class WorkerLog:
+    """Ring buffer and forwarding state for one worker"""
+
+    def __init__(self, max_lines: int):
+        self.lines: Deque[dict] = deque(maxlen=max_lines)
+        self.last_level = "INFO"
+        self.window_start = 0.0
+        self.window_count = 0
+        self.suppressed = 0
+        self.total = 0
+
+
+class StderrLog:
+    def __init__(
+        self,
+        max_lines: int = GATEWAY_STDERR_BUFFER_LINES,
+        forward_level: str = GATEWAY_STDERR_LEVEL,
+        rate: float = GATEWAY_STDERR_RATE,
+        max_retired: int = GATEWAY_STDERR_RETIRED_WORKERS
+    ):
+        self.max_lines = max_lines
+        self.forward_level = level_number(forward_level)
+        self.rate = rate
+        self.max_retired = max_retired
+        self.dropped = 0
+        self._workers: Dict[str, WorkerLog] = {}
+        # Exited workers still buffered, oldest first
+        self._retired: "OrderedDict[str, None]" = OrderedDict()
+        self._queue: "queue.Queue[Optional[Tuple[float, str, Optional[bytes], Tuple[str, ...]]]]" = queue.Queue(maxsize=GATEWAY_STDERR_QUEUE_LINES)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="stderr-log", daemon=True)
+        self._thread.start()
+
+    def submit(self, worker: str, line: bytes, correlation_ids: Tuple[str, ...] = ()):
+        """Called on the event loop: no decoding or formatting, never blocks"""
+        try:
+            self._queue.put_nowait((time.time(), worker, line, correlation_ids))
+        except queue.Full:
+            self.dropped += 1
+
+    def retire(self, worker: str):
+        """
+        Called on the event loop once the worker's stderr has closed. Queued
+        behind its last lines, so they still land in its buffer.
+        """
+        try:
+            self._queue.put_nowait((time.time(), worker, None, ()))
+        except queue.Full:
+            self._retire(worker)
+
+    def _retire(self, worker: str):
+        # Keep the buffer among the last max_retired exited workers, drop older ones
+        with self._lock:
+            self._retired[worker] = None
+            while len(self._retired) > self.max_retired:
+                name, _ = self._retired.popitem(last=False)
+                self._workers.pop(name, None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                if item[2] is None:
+                    self._retire(item[1])
+                else:
+                    self._record(*item)
+            except Exception as e:
+                print(f"[stderr-log] Failed to record line: {e}")
+
+    def _record(self, timestamp: float, worker: str, line: bytes, correlation_ids: Tuple[str, ...]):
+        text = line.decode(errors="replace").rstrip()
+        if not text:
+            return
+        with self._lock:
+            log = self._workers.get(worker)
+            if log is None:
+                log = self._workers[worker] = WorkerLog(self.max_lines)
+            level = detect_level(text, log.last_level)
+            log.last_level = level
+            log.total += 1
+            log.lines.append({"ts": timestamp, "level": level, "correlation_ids": list(correlation_ids), "line": text})
+            forward, suppressed = self._admit(log, timestamp) if level_number(level) >= self.forward_level else (False, 0)
+
+        if suppressed:
+            print(f"[{worker} stderr] {suppressed} lines suppressed by rate limit")
+        if forward:
+            tag = f" [{','.join(correlation_ids)}]" if correlation_ids else ""
+            print(f"[{worker} stderr]{tag} {text}")
+
+    def _admit(self, log: WorkerLog, timestamp: float) -> Tuple[bool, int]:
+        """Fixed one-second window; returns (forward this line, suppressed count to report)"""
+        reported = 0
+        if timestamp - log.window_start >= 1:
+            reported, log.suppressed = log.suppressed, 0
+            log.window_start = timestamp
+            log.window_count = 0
+        if log.window_count >= self.rate:
+            log.suppressed += 1
+            return False, reported
+        log.window_count += 1
+        return True, reported
+
+    def tail(self, worker: Optional[str] = None, level: Optional[str] = None, correlation_id: Optional[str] = None, limit: int = 100) -> dict:
+        """Most recent buffered lines, oldest first, per worker"""
+        minimum = level_number(level)
+        out = {}
+        with self._lock:
+            for name, log in sorted(self._workers.items()):
+                if worker and name != worker and name.split("#")[0] != worker:
+                    continue
+                lines = [
+                    entry for entry in log.lines
+                    if level_number(entry["level"]) >= minimum and (correlation_id is None or correlation_id in entry["correlation_ids"])
+                ]
+                out[name] = {
+                    "total": log.total,
+                    "buffered": len(log.lines),
+                    "retired": name in self._retired,
+                    "lines": lines[-limit:] if limit > 0 else []
+                }
+        return {"dropped": self.dropped, "workers": out}
+
+    def close(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+stderr_log = StderrLog()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The gateway's modules are top-level scripts, copied flat into /app by the Dockerfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
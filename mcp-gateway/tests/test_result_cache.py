@@ -0,0 +1,42 @@
+"""Tests for which gateway responses may be cached."""
+
+import json
+
+import pytest
+
+from result_cache import is_cacheable_response
+
+
+def tool_response(payload, structured=True, is_error=False):
+    result = {"content": [{"type": "text", "text": json.dumps(payload, indent=2)}], "isError": is_error}
+    if structured:
+        result["structuredContent"] = payload
+    return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+def test_successful_result_is_cacheable():
+    assert is_cacheable_response(tool_response({"status": "success", "clusters": ["prod"]}))
+    # Tools that carry an empty error field on success
+    assert is_cacheable_response(tool_response({"image": "nginx", "exists": "true", "error": None}))
+
+
+@pytest.mark.parametrize("payload", [
+    {"error": "An error occurred (ThrottlingException) when calling the DescribeServices operation", "status": "failed"},
+    {"status": "error", "error": "Stack with id demo does not exist"},
+    {"error": "AccessDenied when assuming McpReadOnlyRole"},
+    {"status": "failed"},
+])
+@pytest.mark.parametrize("structured", [True, False])
+def test_in_band_tool_errors_are_not_cacheable(payload, structured):
+    assert not is_cacheable_response(tool_response(payload, structured=structured))
+
+
+def test_protocol_errors_are_not_cacheable():
+    assert not is_cacheable_response({"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "boom"}})
+    assert not is_cacheable_response(tool_response({"clusters": []}, is_error=True))
+    assert not is_cacheable_response({"jsonrpc": "2.0", "id": 1})
+
+
+def test_plain_text_result_is_cacheable():
+    response = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": "# CDK best practices"}], "isError": False}}
+    assert is_cacheable_response(response)
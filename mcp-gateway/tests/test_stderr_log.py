@@ -0,0 +1,35 @@
+"""Tests for the per-worker stderr buffers."""
+
+from stderr_log import StderrLog
+
+
+def drain(log):
+    """Stop the log thread once everything queued so far is recorded"""
+    log.close()
+    log._thread.join(5)
+
+
+def test_only_the_last_retired_workers_stay_buffered():
+    log = StderrLog(forward_level="CRITICAL", max_retired=2)
+    for index in range(5):
+        log.submit(f"ecs#{index}", b"ERROR worker crashed\n")
+        log.retire(f"ecs#{index}")
+    log.submit("ecs#5", b"INFO serving\n")
+    drain(log)
+
+    workers = log.tail()["workers"]
+    assert sorted(workers) == ["ecs#3", "ecs#4", "ecs#5"]
+    assert workers["ecs#4"]["retired"] and not workers["ecs#5"]["retired"]
+    assert workers["ecs#4"]["lines"][0]["line"] == "ERROR worker crashed"
+
+
+def test_lines_queued_before_retire_land_in_the_buffer():
+    log = StderrLog(forward_level="CRITICAL", max_retired=1)
+    log.submit("iac#0", b"Traceback (most recent call last):\n")
+    log.submit("iac#0", b"RuntimeError: boom\n")
+    log.retire("iac#0")
+    drain(log)
+
+    lines = log.tail("iac")["workers"]["iac#0"]["lines"]
+    assert [entry["line"] for entry in lines] == ["Traceback (most recent call last):", "RuntimeError: boom"]
+    assert all(entry["level"] == "ERROR" for entry in lines)
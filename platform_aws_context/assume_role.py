@@ -1,13 +1,256 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
 import boto3
-from typing import Dict, Any
+
 from .identity import CallerIdentity
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_ROLE_NAME = "McpReadOnlyRole"
+SESSION_DURATION_SECONDS = 900
+# Start a background refresh once credentials are this close to expiring
+CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.environ.get("CREDENTIAL_REFRESH_MARGIN_SECONDS", "180"))
+# Below this much remaining lifetime, callers wait for fresh credentials instead
+CREDENTIAL_MIN_REMAINING_SECONDS = int(os.environ.get("CREDENTIAL_MIN_REMAINING_SECONDS", "30"))
+# Entries are per actor, so a long-running server would otherwise keep one for every user it ever served
+CREDENTIAL_CACHE_MAX_ROLES = int(os.environ.get("CREDENTIAL_CACHE_MAX_ROLES", "256"))
+CREDENTIAL_CACHE_MAX_CLIENTS = int(os.environ.get("CREDENTIAL_CACHE_MAX_CLIENTS", "512"))
+
+
+class _AssumedRole:
+    """One set of assumed-role credentials"""
+
+    def __init__(self, credentials: Dict[str, Any]):
+        self.credentials = credentials
+        self.expires_at = credentials["Expiration"].timestamp()
+
+    def remaining(self) -> float:
+        return self.expires_at - time.time()
+
+
+class _Refresh:
+    """An in-flight AssumeRole call that other threads can wait on"""
 
-def get_client_for_account(service: str, ctx_params: Dict[str, Any]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[_AssumedRole] = None
+        self.error: Optional[BaseException] = None
+
+
+class CredentialCache:
+    """
+    Thread-safe cache of assumed-role credentials and the boto3 clients built from them.
+
+    Credentials are shared per (account, role, actor); clients per
+    (account, role, region, service, actor) and rebuilt only when the
+    credentials behind them change. Credentials nearing expiry are refreshed
+    in the background while callers keep using the current ones, and only one
+    AssumeRole call per role is ever in flight. Both maps are LRUs, and
+    expired credentials are dropped along with the clients built from them.
     """
-    Create a boto3 client for `service` by assuming into a target role
-    in the account provided in ctx_params.
+
+    def __init__(
+        self,
+        refresh_margin: float = CREDENTIAL_REFRESH_MARGIN_SECONDS,
+        min_remaining: float = CREDENTIAL_MIN_REMAINING_SECONDS,
+        max_roles: int = CREDENTIAL_CACHE_MAX_ROLES,
+        max_clients: int = CREDENTIAL_CACHE_MAX_CLIENTS
+    ):
+        self.refresh_margin = refresh_margin
+        self.min_remaining = min_remaining
+        self.max_roles = max_roles
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._roles: "OrderedDict[Tuple[str, str, str], _AssumedRole]" = OrderedDict()
+        self._clients: "OrderedDict[Tuple[str, str, str, str, str], Tuple[Any, Optional[_AssumedRole]]]" = OrderedDict()
+        self._refreshing: Dict[Tuple[str, str, str], _Refresh] = {}
+        # boto3's default session isn't safe for concurrent client creation; reentrant for _sts_client
+        self._session = boto3.session.Session()
+        self._session_lock = threading.RLock()
+        self._sts = None
+        self._caller_account: Optional[str] = None
+        self.stats = {
+            "credential_hits": 0, "credential_misses": 0,
+            "client_hits": 0, "client_misses": 0,
+            "refreshes": 0, "refresh_errors": 0, "evictions": 0
+        }
+
+    def _client(self, service: str, **kwargs):
+        with self._session_lock:
+            return self._session.client(service, **kwargs)
+
+    def _sts_client(self):
+        with self._session_lock:
+            if self._sts is None:
+                self._sts = self._client("sts")
+            return self._sts
+
+    def _assume(self, account_id: str, role_name: str, actor: str) -> _AssumedRole:
+        resp = self._sts_client().assume_role(
+            RoleArn=f"arn:aws:iam::{account_id}:role/{role_name}",
+            RoleSessionName=f"MCP-{actor}"[:64],
+            DurationSeconds=SESSION_DURATION_SECONDS,
+        )
+        return _AssumedRole(resp["Credentials"])
+
+    def _refresh(self, key: Tuple[str, str, str], refresh: _Refresh):
+        try:
+            refresh.result = self._assume(*key)
+            with self._lock:
+                self._roles[key] = refresh.result
+                self._roles.move_to_end(key)
+                self.stats["refreshes"] += 1
+                self._evict()
+            logger.info(f"Assumed {key[1]} in {key[0]} for {key[2]} ({self.stats})")
+        except BaseException as e:
+            refresh.error = e
+            with self._lock:
+                self.stats["refresh_errors"] += 1
+            logger.warning(f"AssumeRole {key[1]} in {key[0]} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+            refresh.done.set()
+
+    def _evict(self):
+        """Drop expired credentials and their clients, then trim both maps to size. Caller holds _lock."""
+        expired = {key for key, role in self._roles.items() if role.remaining() <= 0}
+        for key in expired:
+            del self._roles[key]
+        stale = [key for key, (_, role) in self._clients.items() if role is not None and role.remaining() <= 0]
+        for key in stale:
+            del self._clients[key]
+        evicted = len(expired) + len(stale)
+        while len(self._roles) > self.max_roles:
+            self._roles.popitem(last=False)
+            evicted += 1
+        while len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+            evicted += 1
+        self.stats["evictions"] += evicted
+
+    def credentials(self, account_id: str, role_name: str, actor: str) -> _AssumedRole:
+        key = (account_id, role_name, actor)
+        with self._lock:
+            current = self._roles.get(key)
+            if current is not None:
+                self._roles.move_to_end(key)
+            remaining = current.remaining() if current else 0
+            if remaining > self.min_remaining:
+                self.stats["credential_hits"] += 1
+                if remaining > self.refresh_margin or key in self._refreshing:
+                    return current
+                # Still usable: refresh off the request path and carry on with these
+                self._refreshing[key] = _Refresh()
+                background = self._refreshing[key]
+            else:
+                self.stats["credential_misses"] += 1
+                background = None
+                refresh = self._refreshing.get(key)
+                leader = refresh is None
+                if leader:
+                    refresh = self._refreshing[key] = _Refresh()
+
+        if background is not None:
+            threading.Thread(target=self._refresh, args=(key, background), name="assume-role-refresh", daemon=True).start()
+            return current
+        if leader:
+            self._refresh(key, refresh)
+        else:
+            refresh.done.wait()
+        if refresh.error is not None:
+            raise refresh.error
+        return refresh.result
+
+    def client(self, service: str, account_id: str, region: str, actor: str, role_name: str = DEFAULT_ROLE_NAME):
+        role = self.credentials(account_id, role_name, actor)
+        key = (account_id, role_name, region, service, actor)
+        with self._lock:
+            cached = self._clients.get(key)
+            if cached and cached[1] is role:
+                self._clients.move_to_end(key)
+                self.stats["client_hits"] += 1
+                return cached[0]
+            self.stats["client_misses"] += 1
+
+        creds = role.credentials
+        client = self._client(
+            service,
+            region_name=region,
+            aws_access_key_id=creds["AccessKeyId"],
+            aws_secret_access_key=creds["SecretAccessKey"],
+            aws_session_token=creds["SessionToken"],
+        )
+        with self._lock:
+            self._clients[key] = (client, role)
+            self._clients.move_to_end(key)
+            self._evict()
+        return client
+
+    def default_client(self, service: str, region: str):
+        """Client on the process's own credentials, which boto3 refreshes itself"""
+        key = ("", "", region, service, "")
+        with self._lock:
+            cached = self._clients.get(key)
+            self.stats["client_hits" if cached else "client_misses"] += 1
+            if cached:
+                self._clients.move_to_end(key)
+        if cached:
+            return cached[0]
+        client = self._client(service, region_name=region)
+        with self._lock:
+            self._clients[key] = (client, None)
+            self._evict()
+        return client
+
+    def caller_account_id(self) -> str:
+        """Account of the process's own credentials, looked up once"""
+        if self._caller_account is None:
+            self._caller_account = self._client("sts").get_caller_identity()["Account"]
+        return self._caller_account
+
+    def render_metrics(self) -> str:
+        """Prometheus text for the hit/miss and refresh counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            roles, clients = len(self._roles), len(self._clients)
+        lines = [
+            "# HELP aws_credential_cache_requests_total Assumed-role credential lookups",
+            "# TYPE aws_credential_cache_requests_total counter",
+            f'aws_credential_cache_requests_total{{cache="credentials",result="hit"}} {stats["credential_hits"]}',
+            f'aws_credential_cache_requests_total{{cache="credentials",result="miss"}} {stats["credential_misses"]}',
+            f'aws_credential_cache_requests_total{{cache="clients",result="hit"}} {stats["client_hits"]}',
+            f'aws_credential_cache_requests_total{{cache="clients",result="miss"}} {stats["client_misses"]}',
+            "# HELP aws_credential_refreshes_total AssumeRole calls made by the cache",
+            "# TYPE aws_credential_refreshes_total counter",
+            f'aws_credential_refreshes_total{{outcome="ok"}} {stats["refreshes"]}',
+            f'aws_credential_refreshes_total{{outcome="error"}} {stats["refresh_errors"]}',
+            "# HELP aws_credential_cache_evictions_total Credentials and clients dropped as expired or over the size limit",
+            "# TYPE aws_credential_cache_evictions_total counter",
+            f'aws_credential_cache_evictions_total {stats["evictions"]}',
+            "# HELP aws_credential_cache_entries Cached credentials and clients",
+            "# TYPE aws_credential_cache_entries gauge",
+            f'aws_credential_cache_entries{{cache="credentials"}} {roles}',
+            f'aws_credential_cache_entries{{cache="clients"}} {clients}',
+        ]
+        return "\n".join(lines) + "\n"
+
+
+credential_cache = CredentialCache()
+
+
+def get_client_for_account(service: str, ctx_params: Dict[str, Any], role_name: str = DEFAULT_ROLE_NAME):
+    """
+    Return a boto3 client for `service` using credentials for a role
+    assumed in the account provided in ctx_params.
+
+    Clients and credentials are cached (see CredentialCache), so repeated
+    calls for the same account, role, region, service and actor are free.
 
     ctx_params MUST contain:
       - account_id (str)
@@ -18,21 +261,4 @@ def get_client_for_account(service: str, ctx_params: Dict[str, Any]):
     account_id = ctx_params["account_id"]
     region = ctx_params.get("region", "us-east-1")
     identity = CallerIdentity.from_ctx_params(ctx_params)
-
-    role_arn = f"arn:aws:iam::{account_id}:role/{DEFAULT_ROLE_NAME}"
-
-    sts = boto3.client("sts")  # uses my local laptop's creds
-    resp = sts.assume_role(
-        RoleArn=role_arn,
-        RoleSessionName=f"MCP-{identity.actor}"[:64],
-        DurationSeconds=900,
-    )
-
-    creds = resp["Credentials"]
-    return boto3.client(
-        service,
-        region_name=region,
-        aws_access_key_id=creds["AccessKeyId"],
-        aws_secret_access_key=creds["SecretAccessKey"],
-        aws_session_token=creds["SessionToken"],
-    )
+    return credential_cache.client(service, account_id, region, identity.actor, role_name)
@@ -0,0 +1,36 @@
+import logging
+from typing import Any
+
+from .assume_role import credential_cache
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def run_streamable_http(mcp: Any, host: str, port: int, path: str, stateless: bool) -> None:
+    """
+    Serve a FastMCP server over streamable HTTP at `path`, with /health for
+    load balancer checks and /metrics for the credential cache counters.
+    Blocks until the server exits.
+    """
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, PlainTextResponse
+
+    @mcp.custom_route("/health", methods=["GET"])
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(credential_cache.render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    logger.info(f"Serving streamable HTTP on {host}:{port}{path} (stateless: {stateless})")
+    mcp.run(
+        transport="http",
+        host=host,
+        port=port,
+        path=path,
+        stateless_http=stateless,
+        json_response=True,
+    )
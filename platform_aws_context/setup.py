@@ -7,5 +7,5 @@ setup(
     install_requires=[
         "boto3",
     ],
-    description="Cross-account AssumeRole helper for AWS MCP servers",
+    description="Cross-account AssumeRole and tool result helpers for AWS MCP servers",
 )
@@ -0,0 +1,208 @@
+"""Tests for the cached cross-account credential broker."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from platform_aws_context.assume_role import CredentialCache, get_client_for_account
+
+
+class FakeSts:
+    def __init__(self, lifetime=900, delay=0.0, fail=False):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def assume_role(self, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("AccessDenied")
+        n = len(self.calls)
+        return {
+            "Credentials": {
+                "AccessKeyId": f"ASIA{n}",
+                "SecretAccessKey": "secret",
+                "SessionToken": f"token-{n}",
+                "Expiration": datetime.now(timezone.utc) + timedelta(seconds=self.lifetime),
+            }
+        }
+
+
+@pytest.fixture
+def make_cache():
+    def make(sts, **kwargs):
+        cache = CredentialCache(**kwargs)
+        built = []
+
+        def fake_client(service, **client_kwargs):
+            if service == "sts":
+                return sts
+            built.append((service, client_kwargs))
+            return object()
+
+        cache._client = fake_client
+        cache.built = built
+        return cache
+
+    return make
+
+
+def test_repeat_calls_reuse_credentials_and_client(make_cache):
+    sts = FakeSts()
+    cache = make_cache(sts)
+
+    first = cache.client("ecs", "111111111111", "us-east-1", "alice")
+    second = cache.client("ecs", "111111111111", "us-east-1", "alice")
+
+    assert first is second
+    assert len(sts.calls) == 1
+    assert sts.calls[0]["RoleArn"] == "arn:aws:iam::111111111111:role/McpReadOnlyRole"
+    assert sts.calls[0]["RoleSessionName"] == "MCP-alice"
+    assert len(cache.built) == 1
+    assert cache.stats["credential_hits"] == 1
+    assert cache.stats["client_hits"] == 1
+
+
+def test_key_includes_service_region_role_and_actor(make_cache):
+    sts = FakeSts()
+    cache = make_cache(sts)
+
+    cache.client("cloudformation", "111111111111", "us-east-1", "alice")
+    cache.client("cloudtrail", "111111111111", "us-east-1", "alice")
+    cache.client("cloudformation", "111111111111", "eu-west-1", "alice")
+    # Same account and role share credentials across services and regions
+    assert len(sts.calls) == 1
+    assert len(cache.built) == 3
+
+    cache.client("cloudformation", "111111111111", "us-east-1", "bob")
+    cache.client("cloudformation", "111111111111", "us-east-1", "alice", role_name="McpServerTaskRole")
+    assert len(sts.calls) == 3
+
+
+def test_refreshes_in_background_before_expiry(make_cache):
+    sts = FakeSts(lifetime=100)
+    cache = make_cache(sts, refresh_margin=180, min_remaining=30)
+
+    first = cache.client("ecs", "111111111111", "us-east-1", "alice")
+    # Inside the refresh margin but still usable: served at once, refreshed behind the scenes
+    second = cache.client("ecs", "111111111111", "us-east-1", "alice")
+    assert second is first
+
+    deadline = time.time() + 5
+    while cache.stats["refreshes"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(sts.calls) == 2
+
+    third = cache.client("ecs", "111111111111", "us-east-1", "alice")
+    assert third is not first
+    assert cache.built[-1][1]["aws_session_token"] == "token-2"
+
+
+def test_concurrent_misses_share_one_assume_role(make_cache):
+    sts = FakeSts(delay=0.2)
+    cache = make_cache(sts)
+    results = []
+
+    def call():
+        results.append(cache.client("ecs", "111111111111", "us-east-1", "alice"))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert len(sts.calls) == 1
+    assert cache.stats["credential_misses"] == 8
+
+
+def test_failed_refresh_raises_to_every_waiter(make_cache):
+    sts = FakeSts(delay=0.1, fail=True)
+    cache = make_cache(sts)
+    errors = []
+
+    def call():
+        try:
+            cache.client("ecs", "111111111111", "us-east-1", "alice")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert len(sts.calls) == 1
+    assert cache.stats["refresh_errors"] == 1
+
+    # Nothing cached after a failure, so the next call tries again
+    with pytest.raises(RuntimeError):
+        cache.client("ecs", "111111111111", "us-east-1", "alice")
+    assert len(sts.calls) == 2
+
+
+def test_expired_credentials_and_their_clients_are_dropped(make_cache):
+    sts = FakeSts()
+    cache = make_cache(sts)
+
+    cache.client("ecs", "111111111111", "us-east-1", "alice")
+    for role in cache._roles.values():
+        role.expires_at = time.time() - 1
+    # The next miss, for anyone, sweeps alice's expired credentials and client
+    cache.client("ecs", "111111111111", "us-east-1", "bob")
+
+    assert [key[2] for key in cache._roles] == ["bob"]
+    assert [key[4] for key in cache._clients] == ["bob"]
+    assert cache.stats["evictions"] == 2
+
+
+def test_roles_and_clients_are_bounded_lru(make_cache):
+    sts = FakeSts()
+    cache = make_cache(sts, max_roles=2, max_clients=3)
+
+    cache.client("ecs", "111111111111", "us-east-1", "alice")
+    cache.client("ecs", "111111111111", "us-east-1", "bob")
+    # Touch alice so bob is the least recently used
+    cache.client("ecs", "111111111111", "us-east-1", "alice")
+    cache.client("ecs", "111111111111", "us-east-1", "carol")
+
+    assert [key[2] for key in cache._roles] == ["alice", "carol"]
+    cache.client("cloudformation", "111111111111", "us-east-1", "alice")
+    cache.client("cloudtrail", "111111111111", "us-east-1", "alice")
+    assert len(cache._clients) == 3
+    assert ("111111111111", "McpReadOnlyRole", "us-east-1", "ecs", "bob") not in cache._clients
+
+
+def test_render_metrics(make_cache):
+    cache = make_cache(FakeSts())
+    cache.client("ecs", "111111111111", "us-east-1", "alice")
+    cache.client("ecs", "111111111111", "us-east-1", "alice")
+
+    text = cache.render_metrics()
+    assert 'aws_credential_cache_requests_total{cache="credentials",result="hit"} 1' in text
+    assert 'aws_credential_cache_requests_total{cache="credentials",result="miss"} 1' in text
+    assert 'aws_credential_cache_requests_total{cache="clients",result="hit"} 1' in text
+    assert 'aws_credential_refreshes_total{outcome="ok"} 1' in text
+    assert 'aws_credential_cache_entries{cache="clients"} 1' in text
+    assert "aws_credential_cache_evictions_total 0" in text
+
+
+def test_get_client_for_account_uses_actor_from_metadata(monkeypatch):
+    calls = []
+
+    def fake_client(service, account_id, region, actor, role_name):
+        calls.append((service, account_id, region, actor, role_name))
+        return "client"
+
+    monkeypatch.setattr("platform_aws_context.assume_role.credential_cache.client", fake_client)
+    ctx = {"account_id": "111111111111", "region": "eu-west-1", "_metadata": {"actor": "octocat"}}
+
+    assert get_client_for_account("ecs", ctx) == "client"
+    assert calls == [("ecs", "111111111111", "eu-west-1", "octocat", "McpReadOnlyRole")]
@@ -0,0 +1,39 @@
+import json
+from typing import Any
+
+# ECS and IaC tools report failures as {"status": "failed" | "error", "error": ...} in a normal result
+ERROR_STATUSES = ("error", "failed")
+
+
+def _tool_payload(result: dict) -> Any:
+    """structuredContent if present, else the first text item parsed as JSON"""
+    if result.get("structuredContent") is not None:
+        return result["structuredContent"]
+    content = result.get("content")
+    if not isinstance(content, list) or not content or not isinstance(content[0], dict):
+        return None
+    try:
+        return json.loads(content[0].get("text") or "")
+    except (TypeError, ValueError):
+        return None
+
+
+def is_error_response(response: Any) -> bool:
+    """
+    True if a tools/call JSON-RPC response (or a {"error": ...} wrapper) is a failure.
+
+    Besides JSON-RPC errors and isError results, this catches tools that
+    return their failure in-band with isError false: a payload whose
+    `error` is set or whose `status` is "error" or "failed".
+    """
+    if not isinstance(response, dict):
+        return False
+    if response.get("error"):
+        return True
+    result = response.get("result")
+    if not isinstance(result, dict):
+        return False
+    if result.get("isError"):
+        return True
+    payload = _tool_payload(result)
+    return isinstance(payload, dict) and bool(payload.get("error") or payload.get("status") in ERROR_STATUSES)
@@ -5,6 +5,8 @@ from typing import Dict, Any, Optional, List
 import yaml
 import json
 import boto3
+from fastapi.responses import PlainTextResponse
+from platform_aws_context.assume_role import credential_cache, get_client_for_account
 from cfn_mappings import CFN_TO_CLASS_MAPPINGS
 
 app = FastAPI()
@@ -22,6 +24,11 @@ pricing_client = boto3.client('pricing', region_name='us-east-1')
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus counters for the cross-account credential cache"""
+    return PlainTextResponse(credential_cache.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/pricingcalc")
 async def mcp_endpoint(request: JSONRPCRequest):
     if request.method == "tools/list":
@@ -106,32 +113,15 @@ async def mcp_endpoint(request: JSONRPCRequest):
             
             # Get stack template from CloudFormation
             try:
-                import boto3
-                
-                # Check if we need to assume role for different account
-                current_account = boto3.client('sts').get_caller_identity()['Account']
-                
-                if account_id != current_account:
-                    # Assume role in target account
-                    sts_client = boto3.client('sts')
-                    role_arn = f"arn:aws:iam::{account_id}:role/McpServerTaskRole"
-                    
-                    assumed_role = sts_client.assume_role(
-                        RoleArn=role_arn,
-                        RoleSessionName="pricing-calculator-session"
-                    )
-                    
-                    # Create CloudFormation client with assumed role credentials
-                    cf_client = boto3.client(
-                        'cloudformation',
-                        region_name=region,
-                        aws_access_key_id=assumed_role['Credentials']['AccessKeyId'],
-                        aws_secret_access_key=assumed_role['Credentials']['SecretAccessKey'],
-                        aws_session_token=assumed_role['Credentials']['SessionToken']
+                # Other accounts go through the cached assumed-role client; our own uses the task role
+                if account_id and account_id != credential_cache.caller_account_id():
+                    cf_client = get_client_for_account(
+                        service="cloudformation",
+                        ctx_params={"account_id": account_id, "region": region, "_metadata": metadata},
+                        role_name="McpServerTaskRole"
                     )
                 else:
-                    # Use current account credentials
-                    cf_client = boto3.client('cloudformation', region_name=region)
+                    cf_client = credential_cache.default_client("cloudformation", region)
                 
                 response = cf_client.get_template(StackName=stack_name)
                 template_body = response['TemplateBody']
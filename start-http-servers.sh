@@ -1,17 +1,21 @@
 #!/bin/bash
 
-# Start both MCP servers with HTTP endpoints
+# Start both MCP servers with their streamable-HTTP transport (/mcp, /health and /metrics).
+# They run stateless by default, so any replica behind the load balancer can answer any call.
+# MCP_HTTP_STATELESS=false keeps a session per client, which is cheaper per call but needs
+# sticky routing to the replica that holds it.
 cd /app
+export MCP_TRANSPORT=http
 
 # Start ECS MCP server on port 8000
 cd ecs-mcp-server
 export PYTHONPATH="/app:/app/platform_aws_context:/app/ecs-mcp-server"
-python3 -m uvicorn awslabs.ecs_mcp_server.main:app --host 0.0.0.0 --port 8000 &
+MCP_HTTP_PORT=8000 python3 -m awslabs.ecs_mcp_server.main &
 
 # Start IaC MCP server on port 8001  
 cd /app/aws-iac-mcp-server
 export PYTHONPATH="/app:/app/platform_aws_context:/app/aws-iac-mcp-server"
-python3 -m uvicorn awslabs.aws_iac_mcp_server.server:app --host 0.0.0.0 --port 8001 &
+MCP_HTTP_PORT=8001 python3 -m awslabs.aws_iac_mcp_server.server &
 
 # Keep container running
 wait
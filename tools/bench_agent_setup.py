@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Per-request agent setup latency: fresh build_*_agent vs warm pool checkout
+"""
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# The broker imports platform_aws_context, which its image installs from the repo root
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'broker-service'))
+
+from agents.agents import build_user_agent, build_admin_agent
+from agents.agent_pool import pooled_agent, warm_agent_pools
+from agents.param_resolution import build_request_context
+
+ITERATIONS = int(os.environ.get('ITERATIONS', '50'))
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(label: str, samples: list):
+    print(f"{label:<28} p50={statistics.median(samples):8.2f}ms  p95={percentile(samples, 0.95):8.2f}ms  max={max(samples):8.2f}ms")
+
+
+def bench_cold(tier: str, build) -> list:
+    samples = []
+    for i in range(ITERATIONS):
+        ctx = build_request_context({"ask_text": f"bench {i}"}, tier=tier)
+        start = time.perf_counter()
+        build(ctx)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_pooled(tier: str) -> list:
+    samples = []
+    for i in range(ITERATIONS):
+        ctx = build_request_context({"ask_text": f"bench {i}"}, tier=tier)
+        start = time.perf_counter()
+        with pooled_agent(tier, ctx):
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+if __name__ == "__main__":
+    print(f"⏱️  Agent setup latency over {ITERATIONS} requests per tier\n")
+    report("user  build_user_agent", bench_cold("user", build_user_agent))
+    report("admin build_admin_agent", bench_cold("admin", build_admin_agent))
+
+    warm_agent_pools()
+    report("user  pooled_agent", bench_pooled("user"))
+    report("admin pooled_agent", bench_pooled("admin"))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tool-call latency through the gateway: stdio worker bridge vs native streamable HTTP
+
+Starts the chosen MCP server both ways (a gateway stdio worker, and the same
+server with MCP_TRANSPORT=http), then runs identical tools/call requests through
+each path at a fixed concurrency and reports p50/p95/p99.
+
+Runs in the gateway image as-is; from a checkout set MCP_APP_ROOT to the repo root.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('MCP_APP_ROOT', '/app' if os.path.isdir('/app/mcp-gateway') else REPO_ROOT)
+APP_ROOT = os.environ['MCP_APP_ROOT']
+sys.path.insert(0, os.path.join(REPO_ROOT, 'mcp-gateway'))
+
+import httpx
+import gateway
+
+SERVER = os.environ.get('SERVER', 'iac')
+ITERATIONS = int(os.environ.get('ITERATIONS', '200'))
+CONCURRENCY = int(os.environ.get('CONCURRENCY', '8'))
+HTTP_PORT = int(os.environ.get('HTTP_PORT', '18080'))
+
+# Static, async tool by default so the numbers are transport cost rather than tool work;
+# e.g. TOOL=validate_cloudformation_template ARGUMENTS='{"template_content": "..."}' for a real one
+DEFAULT_CALLS = {
+    'iac': ('cdk_best_practices', {}),
+    'ecs': ('ecs_resource_management', {"api_operation": "ListClusters", "api_params": {}})
+}
+TOOL = os.environ.get('TOOL', DEFAULT_CALLS[SERVER][0])
+ARGUMENTS = json.loads(os.environ['ARGUMENTS']) if 'ARGUMENTS' in os.environ else DEFAULT_CALLS[SERVER][1]
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(label: str, samples: list, errors: int, wall_seconds: float):
+    print(
+        f"{label:<16} p50={statistics.median(samples):8.2f}ms  p95={percentile(samples, 0.95):8.2f}ms  "
+        f"p99={percentile(samples, 0.99):8.2f}ms  max={max(samples):8.2f}ms  "
+        f"{len(samples) / wall_seconds:7.1f} calls/s  errors={errors}"
+    )
+
+
+async def run_load(upstream) -> tuple:
+    samples, errors = [], 0
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        nonlocal errors
+        request = {
+            "jsonrpc": "2.0",
+            "id": gateway.next_id(SERVER),
+            "method": "tools/call",
+            "params": {"name": TOOL, "arguments": ARGUMENTS}
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            response = await upstream.call(request, 60)
+            samples.append((time.perf_counter() - start) * 1000)
+            if "error" in response or response.get("result", {}).get("isError"):
+                errors += 1
+
+    # Warm-up round so imports and first-call caches don't land in the samples
+    await asyncio.gather(*(one() for _ in range(CONCURRENCY)))
+    samples.clear()
+    errors = 0
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(ITERATIONS)))
+    return samples, errors, time.perf_counter() - start
+
+
+def start_http_server() -> subprocess.Popen:
+    cmd, env = gateway.server_command(SERVER)
+    env.update(MCP_TRANSPORT="http", MCP_HTTP_HOST="127.0.0.1", MCP_HTTP_PORT=str(HTTP_PORT), FASTMCP_LOG_LEVEL="WARNING")
+    return subprocess.Popen(cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_for_health(timeout: float = 60):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(f"http://127.0.0.1:{HTTP_PORT}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"HTTP server on port {HTTP_PORT} did not become healthy")
+
+
+async def main():
+    print(f"⏱️  {SERVER}/{TOOL}: {ITERATIONS} calls at concurrency {CONCURRENCY} (app root {APP_ROOT})\n")
+
+    pool = gateway.McpWorkerPool(SERVER)
+    # One worker on each side so the comparison is per server process
+    pool.min_workers = pool.max_workers = 1
+    pool.standby_target = 0
+    pool.max_in_flight = CONCURRENCY
+    await pool.warm()
+    try:
+        samples, errors, wall = await run_load(pool)
+        report("stdio bridge", samples, errors, wall)
+    finally:
+        await pool.stop()
+
+    process = start_http_server()
+    upstream = gateway.McpHttpUpstream(SERVER, f"http://127.0.0.1:{HTTP_PORT}/mcp")
+    upstream.max_in_flight = CONCURRENCY
+    try:
+        await wait_for_health()
+        await upstream.warm()
+        samples, errors, wall = await run_load(upstream)
+        report("streamable HTTP", samples, errors, wall)
+    finally:
+        await upstream.stop()
+        process.terminate()
+        process.wait(10)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""
+Path router standing in for the internal ALB in front of the MCP services
+
+The broker sends every backend call to one shim_url and the ALB routes on path:
+/metrics to deployment-metrics-mcp, /call-tool(s) to the gateway. /pr and
+/pricingcalc aren't part of the load test and get an empty tool list.
+
+Run with: uvicorn alb:app --app-dir tools/loadtest --port 8090
+"""
+import os
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+LOADTEST_METRICS_URL = os.environ.get("LOADTEST_METRICS_URL", "http://127.0.0.1:8092")
+LOADTEST_GATEWAY_URL = os.environ.get("LOADTEST_GATEWAY_URL", "http://127.0.0.1:8091")
+
+ROUTES = {
+    "metrics": LOADTEST_METRICS_URL,
+    "call-tool": LOADTEST_GATEWAY_URL,
+    "call-tools": LOADTEST_GATEWAY_URL
+}
+
+app = FastAPI(title="Load-test ALB")
+client = httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=None, max_keepalive_connections=256))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await client.aclose()
+
+
+@app.post("/{service}")
+async def route(service: str, request: Request):
+    target = ROUTES.get(service)
+    if target is None:
+        body = await request.json()
+        result = {"tools": []} if body.get("method") == "tools/list" else {"content": [{"type": "text", "text": f"{service} is stubbed in the load test"}]}
+        return JSONResponse({"jsonrpc": "2.0", "id": body.get("id"), "result": result})
+
+    headers = {key: value for key, value in request.headers.items() if key.lower() not in ("host", "content-length")}
+    upstream = await client.post(f"{target}/{service}", content=await request.body(), headers=headers)
+    passthrough = {key: value for key, value in upstream.headers.items() if key.lower() in ("content-type", "retry-after") or key.lower().startswith("x-")}
+    return Response(upstream.content, status_code=upstream.status_code, headers=passthrough)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Round trips and latency of deployment-metrics-mcp's composite tools, before and after
+
+Compares the multi-query shapes deploy_get_summary and deploy_status used to
+have against the single SUMMARY_SELECT query they use now, through the
+server's own connection pool. Uses DB_* if set, otherwise the same embedded
+pgserver as run.py, seeded by seed.py.
+
+Every statement pays BENCH_RTT_MS extra, standing in for the network round
+trip to RDS that a local socket doesn't have.
+"""
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(LOADTEST_DIR, '..', '..'))
+sys.path.insert(0, LOADTEST_DIR)
+
+from run import start_postgres, summarize
+from scenarios import REPOSITORIES, RUNS_PER_REPOSITORY, run_id
+import seed
+
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', '200'))
+CONCURRENCY = int(os.environ.get('BENCH_CONCURRENCY', '8'))
+RTT_MS = float(os.environ.get('BENCH_RTT_MS', '1'))
+STATUS_LIMIT = int(os.environ.get('BENCH_STATUS_LIMIT', '3'))
+
+STEP_STATS_SQL = """
+    SELECT COUNT(*),
+           COUNT(CASE WHEN step_status = 'SUCCEEDED' THEN 1 END) as succeeded,
+           COUNT(CASE WHEN step_status = 'FAILED' THEN 1 END) as failed,
+           COUNT(CASE WHEN step_status = 'RUNNING' THEN 1 END) as running
+    FROM job_step_metrics
+    WHERE run_id = %s
+"""
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    statements = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.statements += 1
+        time.sleep(RTT_MS / 1000)
+        return super().execute(query, vars)
+
+
+def stats_dict(row) -> dict:
+    return {"total": row[0], "succeeded": row[1], "failed": row[2], "running": row[3]}
+
+
+def cases(db, mcp_protocol) -> dict:
+    async def summary_before(index: int):
+        # Run details, then a second query for step counts
+        rid = run_id(REPOSITORIES[index % len(REPOSITORIES)], index % RUNS_PER_REPOSITORY)
+        details = await mcp_protocol.get_run_details(rid)
+        return dict(details, stats=stats_dict(await db.fetchone(STEP_STATS_SQL, (rid,))))
+
+    async def summary_after(index: int):
+        rid = run_id(REPOSITORIES[index % len(REPOSITORIES)], index % RUNS_PER_REPOSITORY)
+        return await mcp_protocol.get_run_summary(rid)
+
+    async def status_before(index: int):
+        # Latest runs, then step counts run by run
+        latest = await mcp_protocol.find_latest_runs(REPOSITORIES[index % len(REPOSITORIES)], STATUS_LIMIT)
+        return [dict(run, stats=stats_dict(await db.fetchone(STEP_STATS_SQL, (run["run_id"],)))) for run in latest["runs"]]
+
+    async def status_after(index: int):
+        return await mcp_protocol.latest_run_summaries(REPOSITORIES[index % len(REPOSITORIES)], STATUS_LIMIT)
+
+    return {
+        "deploy_get_summary": (summary_before, summary_after),
+        f"deploy_status (latest {STATUS_LIMIT})": (status_before, status_after)
+    }
+
+
+async def measure(fn) -> tuple:
+    """Statements per call and per-call latencies over ITERATIONS calls at CONCURRENCY"""
+    await fn(0)
+    CountingCursor.statements = 0
+    latencies = []
+    queue = iter(range(ITERATIONS))
+
+    async def worker():
+        for index in queue:
+            start = time.perf_counter()
+            await fn(index)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return CountingCursor.statements / ITERATIONS, latencies
+
+
+async def main():
+    os.environ.update(start_postgres())
+    seed.seed()
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'deployment-metrics-mcp'))
+    import db
+    import mcp_protocol
+
+    borrow = db.get_db_connection
+
+    @contextmanager
+    def counting_connection():
+        with borrow() as conn:
+            conn.cursor_factory = CountingCursor
+            yield conn
+
+    db.get_db_connection = counting_connection
+
+    print(f"⏱️  {ITERATIONS} calls per case at concurrency {CONCURRENCY}, {RTT_MS:g} ms added per statement, pool max {db.DB_POOL_MAX}\n")
+    print(f"{'':34}{'queries':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, (before, after) in cases(db, mcp_protocol).items():
+        # Same rows and counts either way
+        for index in range(len(REPOSITORIES)):
+            old, new = await before(index), await after(index)
+            if name == "deploy_get_summary":
+                assert (old["run"], old["stats"]) == (new["run"], new["stats"]), name
+            else:
+                assert old == new, name
+        for label, fn in (("before", before), ("after", after)):
+            queries, latencies = await measure(fn)
+            s = summarize(latencies)
+            print(f"{name + ' ' + label:34}{queries:>9.1f}{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}")
+    db.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,309 @@
+"""
+Local stand-in for the AWS APIs behind the broker chain
+
+Serves Bedrock Converse/ConverseStream (playing back the tool-use turns in
+scenarios.py), InvokeModel, STS, ECS, CloudFormation, CloudTrail and Secrets
+Manager from canned data. Every boto3 client in the chain is pointed here with
+AWS_ENDPOINT_URL; requests are routed by the service in the SigV4 credential
+scope, delayed by a configurable latency and counted per operation.
+
+Run with: uvicorn fake_aws:app --app-dir tools/loadtest --port 4566
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import struct
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from scenarios import CLUSTERS, SERVICES_PER_CLUSTER, STACKS, SCENARIOS, fill, match_prompt
+
+# Simulated service time; each call sleeps this long +/- LOADTEST_JITTER
+LOADTEST_BEDROCK_LATENCY_MS = float(os.environ.get("LOADTEST_BEDROCK_LATENCY_MS", "400"))
+LOADTEST_AWS_LATENCY_MS = float(os.environ.get("LOADTEST_AWS_LATENCY_MS", "30"))
+LOADTEST_JITTER = float(os.environ.get("LOADTEST_JITTER", "0.2"))
+
+ACCOUNT_ID = "123456789012"
+
+app = FastAPI(title="Load-test fake AWS")
+calls: Counter = Counter()
+
+
+async def simulate_latency(base_ms: float):
+    if base_ms > 0:
+        await asyncio.sleep(base_ms * random.uniform(1 - LOADTEST_JITTER, 1 + LOADTEST_JITTER) / 1000)
+
+
+def signing_service(request: Request) -> str:
+    match = re.search(r"Credential=[^/]+/[^/]+/[^/]+/([^/]+)/", request.headers.get("authorization", ""))
+    return match.group(1) if match else ""
+
+
+# --- Bedrock -------------------------------------------------------------
+
+def encode_event(event_type: str, payload: dict) -> bytes:
+    """One message in the AWS event-stream framing ConverseStream responses use"""
+    headers = b"".join(
+        bytes([len(name)]) + name + b"\x07" + struct.pack(">H", len(value)) + value
+        for name, value in (
+            (b":event-type", event_type.encode()),
+            (b":content-type", b"application/json"),
+            (b":message-type", b"event")
+        )
+    )
+    body = json.dumps(payload).encode()
+    prelude = struct.pack(">II", 16 + len(headers) + len(body), len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + headers + body
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def first_user_text(messages: list) -> str:
+    for message in messages:
+        if message.get("role") == "user":
+            for block in message.get("content", []):
+                if "text" in block:
+                    return block["text"]
+    return ""
+
+
+def script_turn(body: dict) -> tuple:
+    """(content blocks, stop reason) for the next assistant turn of the matching scenario"""
+    messages = body.get("messages", [])
+    matched = match_prompt(first_user_text(messages))
+    if not matched:
+        return [{"text": "The load-test model has no script for this prompt."}], "end_turn"
+    scenario, variables = matched
+    turn = sum(1 for message in messages if message.get("role") == "assistant")
+    if turn < len(scenario.turns):
+        blocks = [
+            {"toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:20]}", "name": name, "input": fill(tool_input, variables)}}
+            for name, tool_input in scenario.turns[turn]
+        ]
+        return blocks, "tool_use"
+    return [{"text": scenario.answer.format(**variables)}], "end_turn"
+
+
+def usage_for(body: dict, blocks: list) -> dict:
+    # Rough token counts so the broker's token accounting has something to add up
+    input_tokens = len(json.dumps(body.get("messages", []))) // 4 + 800
+    output_tokens = max(1, len(json.dumps(blocks)) // 4)
+    return {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens}
+
+
+def converse_stream_events(blocks: list, stop_reason: str, usage: dict, latency_ms: int) -> bytes:
+    events = [encode_event("messageStart", {"role": "assistant"})]
+    for index, block in enumerate(blocks):
+        if "toolUse" in block:
+            tool_use = block["toolUse"]
+            events.append(encode_event("contentBlockStart", {
+                "contentBlockIndex": index,
+                "start": {"toolUse": {"toolUseId": tool_use["toolUseId"], "name": tool_use["name"]}}
+            }))
+            delta = {"toolUse": {"input": json.dumps(tool_use["input"])}}
+        else:
+            delta = {"text": block["text"]}
+        events.append(encode_event("contentBlockDelta", {"contentBlockIndex": index, "delta": delta}))
+        events.append(encode_event("contentBlockStop", {"contentBlockIndex": index}))
+    events.append(encode_event("messageStop", {"stopReason": stop_reason}))
+    events.append(encode_event("metadata", {"usage": usage, "metrics": {"latencyMs": latency_ms}}))
+    return b"".join(events)
+
+
+async def bedrock(request: Request, path: str) -> Response:
+    match = re.match(r"model/([^/]+)/(converse-stream|converse|invoke)$", path)
+    if not match:
+        return JSONResponse({"message": f"Unknown Bedrock path /{path}"}, status_code=404)
+    operation = {"converse-stream": "ConverseStream", "converse": "Converse", "invoke": "InvokeModel"}[match.group(2)]
+    calls[f"bedrock:{operation}"] += 1
+    body = json.loads(await request.body() or b"{}")
+
+    start = time.perf_counter()
+    await simulate_latency(LOADTEST_BEDROCK_LATENCY_MS)
+    latency_ms = int((time.perf_counter() - start) * 1000)
+
+    if operation == "InvokeModel":
+        # Parameter extraction on the guard path: nothing extra to extract
+        return JSONResponse({
+            "output": {"message": {"role": "assistant", "content": [{"text": "{}"}]}},
+            "usage": {"inputTokens": 120, "outputTokens": 2}
+        })
+
+    blocks, stop_reason = script_turn(body)
+    usage = usage_for(body, blocks)
+    if operation == "Converse":
+        return JSONResponse({
+            "output": {"message": {"role": "assistant", "content": blocks}},
+            "stopReason": stop_reason,
+            "usage": usage,
+            "metrics": {"latencyMs": latency_ms}
+        })
+    return Response(
+        converse_stream_events(blocks, stop_reason, usage, latency_ms),
+        media_type="application/vnd.amazon.eventstream"
+    )
+
+
+# --- JSON-protocol services (ECS, CloudTrail, Secrets Manager) -------------
+
+def cluster_arn(name: str) -> str:
+    return f"arn:aws:ecs:us-east-1:{ACCOUNT_ID}:cluster/{name}"
+
+
+def service_names(cluster: str) -> list:
+    return [f"{cluster}-svc-{i}" for i in range(SERVICES_PER_CLUSTER)]
+
+
+def ecs_response(operation: str, params: dict) -> dict:
+    cluster = str(params.get("cluster") or CLUSTERS[0]).split("/")[-1]
+    if operation == "ListClusters":
+        return {"clusterArns": [cluster_arn(name) for name in CLUSTERS]}
+    if operation == "DescribeClusters":
+        names = [str(name).split("/")[-1] for name in params.get("clusters") or CLUSTERS[:1]]
+        return {"clusters": [{
+            "clusterArn": cluster_arn(name), "clusterName": name, "status": "ACTIVE",
+            "runningTasksCount": SERVICES_PER_CLUSTER * 2, "pendingTasksCount": 0,
+            "activeServicesCount": SERVICES_PER_CLUSTER, "registeredContainerInstancesCount": 0
+        } for name in names], "failures": []}
+    if operation == "ListServices":
+        return {"serviceArns": [f"arn:aws:ecs:us-east-1:{ACCOUNT_ID}:service/{cluster}/{name}" for name in service_names(cluster)]}
+    if operation == "DescribeServices":
+        names = [str(name).split("/")[-1] for name in params.get("services") or service_names(cluster)[:1]]
+        return {"services": [{
+            "serviceArn": f"arn:aws:ecs:us-east-1:{ACCOUNT_ID}:service/{cluster}/{name}",
+            "serviceName": name, "clusterArn": cluster_arn(cluster), "status": "ACTIVE",
+            "desiredCount": 2, "runningCount": 2, "pendingCount": 0, "launchType": "FARGATE",
+            "taskDefinition": f"arn:aws:ecs:us-east-1:{ACCOUNT_ID}:task-definition/{name}:7",
+            "deployments": [{"id": "ecs-svc/1", "status": "PRIMARY", "rolloutState": "COMPLETED", "desiredCount": 2, "runningCount": 2}],
+            "events": []
+        } for name in names], "failures": []}
+    if operation == "ListTasks":
+        return {"taskArns": [f"arn:aws:ecs:us-east-1:{ACCOUNT_ID}:task/{cluster}/{uuid.uuid4().hex}" for _ in range(2)]}
+    return {}
+
+
+def json_service_response(service: str, operation: str, params: dict) -> tuple:
+    """(status, body) for a JSON-protocol call"""
+    if service == "ecs":
+        return 200, ecs_response(operation, params)
+    if service == "cloudtrail" and operation == "LookupEvents":
+        return 200, {"Events": []}
+    if service == "secretsmanager":
+        return 400, {"__type": "ResourceNotFoundException", "message": "Secrets Manager can't find the specified secret."}
+    return 200, {}
+
+
+# --- Query-protocol services (STS, CloudFormation) -------------------------
+
+def to_xml(value: Any) -> str:
+    if isinstance(value, dict):
+        return "".join(f"<{key}>{to_xml(item)}</{key}>" for key, item in value.items())
+    if isinstance(value, list):
+        return "".join(f"<member>{to_xml(item)}</member>" for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return escape(str(value))
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def query_response(service: str, action: str, params: Dict[str, str]) -> Optional[dict]:
+    now = datetime.now(timezone.utc)
+    if service == "sts" and action == "AssumeRole":
+        session = params.get("RoleSessionName", "loadtest")
+        return {
+            "Credentials": {
+                "AccessKeyId": "ASIALOADTEST", "SecretAccessKey": "loadtest-secret",
+                "SessionToken": f"loadtest-session-{uuid.uuid4().hex}",
+                "Expiration": iso(now + timedelta(seconds=int(params.get("DurationSeconds", 900))))
+            },
+            "AssumedRoleUser": {
+                "AssumedRoleId": f"AROALOADTEST:{session}",
+                "Arn": f"{params.get('RoleArn', '').replace(':iam:', ':sts:').replace(':role/', ':assumed-role/')}/{session}"
+            }
+        }
+    if service == "sts" and action == "GetCallerIdentity":
+        return {"UserId": "AIDALOADTEST", "Account": ACCOUNT_ID, "Arn": f"arn:aws:iam::{ACCOUNT_ID}:user/loadtest"}
+    stack = params.get("StackName", STACKS[0])
+    if service == "cloudformation" and action == "DescribeStacks":
+        if stack not in STACKS:
+            return None
+        return {"Stacks": [{
+            "StackName": stack, "StackId": f"arn:aws:cloudformation:us-east-1:{ACCOUNT_ID}:stack/{stack}/{uuid.uuid5(uuid.NAMESPACE_DNS, stack)}",
+            "StackStatus": "UPDATE_ROLLBACK_COMPLETE", "CreationTime": iso(now - timedelta(days=30)),
+            "LastUpdatedTime": iso(now - timedelta(minutes=20))
+        }]}
+    if service == "cloudformation" and action == "DescribeEvents":
+        return {"OperationEvents": [{
+            "EventId": f"{stack}-event-{i}", "StackName": stack, "LogicalResourceId": f"Service{i}",
+            "ResourceType": "AWS::ECS::Service", "ResourceStatus": "CREATE_FAILED", "EventType": "PROVISIONING_ERROR",
+            "ResourceStatusReason": "Resource handler returned message: \"Invalid request provided: CannotPullContainerError\"",
+            "Timestamp": iso(now - timedelta(minutes=20 + i))
+        } for i in range(3)]}
+    return {}
+
+
+def query_xml(service: str, action: str, result: dict) -> str:
+    return (
+        f'<{action}Response xmlns="https://{service}.amazonaws.com/doc/">'
+        f"<{action}Result>{to_xml(result)}</{action}Result>"
+        f"<ResponseMetadata><RequestId>{uuid.uuid4()}</RequestId></ResponseMetadata>"
+        f"</{action}Response>"
+    )
+
+
+def query_error(code: str, message: str) -> Response:
+    body = f"<ErrorResponse><Error><Type>Sender</Type><Code>{code}</Code><Message>{escape(message)}</Message></Error></ErrorResponse>"
+    return Response(body, status_code=400, media_type="text/xml")
+
+
+# --- Routing ---------------------------------------------------------------
+
+@app.get("/_loadtest/stats")
+async def stats():
+    """Calls served per service:operation since start (or the last reset)"""
+    return dict(calls)
+
+
+@app.post("/_loadtest/reset")
+async def reset():
+    calls.clear()
+    return {"status": "reset"}
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST"])
+async def aws_api(path: str, request: Request):
+    service = signing_service(request)
+    if service == "bedrock":
+        return await bedrock(request, path)
+
+    target = request.headers.get("x-amz-target")
+    if target:
+        operation = target.split(".")[-1]
+        calls[f"{service}:{operation}"] += 1
+        await simulate_latency(LOADTEST_AWS_LATENCY_MS)
+        status, body = json_service_response(service, operation, json.loads(await request.body() or b"{}"))
+        return Response(json.dumps(body), status_code=status, media_type="application/x-amz-json-1.1")
+
+    params = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+    action = params.get("Action")
+    if not action:
+        return JSONResponse({"message": f"Unsupported request for service {service or 'unknown'}"}, status_code=400)
+    calls[f"{service}:{action}"] += 1
+    await simulate_latency(LOADTEST_AWS_LATENCY_MS)
+    result = query_response(service, action, params)
+    if result is None:
+        return query_error("ValidationError", f"Stack with id {params.get('StackName')} does not exist")
+    return Response(query_xml(service, action, result), media_type="text/xml")
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Local load test for the broker -> gateway -> MCP server chain
+
+Starts the real broker (strands_app), gateway, ECS/IaC MCP servers and
+deployment-metrics-mcp against local stand-ins: fake_aws.py for Bedrock and the
+AWS APIs, alb.py for the internal ALB and a throwaway Postgres for the metrics
+database. Then drives the scripted scenarios at a fixed concurrency and reports
+throughput, latency percentiles and the broker's per-stage timings.
+
+Settings come from the environment, see README.md. With BASELINE set to an
+earlier RESULTS_OUT file, exits 1 when p95 latency or throughput regresses by
+more than MAX_REGRESSION.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(LOADTEST_DIR, '..', '..'))
+sys.path.insert(0, LOADTEST_DIR)
+
+from scenarios import DEFAULT_MIX, SCENARIOS, make_request, parse_mix
+import seed
+
+CONCURRENCY = int(os.environ.get('CONCURRENCY', '8'))
+REQUESTS = int(os.environ.get('REQUESTS', '200'))
+SCENARIO_MIX = os.environ.get('SCENARIO_MIX', DEFAULT_MIX)
+RANDOM_SEED = int(os.environ.get('RANDOM_SEED', '1'))
+# "stdio" runs ECS/IaC as gateway worker pools, "http" as separate streamable-HTTP servers
+MCP_UPSTREAM = os.environ.get('MCP_UPSTREAM', 'stdio')
+BASE_PORT = int(os.environ.get('BASE_PORT', '18100'))
+LOG_DIR = os.environ.get('LOG_DIR', '/tmp/loadtest-logs')
+PGSERVER_DIR = os.environ.get('PGSERVER_DIR', '/tmp/loadtest-pgdata')
+REQUEST_TIMEOUT_SECONDS = float(os.environ.get('REQUEST_TIMEOUT_SECONDS', '120'))
+RESULTS_OUT = os.environ.get('RESULTS_OUT')
+BASELINE = os.environ.get('BASELINE')
+MAX_REGRESSION = float(os.environ.get('MAX_REGRESSION', '0.2'))
+# Differences smaller than this never count as a regression, whatever the ratio
+REGRESSION_FLOOR_MS = float(os.environ.get('REGRESSION_FLOOR_MS', '10'))
+# Scenario and stage rows with fewer samples (in either run) are too noisy at p95 to compare
+REGRESSION_MIN_SAMPLES = int(os.environ.get('REGRESSION_MIN_SAMPLES', '50'))
+
+PORTS = {name: BASE_PORT + offset for offset, name in enumerate(["aws", "alb", "gateway", "metrics", "broker", "ecs", "iac"])}
+URLS = {name: f"http://127.0.0.1:{port}" for name, port in PORTS.items()}
+
+CREDENTIALS = Credentials("AKIALOADTEST", "loadtest-secret")
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "n": len(samples),
+        "mean": round(statistics.fmean(samples), 1),
+        "p50": round(statistics.median(samples), 1),
+        "p95": round(percentile(samples, 0.95), 1),
+        "p99": round(percentile(samples, 0.99), 1),
+        "max": round(max(samples), 1)
+    }
+
+
+# --- Processes -----------------------------------------------------------
+
+def aws_env() -> dict:
+    env = {key: value for key, value in os.environ.items() if not key.startswith("AWS_")}
+    env.update(
+        AWS_ENDPOINT_URL=URLS["aws"],
+        AWS_ACCESS_KEY_ID="AKIALOADTEST",
+        AWS_SECRET_ACCESS_KEY="loadtest-secret",
+        AWS_REGION="us-east-1",
+        AWS_DEFAULT_REGION="us-east-1",
+        AWS_EC2_METADATA_DISABLED="true",
+        # The gateway starts workers with plain "python"; make that this interpreter
+        PATH=os.path.dirname(sys.executable) + os.pathsep + os.environ.get("PATH", ""),
+        PYTHONUNBUFFERED="1"
+    )
+    return env
+
+
+def start_postgres() -> dict:
+    """DB_* settings for the metrics server: the caller's database if DB_HOST is set, else an embedded pgserver"""
+    if os.environ.get("DB_HOST"):
+        return {key: os.environ[key] for key in ("DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASSWORD") if key in os.environ}
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit(
+            "No database: set DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD for a throwaway Postgres "
+            "(e.g. docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=loadtest postgres:16) or pip install pgserver"
+        )
+    server = pgserver.get_server(PGSERVER_DIR, cleanup_mode="stop")
+    query = parse_qs(urlparse(server.get_uri()).query)
+    print(f"🐘 Embedded Postgres in {PGSERVER_DIR}")
+    # Kept referenced so the server lives as long as the run
+    start_postgres.server = server
+    return {"DB_HOST": query["host"][0], "DB_PORT": "5432", "DB_NAME": "postgres", "DB_USER": "postgres", "DB_PASSWORD": "loadtest"}
+
+
+def uvicorn(name: str, app: str, cwd: str, env: dict) -> subprocess.Popen:
+    log = open(os.path.join(LOG_DIR, f"{name}.log"), "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(PORTS[name]), "--log-level", "warning"],
+        cwd=cwd, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def mcp_http_server(server_type: str, env: dict) -> subprocess.Popen:
+    log = open(os.path.join(LOG_DIR, f"{server_type}.log"), "w")
+    # Same layout as the gateway's server_command; each server's awslabs package must come first
+    if server_type == "ecs":
+        cmd = [sys.executable, "-m", "awslabs.ecs_mcp_server.main"]
+        python_path = f"{REPO_ROOT}/ecs-mcp-server:{REPO_ROOT}"
+    else:
+        cmd = [sys.executable, os.path.join(REPO_ROOT, "aws-iac-mcp-server", "awslabs", "aws_iac_mcp_server", "server.py")]
+        python_path = f"{REPO_ROOT}/aws-iac-mcp-server:{REPO_ROOT}"
+    env = dict(
+        env,
+        PYTHONPATH=python_path,
+        MCP_TRANSPORT="http", MCP_HTTP_HOST="127.0.0.1", MCP_HTTP_PORT=str(PORTS[server_type]),
+        FASTMCP_LOG_LEVEL="WARNING"
+    )
+    return subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+
+
+def start_stack(db_env: dict) -> dict:
+    os.makedirs(LOG_DIR, exist_ok=True)
+    env = aws_env()
+    processes = {"aws": uvicorn("aws", "fake_aws:app", LOADTEST_DIR, env)}
+    processes["metrics"] = uvicorn("metrics", "app:app", os.path.join(REPO_ROOT, "deployment-metrics-mcp"), dict(env, **db_env))
+
+    # The gateway and broker images install platform_aws_context; here the repo root stands in for it
+    gateway_env = dict(env, MCP_APP_ROOT=REPO_ROOT, PYTHONPATH=REPO_ROOT)
+    if MCP_UPSTREAM == "http":
+        for server_type in ("ecs", "iac"):
+            processes[server_type] = mcp_http_server(server_type, env)
+            gateway_env[f"MCP_HTTP_URL_{server_type.upper()}"] = f"{URLS[server_type]}/mcp"
+    processes["gateway"] = uvicorn("gateway", "gateway:app", os.path.join(REPO_ROOT, "mcp-gateway"), gateway_env)
+    processes["alb"] = uvicorn("alb", "alb:app", LOADTEST_DIR, dict(env, LOADTEST_METRICS_URL=URLS["metrics"], LOADTEST_GATEWAY_URL=URLS["gateway"]))
+    processes["broker"] = uvicorn("broker", "strands_app:app", os.path.join(REPO_ROOT, "broker-service"), dict(env, PYTHONPATH=REPO_ROOT))
+    return processes
+
+
+def stop_stack(processes: dict):
+    for process in reversed(list(processes.values())):
+        process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_ready(processes: dict, timeout: float = 180):
+    checks = {"aws": "/_loadtest/stats", "metrics": "/health", "gateway": "/ready", "broker": "/health", "ecs": "/health", "iac": "/health"}
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        for name, process in processes.items():
+            if name not in checks:
+                continue
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"{name} exited with {process.returncode}; see {LOG_DIR}/{name}.log")
+                try:
+                    if (await client.get(URLS[name] + checks[name])).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.time() > deadline:
+                    raise RuntimeError(f"{name} not ready after {timeout:.0f}s; see {LOG_DIR}/{name}.log")
+                await asyncio.sleep(0.5)
+
+
+# --- Load ----------------------------------------------------------------
+
+def signed_headers(path: str, body: bytes) -> dict:
+    """SigV4 headers as API Gateway would forward them; the broker only checks their shape"""
+    request = AWSRequest(method="POST", url=URLS["broker"] + path, data=body, headers={"Content-Type": "application/json"})
+    SigV4Auth(CREDENTIALS, "execute-api", "us-east-1").add_auth(request)
+    return dict(request.headers.items())
+
+
+def plan_requests(count: int, rng: random.Random) -> list:
+    weights = parse_mix(SCENARIO_MIX)
+    names = rng.choices(list(weights), weights=list(weights.values()), k=count)
+    return [(name, make_request(SCENARIOS[name], rng)) for name in names]
+
+
+async def send(client: httpx.AsyncClient, name: str, payload: dict) -> dict:
+    scenario = SCENARIOS[name]
+    path = "/admin" if scenario.tier == "admin" else "/ask"
+    body = json.dumps(dict(payload, shim_url=URLS["alb"])).encode()
+    start = time.perf_counter()
+    outcome = {"scenario": name, "status": 0, "timings": {}, "error": None}
+    try:
+        response = await client.post(URLS["broker"] + path, content=body, headers=signed_headers(path, body))
+        outcome["status"] = response.status_code
+        data = response.json()
+        if response.status_code != 200:
+            outcome["error"] = str(data.get("detail", response.text))[:200]
+        else:
+            outcome["timings"] = data.get("timings", {})
+            guard = data.get("debug", {}).get("guard_triggered")
+            if guard:
+                outcome["error"] = f"guard {guard}"
+    except Exception as e:
+        outcome["error"] = f"{type(e).__name__}: {e}"
+    outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+    return outcome
+
+
+async def run_load(client: httpx.AsyncClient, planned: list, concurrency: int) -> tuple:
+    results = []
+    queue = iter(planned)
+
+    async def worker():
+        for name, payload in queue:
+            results.append(await send(client, name, payload))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+# --- Report --------------------------------------------------------------
+
+def stage_samples(results: list) -> dict:
+    """Broker timings flattened to stage -> samples, e.g. backend.metrics -> [ms, ...]"""
+    stages = defaultdict(list)
+    for result in results:
+        for key, value in result["timings"].items():
+            if not key.endswith("_ms") or key == "total_ms":
+                continue
+            stage = key[:-3]
+            if isinstance(value, dict):
+                for target, ms in value.items():
+                    stages[f"{stage}.{target}"].append(ms)
+            else:
+                stages[stage].append(value)
+    return stages
+
+
+def build_report(results: list, wall_seconds: float, aws_calls: dict) -> dict:
+    ok = [result for result in results if not result["error"]]
+    by_scenario = defaultdict(list)
+    for result in ok:
+        by_scenario[result["scenario"]].append(result["latency_ms"])
+    return {
+        "config": {
+            "concurrency": CONCURRENCY, "requests": len(results), "scenario_mix": SCENARIO_MIX, "mcp_upstream": MCP_UPSTREAM,
+            "bedrock_latency_ms": os.environ.get("LOADTEST_BEDROCK_LATENCY_MS", "400"),
+            "aws_latency_ms": os.environ.get("LOADTEST_AWS_LATENCY_MS", "30")
+        },
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_rps": round(len(ok) / wall_seconds, 2),
+        "errors": len(results) - len(ok),
+        "error_samples": dict(Counter(result["error"] for result in results if result["error"]).most_common(5)),
+        "latency_ms": summarize([result["latency_ms"] for result in ok]) if ok else {},
+        "scenarios": {name: summarize(samples) for name, samples in sorted(by_scenario.items())},
+        "stages": {name: summarize(samples) for name, samples in sorted(stage_samples(ok).items())},
+        "aws_calls_per_request": {key: round(count / len(results), 2) for key, count in sorted(aws_calls.items())}
+    }
+
+
+def print_report(report: dict):
+    config = report["config"]
+    print(
+        f"\n⏱️  {config['requests']} requests at concurrency {config['concurrency']} ({config['mcp_upstream']} MCP upstreams) "
+        f"in {report['wall_seconds']}s: {report['throughput_rps']} req/s, {report['errors']} errors"
+    )
+    for error, count in report["error_samples"].items():
+        print(f"   ❌ {count}x {error}")
+
+    header = f"{'':<24}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    row = lambda label, s: f"{label:<24}{s['n']:>6}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}"
+    print(f"\nEnd-to-end latency (ms)\n{header}")
+    if report["latency_ms"]:
+        print(row("all", report["latency_ms"]))
+    for name, stats in report["scenarios"].items():
+        print(row(name, stats))
+    print(f"\nBroker stage breakdown (ms, requests that hit the stage)\n{header}")
+    for name, stats in report["stages"].items():
+        print(row(name, stats))
+    print("\nAWS calls per request")
+    for key, per_request in report["aws_calls_per_request"].items():
+        print(f"  {key:<40}{per_request:>8.2f}")
+
+
+def regressions(report: dict, baseline: dict) -> list:
+    """p95 and throughput comparisons that got worse by more than MAX_REGRESSION"""
+    found = []
+
+    def compare(label: str, current: float, previous: float):
+        if current > previous * (1 + MAX_REGRESSION) and current - previous > REGRESSION_FLOOR_MS:
+            found.append(f"{label} p95 {previous:.0f}ms -> {current:.0f}ms")
+
+    if report["latency_ms"] and baseline.get("latency_ms"):
+        compare("all", report["latency_ms"]["p95"], baseline["latency_ms"]["p95"])
+    for section in ("scenarios", "stages"):
+        for name, stats in report[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if previous and min(stats["n"], previous["n"]) >= REGRESSION_MIN_SAMPLES:
+                compare(f"{section[:-1]} {name}", stats["p95"], previous["p95"])
+    if report["throughput_rps"] < baseline.get("throughput_rps", 0) * (1 - MAX_REGRESSION):
+        found.append(f"throughput {baseline['throughput_rps']} -> {report['throughput_rps']} req/s")
+    return found
+
+
+async def main() -> int:
+    db_env = start_postgres()
+    os.environ.update(db_env)
+    seed.seed()
+
+    processes = start_stack(db_env)
+    try:
+        await wait_ready(processes)
+        rng = random.Random(RANDOM_SEED)
+        limits = httpx.Limits(max_connections=CONCURRENCY * 2, max_keepalive_connections=CONCURRENCY * 2)
+        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS, limits=limits) as client:
+            # One pass over every scenario so worker spawn, imports and first-call caches stay out of the samples
+            warmup = [(name, make_request(SCENARIOS[name], rng)) for name in parse_mix(SCENARIO_MIX)]
+            await run_load(client, warmup, CONCURRENCY)
+            await client.post(URLS["aws"] + "/_loadtest/reset")
+
+            print(f"🚀 {REQUESTS} requests, concurrency {CONCURRENCY}, mix {SCENARIO_MIX}")
+            results, wall = await run_load(client, plan_requests(REQUESTS, rng), CONCURRENCY)
+            aws_calls = (await client.get(URLS["aws"] + "/_loadtest/stats")).json()
+    finally:
+        stop_stack(processes)
+
+    report = build_report(results, wall, aws_calls)
+    print_report(report)
+    if RESULTS_OUT:
+        with open(RESULTS_OUT, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Results written to {RESULTS_OUT}")
+    if BASELINE:
+        with open(BASELINE) as f:
+            found = regressions(report, json.load(f))
+        for line in found:
+            print(f"📉 Regression: {line}")
+        if found:
+            return 1
+        print(f"✅ Within {MAX_REGRESSION:.0%} of {BASELINE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,153 @@
+"""
+Scripted conversations for the load test
+
+Each scenario is a prompt template plus the tool-use turns the stub model plays
+back for it. The driver fills the template from the seeded data; the stub model
+recovers the same values from the prompt text, so one scenario definition drives
+both sides without any shared state between processes.
+"""
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Seeded fixture sizes - the fake AWS endpoint and seed.py build the same names from these
+REPOSITORIES = [f"loadtest-org/service-{i}" for i in range(8)]
+RUNS_PER_REPOSITORY = 25
+STEPS_PER_RUN = 12
+CLUSTERS = [f"loadtest-cluster-{i}" for i in range(4)]
+SERVICES_PER_CLUSTER = 6
+STACKS = [f"loadtest-stack-{i}" for i in range(6)]
+
+
+def run_id(repository: str, index: int) -> str:
+    return f"loadtest-{repository.split('-')[-1]}-{index:04d}"
+
+
+@dataclass
+class Scenario:
+    name: str
+    tier: str
+    prompt: str
+    # Each turn is a list of (tool name, input template) played back in one model response
+    turns: List[List[tuple]]
+    answer: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+    def pattern(self) -> re.Pattern:
+        regex = re.escape(self.prompt)
+        for name in re.findall(r"\{(\w+)\}", self.prompt):
+            regex = regex.replace(re.escape("{" + name + "}"), f"(?P<{name}>[\\w./-]+)")
+        return re.compile(f"^{regex}$")
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario(
+            name="ecs_services",
+            tier="user",
+            prompt="List the ECS services in cluster {cluster}",
+            turns=[
+                [("ecs_call_tool", {"api_operation": "DescribeClusters", "api_params": {"clusters": ["{cluster}"]}})],
+                [("ecs_call_tool", {"api_operation": "ListServices", "api_params": {"cluster": "{cluster}"}})]
+            ],
+            answer="Cluster {cluster} is ACTIVE and runs the services listed above."
+        ),
+        Scenario(
+            name="iac_troubleshoot",
+            tier="user",
+            prompt="Why did CloudFormation stack {stack} fail?",
+            turns=[[("iac_call_tool", {"stack_name": "{stack}"})]],
+            answer="Stack {stack} rolled back after a resource failed to create."
+        ),
+        Scenario(
+            name="deploy_summary",
+            tier="user",
+            prompt="Summarise deployment run {run_id} of {repository}",
+            turns=[
+                [("deploy_get_run", {"run_id": "{run_id}"}), ("deploy_get_summary", {"run_id": "{run_id}"})],
+                [("deploy_get_steps", {"run_id": "{run_id}"})]
+            ],
+            answer="Run {run_id} finished; the step breakdown is above.",
+            metadata={"repository": "{repository}"}
+        ),
+        Scenario(
+            name="deploy_latest",
+            tier="user",
+            prompt="Show the latest deployment runs of {repository}",
+            turns=[[("deploy_find_latest", {})]],
+            answer="These are the most recent runs of {repository}.",
+            metadata={"repository": "{repository}"}
+        ),
+        Scenario(
+            name="fan_out",
+            tier="admin",
+            prompt="Give me a health overview of cluster {cluster}, stack {stack} and deployment run {run_id} of {repository}",
+            turns=[[
+                ("ecs_call_tool", {"api_operation": "DescribeServices", "api_params": {"cluster": "{cluster}", "services": ["{cluster}-svc-0"]}}),
+                ("iac_call_tool", {"stack_name": "{stack}"}),
+                ("deploy_get_summary", {"run_id": "{run_id}"})
+            ]],
+            answer="Cluster {cluster}, stack {stack} and run {run_id} are summarised above.",
+            metadata={"repository": "{repository}"}
+        ),
+        Scenario(
+            name="chat",
+            tier="user",
+            prompt="What can you help me with today?",
+            turns=[],
+            answer="I can look up ECS services, CloudFormation stacks and deployment runs."
+        )
+    ]
+}
+
+DEFAULT_MIX = "ecs_services=3,iac_troubleshoot=2,deploy_summary=3,deploy_latest=2,fan_out=1,chat=1"
+
+
+def fill(value: Any, variables: Dict[str, str]) -> Any:
+    """Substitute {name} placeholders throughout a nested input template"""
+    if isinstance(value, str):
+        return value.format(**variables)
+    if isinstance(value, dict):
+        return {key: fill(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, variables) for item in value]
+    return value
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """"name=weight,..." -> weights, rejecting unknown scenarios"""
+    weights = {}
+    for part in filter(None, (item.strip() for item in mix.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def random_variables(rng: random.Random) -> Dict[str, str]:
+    repository = rng.choice(REPOSITORIES)
+    return {
+        "cluster": rng.choice(CLUSTERS),
+        "stack": rng.choice(STACKS),
+        "repository": repository,
+        "run_id": run_id(repository, rng.randrange(RUNS_PER_REPOSITORY))
+    }
+
+
+def make_request(scenario: Scenario, rng: random.Random) -> Dict[str, Any]:
+    variables = random_variables(rng)
+    return {
+        "ask_text": scenario.prompt.format(**variables),
+        "metadata": fill(scenario.metadata, variables)
+    }
+
+
+def match_prompt(text: str) -> Optional[tuple]:
+    """(scenario, variables) for a prompt the driver generated, else None"""
+    for scenario in SCENARIOS.values():
+        match = scenario.pattern().match(text.strip())
+        if match:
+            return scenario, match.groupdict()
+    return None
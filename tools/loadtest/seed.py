@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Create the metrics schema in a throwaway Postgres and fill it with load-test runs
+
+Uses the same DB_* variables as deployment-metrics-mcp. Only rows whose run_id
+starts with "loadtest-" are replaced, so pointing it at a shared database
+doesn't touch anything else.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from scenarios import REPOSITORIES, RUNS_PER_REPOSITORY, STEPS_PER_RUN, run_id
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+MIGRATION = os.path.join(REPO_ROOT, 'sql', 'migrations', '001_init.sql')
+
+STEP_NAMES = ["checkout", "setup", "lint", "unit-tests", "build", "scan", "push-image", "plan", "deploy", "smoke-test", "notify", "cleanup"]
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.environ.get('DB_HOST', '127.0.0.1'),
+        port=int(os.environ.get('DB_PORT', '5432')),
+        dbname=os.environ.get('DB_NAME', 'postgres'),
+        user=os.environ.get('DB_USER', 'postgres'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        connect_timeout=10
+    )
+
+
+def build_rows(now: datetime):
+    runs, steps = [], []
+    for repository in REPOSITORIES:
+        organization = repository.split('/')[0]
+        for index in range(RUNS_PER_REPOSITORY):
+            rid = run_id(repository, index)
+            start = now - timedelta(hours=RUNS_PER_REPOSITORY - index)
+            # Newest run of each repository is still going; every fifth run failed
+            status = 'RUNNING' if index == RUNS_PER_REPOSITORY - 1 else ('FAILED' if index % 5 == 4 else 'SUCCEEDED')
+            duration = 300 + (index * 37) % 400
+            runs.append((
+                rid, repository, organization, 'main', 'deploy', 'deploy-ecs', status,
+                'Smoke test failed' if status == 'FAILED' else None,
+                start, None if status == 'RUNNING' else start + timedelta(seconds=duration),
+                None if status == 'RUNNING' else duration, f'runner-{index % 4}'
+            ))
+            step_start = start
+            for step_index in range(STEPS_PER_RUN):
+                step_duration = 10 + (step_index * 13 + index) % 50
+                if status == 'RUNNING' and step_index >= STEPS_PER_RUN - 2:
+                    step_status = 'RUNNING' if step_index == STEPS_PER_RUN - 2 else 'PENDING'
+                elif status == 'FAILED' and step_index == 9:
+                    step_status = 'FAILED'
+                else:
+                    step_status = 'SUCCEEDED'
+                steps.append((
+                    f'{rid}-{step_index:02d}', rid, STEP_NAMES[step_index % len(STEP_NAMES)], step_index, step_status,
+                    step_start, step_start + timedelta(seconds=step_duration), step_duration
+                ))
+                step_start += timedelta(seconds=step_duration)
+    return runs, steps
+
+
+def seed():
+    runs, steps = build_rows(datetime.now(timezone.utc))
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            with open(MIGRATION) as f:
+                cur.execute(f.read())
+            # Written by the metrics-writer Lambda and read by deploy_get_run, but not in 001_init.sql
+            cur.execute("ALTER TABLE job_metrics ADD COLUMN IF NOT EXISTS runner_name varchar")
+            cur.execute("DELETE FROM job_step_metrics WHERE run_id LIKE 'loadtest-%'")
+            cur.execute("DELETE FROM job_metrics WHERE run_id LIKE 'loadtest-%'")
+            execute_values(cur, """
+                INSERT INTO job_metrics (
+                    run_id, repository, organization, branch, workflow_name, job_name, job_status,
+                    job_error_message, job_start_time, job_end_time, job_duration_seconds, runner_name
+                ) VALUES %s
+            """, runs)
+            execute_values(cur, """
+                INSERT INTO job_step_metrics (
+                    step_id, run_id, step_name, step_index, step_status, step_start_time, step_end_time, step_duration_seconds
+                ) VALUES %s
+            """, steps)
+    finally:
+        conn.close()
+    print(f"🌱 Seeded {len(runs)} runs and {len(steps)} steps across {len(REPOSITORIES)} repositories")
+
+
+if __name__ == "__main__":
+    seed()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for request-scoped tool context in the Strands agents
+
+Simulates many overlapping /ask and /admin requests in one process. Each request
+binds its own context and invokes tools the way Strands does (asyncio.to_thread),
+while the backend call is replaced by a slow echo so requests interleave.
+Every tool call must only ever see the account, tier and metadata of the
+request that made it.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# The broker imports platform_aws_context, which its image installs from the repo root
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'broker-service'))
+
+from agents import agents
+from agents.param_resolution import build_request_context
+
+CONCURRENT_REQUESTS = int(os.environ.get('CONCURRENT_REQUESTS', '200'))
+CALLS_PER_REQUEST = int(os.environ.get('CALLS_PER_REQUEST', '5'))
+
+
+def echo_backend(tool_name: str, model_args: dict, ctx: dict) -> dict:
+    """Stand-in for execute_tool: sleeps to force interleaving, then echoes what it saw"""
+    time.sleep(random.uniform(0, 0.02))
+    seen = {
+        "account_id": model_args.get("account_id"),
+        "region": model_args.get("region"),
+        "tier": ctx.get("tier"),
+        "repository": ctx.get("metadata", {}).get("repository"),
+        "run_id": ctx.get("metadata", {}).get("run_id")
+    }
+    return {"result": json.dumps(seen)}
+
+
+async def simulated_request(index: int) -> list:
+    """One broker request: bind context, then call tools from worker threads"""
+    tier = "admin" if index % 2 else "user"
+    ctx = build_request_context({
+        "ask_text": f"request {index}",
+        "account_id": f"{index:012d}",
+        "region": "us-east-1" if index % 3 else "eu-west-1",
+        "metadata": {"repository": f"org/repo-{index}", "run_id": str(index)}
+    }, tier=tier)
+    agents.set_tool_context(ctx)
+
+    expected = {
+        "account_id": ctx["aws"]["account_id"],
+        "region": ctx["aws"]["region"],
+        "tier": tier,
+        "repository": f"org/repo-{index}",
+        "run_id": str(index)
+    }
+
+    failures = []
+    for _ in range(CALLS_PER_REQUEST):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        output = await asyncio.to_thread(agents.ecs_call_tool, api_operation="ListClusters", api_params={})
+        seen = json.loads(output)
+        if seen != expected:
+            failures.append({"request": index, "expected": expected, "seen": seen})
+    return failures
+
+
+async def run_stress() -> list:
+    results = await asyncio.gather(*(
+        asyncio.create_task(simulated_request(i)) for i in range(CONCURRENT_REQUESTS)
+    ))
+    return [failure for request_failures in results for failure in request_failures]
+
+
+def test_no_cross_request_leakage():
+    """Concurrent requests never observe each other's tool context"""
+    original_execute_tool = agents.execute_tool
+    agents.execute_tool = echo_backend
+    try:
+        failures = asyncio.run(run_stress())
+    finally:
+        agents.execute_tool = original_execute_tool
+
+    assert not failures, f"{len(failures)} tool calls saw another request's context, e.g. {failures[0]}"
+    assert agents.get_tool_context() == {}, "Context leaked out of the request tasks"
+
+
+if __name__ == "__main__":
+    print(f"🧪 {CONCURRENT_REQUESTS} concurrent requests x {CALLS_PER_REQUEST} tool calls")
+    start = time.time()
+    try:
+        test_no_cross_request_leakage()
+        print(f"✅ PASS: no cross-request leakage ({time.time() - start:.2f}s)")
+    except AssertionError as e:
+        print(f"❌ FAIL: {e}")
+        sys.exit(1)